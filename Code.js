@@ -3,18 +3,64 @@
 // TODO: Replace with your actual Google Sheet ID
 const SPREADSHEET_ID = "1Saf2NQ2IkhgWV9ks-9q2dvgporkMixnrPcWB8jqZNDA";
 
+// Ended sessions older than this many days are moved from the Sessions sheet
+// to the Sessions Archive sheet by compactSessions (see installCompactionTrigger)
+const SESSION_ARCHIVE_AFTER_DAYS = 7;
+
+// Whether compaction keeps students' screenshots (base64 images in the
+// Screenshots sheet) older than SESSION_ARCHIVE_AFTER_DAYS
+const SESSION_ARCHIVE_KEEP_SCREENSHOTS = false;
+
 // ------------------ END: Manual Configuration --------------------
 
 /**
  * Serves the HTML file when the Web App URL is visited.
  */
 function doGet(e) {
-  return HtmlService.createHtmlOutputFromFile('index')
+  const template = HtmlService.createTemplateFromFile('index');
+  // Keys the browser's dashboard cache, so accounts sharing a browser don't see each other's boards
+  template.userEmail = Session.getActiveUser().getEmail();
+  return template.evaluate()
     .setTitle('Classroom Dashboard')
     .setXFrameOptionsMode(HtmlService.XFrameOptionsMode.ALLOWALL) // Allows embedding in Google Sites
     .addMetaTag('viewport', 'width=device-width, initial-scale=1'); // Ensures mobile responsiveness
 }
 
+/**
+ * Contents of another HTML file of the project, for <?!= include('name') ?> in index.html.
+ * A missing file (e.g. tailwind.html before the CSS build has run) includes nothing.
+ * @param {string} filename File name without the .html extension.
+ * @returns {string} The file's HTML.
+ */
+function include(filename) {
+  try {
+    return HtmlService.createHtmlOutputFromFile(filename).getContent();
+  } catch (e) {
+    Logger.log("Could not include " + filename + ": " + e);
+    return "";
+  }
+}
+
+// Saved dashboards live in the Saved Dashboards sheet, one row per dashboard:
+// [User Email, Dashboard Name, Last Saved, Widget Count, Size, Chunks, JSON chunk 1, ...].
+// Listing reads only the first DASHBOARD_META_COLUMNS columns; a dashboard's
+// JSON is read when it is opened, and saving one rewrites only its row. The
+// JSON is split over several cells because a cell holds at most 50,000
+// characters.
+//
+// Before, each user had one row in the Dashboards sheet holding a JSON map of
+// all of their dashboards. That row is moved to Saved Dashboards the first
+// time the user's dashboards are accessed (see migrateLegacyDashboards).
+//
+// Names are stored JSON-encoded ("\"Board 1\"") so Sheets keeps them as text:
+// written as is, "001" would come back as 1, "3/4" as a date and "=x" as a
+// formula, and the name would no longer match (see dashboardNameCell).
+const DASHBOARD_META_COLUMNS = 6;
+const DASHBOARD_CHUNK_CHARS = 45000;
+const DASHBOARD_MAX_CHUNKS = 40;              // ~1.8 MB of JSON per dashboard
+const DASHBOARD_MIGRATED_CACHE_PREFIX = 'dashboardsMigrated:';
+const DASHBOARD_MIGRATED_CACHE_SECONDS = 21600; // CacheService maximum (6 hours)
+
 /**
  * Gets the sheet where the dashboards are stored.
  * @returns {Sheet} The sheet object.
@@ -22,10 +68,10 @@ function doGet(e) {
 function getSheet() {
   try {
     const spreadsheet = SpreadsheetApp.openById(SPREADSHEET_ID);
-    let sheet = spreadsheet.getSheetByName("Dashboards");
+    let sheet = spreadsheet.getSheetByName("Saved Dashboards");
     if (!sheet) {
-      sheet = spreadsheet.insertSheet("Dashboards");
-      sheet.appendRow(["User Email", "Dashboard JSON", "Last Saved"]);
+      sheet = spreadsheet.insertSheet("Saved Dashboards");
+      sheet.appendRow(["User Email", "Dashboard Name", "Last Saved", "Widget Count", "Size", "Chunks", "Dashboard JSON"]);
     }
     return sheet;
   } catch (e) {
@@ -36,13 +82,16 @@ function getSheet() {
 }
 
 /**
- * Helper to get user row and data
+ * Helper to get a user's row and dashboards map from the legacy Dashboards sheet.
+ * Only the email column is scanned; the JSON of other users is not read.
  */
 function getUserData(sheet, userEmail) {
-  const data = sheet.getDataRange().getValues();
-  for (let i = 1; i < data.length; i++) {
-    if (data[i][0] == userEmail) {
-      let jsonData = data[i][1];
+  const lastRow = sheet.getLastRow();
+  const emails = lastRow > 1 ? sheet.getRange(2, 1, lastRow - 1, 1).getValues() : [];
+  for (let i = 0; i < emails.length; i++) {
+    if (emails[i][0] == userEmail) {
+      const values = sheet.getRange(i + 2, 1, 1, 3).getValues()[0];
+      let jsonData = values[1];
       let dashboards = {};
       try {
         if (jsonData) {
@@ -58,39 +107,213 @@ function getUserData(sheet, userEmail) {
       } catch (e) {
         Logger.log("Error parsing JSON: " + e);
       }
-      return { row: i + 1, dashboards: dashboards };
+      return { row: i + 2, dashboards: dashboards, lastSaved: values[2] };
     }
   }
-  return { row: -1, dashboards: {} };
+  return { row: -1, dashboards: {}, lastSaved: null };
+}
+
+/**
+ * Splits text into chunks of at most maxChars for separate cells. A chunk
+ * never starts with a character that would make Sheets read it as a formula
+ * or a number, or drop it (a leading apostrophe).
+ * @param {string} text The text to split.
+ * @param {number} maxChars Maximum chunk length.
+ * @returns {string[]} The chunks.
+ */
+function splitCells(text, maxChars) {
+  const chunks = [];
+  let start = 0;
+  while (start < text.length) {
+    let end = Math.min(start + maxChars, text.length);
+    while (end < text.length && end > start + 1 && /[=+\-@'\d.\s]/.test(text.charAt(end))) end--;
+    chunks.push(text.substring(start, end));
+    start = end;
+  }
+  return chunks;
+}
+
+/**
+ * The Dashboard Name cell of a name: the name JSON-encoded, which starts with a
+ * quote and so is never read as a number, date or formula.
+ * @param {string} name The dashboard name.
+ * @returns {string} The cell's text.
+ */
+function dashboardNameCell(name) {
+  return JSON.stringify(String(name));
+}
+
+/**
+ * The dashboard name stored in a Dashboard Name cell.
+ * @param {*} cell The cell's value.
+ * @returns {string} The name.
+ */
+function dashboardName(cell) {
+  try {
+    const name = JSON.parse(cell);
+    if (typeof name === 'string') return name;
+  } catch (e) {
+    // Not written by dashboardNameCell; use the cell as is
+  }
+  return String(cell);
+}
+
+/**
+ * Widens a sheet to at least `width` columns. Writing a range past the last
+ * column throws (appendRow widens the sheet by itself); a new sheet has 26.
+ * @param {Sheet} sheet The sheet.
+ * @param {number} width Columns needed.
+ */
+function ensureColumns(sheet, width) {
+  const maxColumns = sheet.getMaxColumns();
+  if (width > maxColumns) sheet.insertColumnsAfter(maxColumns, width - maxColumns);
+}
+
+/**
+ * Builds the Saved Dashboards row of a dashboard.
+ * @param {string} userEmail The owner.
+ * @param {string} name The dashboard name.
+ * @param {object} dashboard The parsed dashboard.
+ * @param {Date} savedAt Last saved time.
+ * @returns {Array} The row's cells.
+ */
+function dashboardRow(userEmail, name, dashboard, savedAt) {
+  const json = JSON.stringify(dashboard);
+  const chunks = splitCells(json, DASHBOARD_CHUNK_CHARS);
+  const widgetCount = dashboard && Array.isArray(dashboard.widgets) ? dashboard.widgets.length : 0;
+  return [userEmail, dashboardNameCell(name), savedAt, widgetCount, json.length, chunks.length].concat(chunks);
+}
+
+/**
+ * Metadata of a dashboard for the client's list.
+ * @param {Array} values The first DASHBOARD_META_COLUMNS cells of its row.
+ * @returns {object} { name, lastSaved (ms), widgets, size (characters of JSON) }.
+ */
+function dashboardMeta(values) {
+  const lastSaved = values[2] ? new Date(values[2]).getTime() : NaN;
+  return {
+    name: dashboardName(values[1]),
+    lastSaved: isNaN(lastSaved) ? null : lastSaved,
+    widgets: Number(values[3]) || 0,
+    size: Number(values[4]) || 0
+  };
+}
+
+/**
+ * Finds a user's dashboards, reading only the metadata columns.
+ * @param {Sheet} sheet The Saved Dashboards sheet.
+ * @param {string} userEmail The owner.
+ * @returns {Array<{row: number, values: Array}>} 1-based rows and their metadata cells, in sheet order.
+ */
+function findDashboardRows(sheet, userEmail) {
+  const lastRow = sheet.getLastRow();
+  if (lastRow < 2) return [];
+  const data = sheet.getRange(2, 1, lastRow - 1, DASHBOARD_META_COLUMNS).getValues();
+  const rows = [];
+  for (let i = 0; i < data.length; i++) {
+    if (data[i][0] === userEmail) rows.push({ row: i + 2, values: data[i] });
+  }
+  return rows;
+}
+
+/**
+ * Finds one of a user's dashboards by name.
+ * @param {Sheet} sheet The Saved Dashboards sheet.
+ * @param {string} userEmail The owner.
+ * @param {string} name The dashboard name.
+ * @returns {?{row: number, values: Array}} 1-based row and its metadata cells, or null.
+ */
+function findDashboardRow(sheet, userEmail, name) {
+  const rows = findDashboardRows(sheet, userEmail);
+  for (let i = 0; i < rows.length; i++) {
+    if (dashboardName(rows[i].values[1]) === name) return rows[i];
+  }
+  return null;
+}
+
+/**
+ * Reads and parses the JSON of a dashboard row.
+ * @param {Sheet} sheet The Saved Dashboards sheet.
+ * @param {{row: number, values: Array}} found A row from findDashboardRow.
+ * @returns {object} The dashboard.
+ */
+function readDashboard(sheet, found) {
+  const chunks = Number(found.values[5]) || 0;
+  if (!chunks) return {};
+  return JSON.parse(sheet.getRange(found.row, DASHBOARD_META_COLUMNS + 1, 1, chunks).getValues()[0].join(''));
+}
+
+/**
+ * Moves the user's dashboards map from the legacy Dashboards sheet to one row
+ * per dashboard, then deletes the legacy row. Names already saved in the new
+ * sheet are kept. The script cache remembers migrated users, so afterwards
+ * this costs one cache lookup.
+ * @param {Sheet} sheet The Saved Dashboards sheet.
+ * @param {string} userEmail The user.
+ */
+function migrateLegacyDashboards(sheet, userEmail) {
+  const cache = CacheService.getScriptCache();
+  const key = DASHBOARD_MIGRATED_CACHE_PREFIX + userEmail;
+  if (cache.get(key)) return;
+
+  const legacySheet = sheet.getParent().getSheetByName("Dashboards");
+  if (legacySheet) {
+    // Two tabs of the same teacher must not migrate the same row twice
+    const lock = LockService.getScriptLock();
+    lock.waitLock(10000);
+    try {
+      const legacy = getUserData(legacySheet, userEmail);
+      if (legacy.row != -1) {
+        const existing = findDashboardRows(sheet, userEmail).map(d => dashboardName(d.values[1]));
+        const savedAt = legacy.lastSaved || new Date();
+        const rows = Object.keys(legacy.dashboards)
+          .filter(name => existing.indexOf(name) === -1)
+          .map(name => dashboardRow(userEmail, name, legacy.dashboards[name], savedAt));
+        if (rows.length > 0) {
+          const width = Math.max.apply(null, rows.map(r => r.length));
+          rows.forEach(r => { while (r.length < width) r.push(""); });
+          ensureColumns(sheet, width);
+          sheet.getRange(sheet.getLastRow() + 1, 1, rows.length, width).setValues(rows);
+        }
+        legacySheet.deleteRow(legacy.row);
+      }
+    } finally {
+      lock.releaseLock();
+    }
+  }
+  cache.put(key, '1', DASHBOARD_MIGRATED_CACHE_SECONDS);
 }
 
 /**
  * Saves a dashboard by name.
  * @param {string} name The name of the dashboard.
  * @param {string} dashboardJson The JSON string of the dashboard configuration.
+ * @returns {object} Result with the saved dashboard's metadata.
  */
 function saveDashboard(name, dashboardJson) {
   try {
     const sheet = getSheet();
     const userEmail = Session.getActiveUser().getEmail();
     if (!userEmail) throw new Error("Could not identify user.");
-    
-    const { row, dashboards } = getUserData(sheet, userEmail);
-    
-    // Update or add the specific dashboard
-    dashboards[name] = JSON.parse(dashboardJson);
-    
-    const timestamp = new Date();
-    const newJsonData = JSON.stringify(dashboards);
-
-    if (row != -1) {
-      sheet.getRange(row, 2).setValue(newJsonData);
-      sheet.getRange(row, 3).setValue(timestamp);
+    migrateLegacyDashboards(sheet, userEmail);
+
+    const values = dashboardRow(userEmail, name, JSON.parse(dashboardJson), new Date());
+    if (values[5] > DASHBOARD_MAX_CHUNKS) {
+      return { success: false, message: "Dashboard is too large to save." };
+    }
+
+    const existing = findDashboardRow(sheet, userEmail, name);
+    if (existing) {
+      // Blank the chunk cells of the previous version that the new one doesn't use
+      const width = DASHBOARD_META_COLUMNS + (Number(existing.values[5]) || 0);
+      while (values.length < width) values.push("");
+      ensureColumns(sheet, values.length);
+      sheet.getRange(existing.row, 1, 1, values.length).setValues([values]);
     } else {
-      sheet.appendRow([userEmail, newJsonData, timestamp]);
+      sheet.appendRow(values);
     }
-    
-    return { success: true, message: "Dashboard saved successfully!" };
+
+    return { success: true, message: "Dashboard saved successfully!", dashboard: dashboardMeta(values) };
   } catch (e) {
     Logger.log("Error saving dashboard: " + e.toString());
     return { success: false, message: "Error saving dashboard: " + e.message };
@@ -106,17 +329,11 @@ function deleteDashboard(name) {
     const sheet = getSheet();
     const userEmail = Session.getActiveUser().getEmail();
     if (!userEmail) throw new Error("Could not identify user.");
+    migrateLegacyDashboards(sheet, userEmail);
 
-    const { row, dashboards } = getUserData(sheet, userEmail);
-
-    if (dashboards[name] !== undefined) {
-      delete dashboards[name];
-      const timestamp = new Date();
-      const newJsonData = JSON.stringify(dashboards);
-      if (row != -1) {
-        sheet.getRange(row, 2).setValue(newJsonData);
-        sheet.getRange(row, 3).setValue(timestamp);
-      }
+    const existing = findDashboardRow(sheet, userEmail, name);
+    if (existing) {
+      sheet.deleteRow(existing.row);
       return { success: true, message: "Dashboard deleted." };
     } else {
       return { success: false, message: "Dashboard not found." };
@@ -137,14 +354,14 @@ function renameDashboard(oldName, newName) {
     const sheet = getSheet();
     const userEmail = Session.getActiveUser().getEmail();
     if (!userEmail) throw new Error("Could not identify user.");
+    migrateLegacyDashboards(sheet, userEmail);
 
-    const { row, dashboards } = getUserData(sheet, userEmail);
-
-    if (dashboards[oldName] === undefined) {
+    const existing = findDashboardRow(sheet, userEmail, oldName);
+    if (!existing) {
       return { success: false, message: "Dashboard not found." };
     }
 
-    if (dashboards[newName] !== undefined) {
+    if (findDashboardRow(sheet, userEmail, newName)) {
         return { success: false, message: "Dashboard with this name already exists." };
     }
 
@@ -152,15 +369,7 @@ function renameDashboard(oldName, newName) {
         return { success: false, message: "Name cannot be empty." };
     }
 
-    dashboards[newName] = dashboards[oldName];
-    delete dashboards[oldName];
-
-    const timestamp = new Date();
-    const newJsonData = JSON.stringify(dashboards);
-    if (row != -1) {
-      sheet.getRange(row, 2).setValue(newJsonData);
-      sheet.getRange(row, 3).setValue(timestamp);
-    }
+    sheet.getRange(existing.row, 2).setValue(dashboardNameCell(newName));
 
     return { success: true, message: "Dashboard renamed." };
   } catch (e) {
@@ -170,7 +379,55 @@ function renameDashboard(oldName, newName) {
 }
 
 /**
- * Loads all dashboards for the user.
+ * Lists the user's dashboards without their contents.
+ * @returns {object} { success, dashboards: [{ name, lastSaved, widgets, size }] }.
+ */
+function listDashboards() {
+  try {
+    const sheet = getSheet();
+    const userEmail = Session.getActiveUser().getEmail();
+    if (!userEmail) return { success: true, dashboards: [] };
+    migrateLegacyDashboards(sheet, userEmail);
+
+    return { success: true, dashboards: findDashboardRows(sheet, userEmail).map(d => dashboardMeta(d.values)) };
+  } catch (e) {
+    Logger.log("Error listing dashboards: " + e.toString());
+    return { success: false, message: "Error listing dashboards: " + e.message, dashboards: [] };
+  }
+}
+
+/**
+ * Loads one dashboard.
+ * @param {string} name The name of the dashboard.
+ * @returns {object} { success, name, lastSaved, data } with the parsed dashboard.
+ *     lastSaved is the version clients cache it under (see listDashboards).
+ */
+function getDashboard(name) {
+  try {
+    const sheet = getSheet();
+    const userEmail = Session.getActiveUser().getEmail();
+    if (!userEmail) throw new Error("Could not identify user.");
+    migrateLegacyDashboards(sheet, userEmail);
+
+    const existing = findDashboardRow(sheet, userEmail, name);
+    if (!existing) {
+      return { success: false, message: "Dashboard not found." };
+    }
+    return {
+      success: true,
+      name: name,
+      lastSaved: dashboardMeta(existing.values).lastSaved,
+      data: readDashboard(sheet, existing)
+    };
+  } catch (e) {
+    Logger.log("Error loading dashboard: " + e.toString());
+    return { success: false, message: "Error loading dashboard: " + e.message };
+  }
+}
+
+/**
+ * Loads all dashboards for the user. Kept for clients that predate
+ * listDashboards/getDashboard; it reads every dashboard in full.
  * @returns {string} JSON string of the map of dashboards.
  */
 function getDashboards() {
@@ -178,8 +435,12 @@ function getDashboards() {
     const sheet = getSheet();
     const userEmail = Session.getActiveUser().getEmail();
     if (!userEmail) return JSON.stringify({});
-    
-    const { dashboards } = getUserData(sheet, userEmail);
+    migrateLegacyDashboards(sheet, userEmail);
+
+    const dashboards = {};
+    findDashboardRows(sheet, userEmail).forEach(d => {
+      dashboards[dashboardName(d.values[1])] = readDashboard(sheet, d);
+    });
     return JSON.stringify(dashboards);
   } catch (e) {
     Logger.log("Error loading dashboards: " + e.toString());
@@ -227,6 +488,83 @@ function generateSessionCode() {
   return code;
 }
 
+// Session code -> Sessions row, kept in the script cache so lookups don't
+// read the whole sheet. Rows never move (sessions are only marked inactive),
+// so an entry stays valid until the sheet is compacted; every hit is still
+// checked against the row it points to.
+const SESSION_ROW_CACHE_PREFIX = 'sessionRow:';
+const SESSION_ROW_CACHE_SECONDS = 21600; // CacheService maximum (6 hours)
+
+/**
+ * Finds the Sessions row for a code: the active session with that code, or
+ * else the newest ended one. Uses the cached row index when it is still
+ * correct and falls back to scanning only the code and active columns.
+ * @param {Sheet} sheet The sessions sheet.
+ * @param {string} code The session code.
+ * @returns {?{row: number, values: Array}} 1-based row and its 5 cells, or null.
+ */
+function findSessionRow(sheet, code) {
+  const cache = CacheService.getScriptCache();
+  const key = SESSION_ROW_CACHE_PREFIX + code;
+
+  const cachedRow = Number(cache.get(key));
+  if (cachedRow > 1) {
+    const values = sheet.getRange(cachedRow, 1, 1, 5).getValues()[0];
+    if (values[0] === code) return { row: cachedRow, values: values };
+  }
+
+  const lastRow = sheet.getLastRow();
+  if (lastRow < 2) return null;
+  const codes = sheet.getRange(2, 1, lastRow - 1, 1).getValues();
+  const active = sheet.getRange(2, 5, lastRow - 1, 1).getValues();
+
+  let row = 0;
+  for (let i = codes.length - 1; i >= 0; i--) {
+    if (codes[i][0] !== code) continue;
+    if (!row) row = i + 2;
+    if (active[i][0] === true) {
+      row = i + 2;
+      break;
+    }
+  }
+  if (!row) return null;
+
+  cache.put(key, String(row), SESSION_ROW_CACHE_SECONDS);
+  return { row: row, values: sheet.getRange(row, 1, 1, 5).getValues()[0] };
+}
+
+/**
+ * Increments the session's revision and returns it.
+ * Every change clients should see bumps the revision, so a client polling
+ * with the revision it already has can be answered "not modified".
+ * @param {object} sessionData Parsed session data.
+ * @returns {number} The new revision.
+ */
+function bumpRevision(sessionData) {
+  sessionData.rev = (sessionData.rev || 0) + 1;
+  return sessionData.rev;
+}
+
+/**
+ * Builds what a client at revision sinceRev is missing: the small top-level
+ * fields, the current widget order and only the widgets changed after sinceRev.
+ * @param {object} sessionData Parsed session data.
+ * @param {number} sinceRev The client's revision.
+ * @returns {object} The session delta.
+ */
+function sessionDelta(sessionData, sinceRev) {
+  const widgets = sessionData.widgets || [];
+  return {
+    rev: sessionData.rev,
+    bg: sessionData.bg,
+    polls: sessionData.polls || {},
+    paused: sessionData.paused,
+    screenshotRequest: sessionData.screenshotRequest,
+    widgetIds: widgets.map(w => w.id),
+    widgets: widgets.filter(w => (w.rev || 0) > sinceRev)
+  };
+}
+
 /**
  * Returns the published web app URL.
  * @returns {string} The script URL.
@@ -246,11 +584,15 @@ function createSession(dashboardJson) {
     const userEmail = Session.getActiveUser().getEmail();
     if (!userEmail) throw new Error("Could not identify user.");
 
-    // End any existing sessions for this teacher
-    const data = sheet.getDataRange().getValues();
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][1] === userEmail && data[i][4] === true) {
-        sheet.getRange(i + 1, 5).setValue(false);
+    // End any existing sessions for this teacher. Only the code, teacher and
+    // active columns are read; the session data column is by far the largest.
+    const lastRow = sheet.getLastRow();
+    const keys = lastRow > 1 ? sheet.getRange(2, 1, lastRow - 1, 2).getValues() : [];
+    const active = lastRow > 1 ? sheet.getRange(2, 5, lastRow - 1, 1).getValues() : [];
+    for (let i = 0; i < keys.length; i++) {
+      if (keys[i][1] === userEmail && active[i][0] === true) {
+        sheet.getRange(i + 2, 5).setValue(false);
+        active[i][0] = false;
       }
     }
 
@@ -259,8 +601,8 @@ function createSession(dashboardJson) {
     let attempts = 0;
     while (attempts < 10) {
       let exists = false;
-      for (let i = 1; i < data.length; i++) {
-        if (data[i][0] === code && data[i][4] === true) {
+      for (let i = 0; i < keys.length; i++) {
+        if (keys[i][0] === code && active[i][0] === true) {
           exists = true;
           break;
         }
@@ -276,7 +618,9 @@ function createSession(dashboardJson) {
       widgets: dashboardData.widgets || [],
       bg: dashboardData.bg || 'bg-slate-900',
       polls: {},  // Will store poll responses: { widgetId: { optionA: count, optionB: count } }
-      studentCount: 0
+      studentCount: 0,
+      rev: 1,     // Revision, bumped by every change (see bumpRevision)
+      voteRow: getVoteSheet().getLastRow()  // Last Votes row counted into polls (see foldVotes)
     };
 
     // Create session row
@@ -287,8 +631,10 @@ function createSession(dashboardJson) {
       new Date(),
       true
     ]);
+    CacheService.getScriptCache().put(SESSION_ROW_CACHE_PREFIX + code, String(sheet.getLastRow()),
+                                      SESSION_ROW_CACHE_SECONDS);
 
-    return { success: true, code: code };
+    return { success: true, code: code, rev: sessionData.rev };
   } catch (e) {
     Logger.log("Error creating session: " + e.toString());
     return { success: false, message: "Error creating session: " + e.message };
@@ -303,17 +649,15 @@ function createSession(dashboardJson) {
 function joinSession(code) {
   try {
     const sheet = getSessionSheet();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code.toUpperCase() && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
-        return {
-          success: true,
-          data: sessionData,
-          teacherEmail: data[i][1]
-        };
-      }
+    const session = findSessionRow(sheet, code.toUpperCase());
+
+    if (session && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      return {
+        success: true,
+        data: sessionData,
+        teacherEmail: session.values[1]
+      };
     }
 
     return { success: false, message: "Session not found or has ended." };
@@ -325,24 +669,35 @@ function joinSession(code) {
 
 /**
  * Gets current session data (for polling).
+ * With sinceRev (the revision the client already has) the reply is
+ * { notModified: true } when nothing changed, or { delta: true } with only
+ * the changed widgets (see sessionDelta). Without it the full state is returned.
  * @param {string} code The session code.
+ * @param {number=} sinceRev The client's last revision.
  * @returns {object} Current session state.
  */
-function getSessionData(code) {
+function getSessionData(code, sinceRev) {
   try {
     const sheet = getSessionSheet();
-    const data = sheet.getDataRange().getValues();
+    const session = findSessionRow(sheet, code.toUpperCase());
 
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code.toUpperCase() && data[i][4] === true) {
-        return {
-          success: true,
-          data: JSON.parse(data[i][2]),
-          active: true
-        };
-      } else if (data[i][0] === code.toUpperCase() && data[i][4] === false) {
-        return { success: false, active: false, message: "Session has ended." };
+    if (session && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      const rev = sessionData.rev || 0;
+      if (sinceRev && sinceRev === rev) {
+        return { success: true, active: true, notModified: true, rev: rev };
+      }
+      if (sinceRev && sinceRev < rev) {
+        return { success: true, active: true, delta: true, rev: rev, data: sessionDelta(sessionData, sinceRev) };
       }
+      return {
+        success: true,
+        data: sessionData,
+        active: true,
+        rev: rev
+      };
+    } else if (session && session.values[4] === false) {
+      return { success: false, active: false, message: "Session has ended." };
     }
 
     return { success: false, message: "Session not found." };
@@ -354,6 +709,7 @@ function getSessionData(code) {
 
 /**
  * Updates session data (teacher only).
+ * Full-state push, kept for clients that predate patchSession.
  * @param {string} code The session code.
  * @param {string} dashboardJson Updated dashboard state.
  */
@@ -361,43 +717,48 @@ function updateSession(code, dashboardJson) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code && data[i][1] === userEmail && data[i][4] === true) {
-        const existingData = JSON.parse(data[i][2]);
-        const newData = JSON.parse(dashboardJson);
-
-        // Preserve poll responses and handle interactive widgets
-        existingData.bg = newData.bg || existingData.bg;
-        existingData.polls = existingData.polls || {}; // Ensure polls object exists
-
-        // Logic: Full replace of widgets list, BUT preserve 'data' for interactive widgets
-        // if the server has a version that might be newer (from student interaction).
-        // Since we don't have timestamps, we assume:
-        // If a widget allows interaction, we DO NOT overwrite its 'data' from the generic push.
-        // Content updates for interactive widgets must come via updateWidgetState.
-
-        const mergedWidgets = [];
-        if (newData.widgets) {
-            newData.widgets.forEach(newW => {
-                const oldW = existingData.widgets ? existingData.widgets.find(w => w.id === newW.id) : null;
-
-                if (oldW && newW.allowInteraction) {
-                    // Keep the existing data (which includes student updates)
-                    // Unless the teacher explicitly pushed a change?
-                    // We'll assume updateSession is for structure/layout.
-                    // Content changes should use updateWidgetState (which teacher client will also use).
-                    newW.data = oldW.data;
-                }
-                mergedWidgets.push(newW);
-            });
-        }
-        existingData.widgets = mergedWidgets;
-
-        sheet.getRange(i + 1, 3).setValue(JSON.stringify(existingData));
-        return { success: true };
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const existingData = JSON.parse(session.values[2]);
+      const newData = JSON.parse(dashboardJson);
+
+      // Preserve poll responses and handle interactive widgets
+      const rev = bumpRevision(existingData);
+      existingData.bg = newData.bg || existingData.bg;
+      existingData.polls = existingData.polls || {}; // Ensure polls object exists
+
+      // Logic: Full replace of widgets list, BUT preserve 'data' for interactive widgets
+      // if the server has a version that might be newer (from student interaction).
+      // Since we don't have timestamps, we assume:
+      // If a widget allows interaction, we DO NOT overwrite its 'data' from the generic push.
+      // Content updates for interactive widgets must come via updateWidgetState.
+
+      const mergedWidgets = [];
+      if (newData.widgets) {
+          newData.widgets.forEach(newW => {
+              const oldW = existingData.widgets ? existingData.widgets.find(w => w.id === newW.id) : null;
+
+              if (oldW && newW.allowInteraction) {
+                  // Keep the existing data (which includes student updates)
+                  // Unless the teacher explicitly pushed a change?
+                  // We'll assume updateSession is for structure/layout.
+                  // Content changes should use updateWidgetState (which teacher client will also use).
+                  newW.data = oldW.data;
+              }
+              // Only widgets that actually changed get the new revision, so
+              // delta clients (see sessionDelta) still receive just those
+              newW.rev = oldW ? oldW.rev : undefined;
+              if (!oldW || JSON.stringify(newW) !== JSON.stringify(oldW)) {
+                  newW.rev = rev;
+              }
+              mergedWidgets.push(newW);
+          });
       }
+      existingData.widgets = mergedWidgets;
+
+      sheet.getRange(session.row, 3).setValue(JSON.stringify(existingData));
+      return { success: true, rev: rev };
     }
 
     return { success: false, message: "Session not found or not authorized." };
@@ -407,6 +768,125 @@ function updateSession(code, dashboardJson) {
   }
 }
 
+/**
+ * Applies a patch from the teacher (see buildSessionPatch in index.html) to
+ * parsed session data. Patched widgets get the next revision, which becomes
+ * the session's revision only if something changed.
+ * @param {object} sessionData Parsed session data, modified in place.
+ * @param {object} patch { bg?, widgets?: [changed widget states], removed?: [widget ids] }.
+ * @returns {boolean} Whether the session changed.
+ */
+function applySessionPatch(sessionData, patch) {
+  let widgets = sessionData.widgets || [];
+  const rev = (sessionData.rev || 0) + 1;
+  let changed = false;
+
+  if (patch.bg && patch.bg !== sessionData.bg) {
+    sessionData.bg = patch.bg;
+    changed = true;
+  }
+
+  (patch.widgets || []).forEach(newW => {
+    const index = widgets.findIndex(w => w.id === newW.id);
+    // As in updateSession, interactive widgets keep the server's data
+    if (index !== -1 && newW.allowInteraction) {
+      newW.data = widgets[index].data;
+    }
+    newW.rev = rev;
+    if (index !== -1) {
+      widgets[index] = newW;
+    } else {
+      widgets.push(newW);
+    }
+    changed = true;
+  });
+
+  if (patch.removed && patch.removed.length) {
+    const before = widgets.length;
+    widgets = widgets.filter(w => patch.removed.indexOf(w.id) === -1);
+    if (widgets.length !== before) changed = true;
+  }
+  sessionData.widgets = widgets;
+
+  if (changed) sessionData.rev = rev;
+  return changed;
+}
+
+/**
+ * Applies a teacher's incremental update to the session (see pushSessionUpdate).
+ * Only widgets that changed since the last push are sent, and an idle teacher
+ * sends nothing at all. The revision is bumped, and the cell written, only
+ * when something changed.
+ * @param {string} code The session code.
+ * @param {string} patchJson JSON of { bg?, widgets?: [changed widget states], removed?: [widget ids] }.
+ * @returns {object} Result with the session revision.
+ */
+function patchSession(code, patchJson) {
+  try {
+    const sheet = getSessionSheet();
+    const userEmail = Session.getActiveUser().getEmail();
+    const session = findSessionRow(sheet, code);
+    const patch = JSON.parse(patchJson);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      if (applySessionPatch(sessionData, patch)) {
+        sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+      }
+      return { success: true, rev: sessionData.rev || 0 };
+    }
+
+    return { success: false, message: "Session not found or not authorized." };
+  } catch (e) {
+    Logger.log("Error patching session: " + e.toString());
+    return { success: false, message: "Error patching session: " + e.message };
+  }
+}
+
+/**
+ * The teacher's sync tick in one call: applies the teacher's patch (if any)
+ * and returns what changed since sinceRev, like getSessionData. Widgets the
+ * teacher just sent are left out of the reply, except interactive ones, whose
+ * data may hold student changes.
+ * @param {string} code The session code.
+ * @param {string} patchJson Patch as for patchSession, or '' when idle.
+ * @param {number} sinceRev The teacher's last revision.
+ * @returns {object} { rev, notModified } or { rev, delta, data } (see sessionDelta).
+ */
+function syncSession(code, patchJson, sinceRev) {
+  try {
+    const sheet = getSessionSheet();
+    const userEmail = Session.getActiveUser().getEmail();
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      const patch = patchJson ? JSON.parse(patchJson) : {};
+      // Votes that arrived while another voter was counting are picked up here
+      const voted = foldVotes(sessionData, code);
+      if (voted) bumpRevision(sessionData);
+      if (applySessionPatch(sessionData, patch) || voted) {
+        sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+      }
+
+      const rev = sessionData.rev || 0;
+      if (sinceRev && sinceRev === rev) {
+        return { success: true, active: true, notModified: true, rev: rev };
+      }
+      const delta = sessionDelta(sessionData, sinceRev || 0);
+      const sent = {};
+      (patch.widgets || []).forEach(w => { if (!w.allowInteraction) sent[w.id] = true; });
+      delta.widgets = delta.widgets.filter(w => !sent[w.id]);
+      return { success: true, active: true, delta: true, rev: rev, data: delta };
+    }
+
+    return { success: false, message: "Session not found or not authorized." };
+  } catch (e) {
+    Logger.log("Error syncing session: " + e.toString());
+    return { success: false, message: "Error syncing session: " + e.message };
+  }
+}
+
 /**
  * Pauses or resumes the session.
  * @param {string} code The session code.
@@ -416,15 +896,14 @@ function setSessionPaused(code, paused) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code && data[i][1] === userEmail && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
-        sessionData.paused = paused;
-        sheet.getRange(i + 1, 3).setValue(JSON.stringify(sessionData));
-        return { success: true, paused: paused };
-      }
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      sessionData.paused = paused;
+      bumpRevision(sessionData);
+      sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+      return { success: true, paused: paused };
     }
     return { success: false, message: "Session not found." };
   } catch (e) {
@@ -444,33 +923,32 @@ function updateWidgetState(code, widgetId, stateJson) {
     const sheet = getSessionSheet();
     // Students can update, so we don't strictly check teacher email here,
     // but we must verify the session is active.
-    const data = sheet.getDataRange().getValues();
+    const session = findSessionRow(sheet, code.toUpperCase());
     const newState = JSON.parse(stateJson);
 
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code.toUpperCase() && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
+    if (session && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
 
-        if (sessionData.paused) {
-             return { success: false, message: "Session is paused." };
-        }
+      if (sessionData.paused) {
+           return { success: false, message: "Session is paused." };
+      }
 
-        // Find the widget
-        if (sessionData.widgets) {
-            const widget = sessionData.widgets.find(w => w.id == widgetId);
-            if (widget) {
-                // Check if interaction is allowed
-                if (widget.allowInteraction) {
-                    widget.data = newState;
-                    sheet.getRange(i + 1, 3).setValue(JSON.stringify(sessionData));
-                    return { success: true };
-                } else {
-                    return { success: false, message: "Interaction not allowed." };
-                }
-            }
-        }
-        return { success: false, message: "Widget not found." };
+      // Find the widget
+      if (sessionData.widgets) {
+          const widget = sessionData.widgets.find(w => w.id == widgetId);
+          if (widget) {
+              // Check if interaction is allowed
+              if (widget.allowInteraction) {
+                  widget.data = newState;
+                  widget.rev = bumpRevision(sessionData);
+                  sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+                  return { success: true };
+              } else {
+                  return { success: false, message: "Interaction not allowed." };
+              }
+          }
       }
+      return { success: false, message: "Widget not found." };
     }
     return { success: false, message: "Session not found." };
   } catch (e) {
@@ -479,35 +957,95 @@ function updateWidgetState(code, widgetId, stateJson) {
   }
 }
 
+// Votes are appended to their own sheet, one row per vote:
+// [Session Code, Widget Id, Option, Student Email, Timestamp].
+// An append is atomic, so a burst of votes can't overwrite each other the way
+// concurrent read-modify-writes of the session cell did. foldVotes adds the
+// log to the session's poll counts.
+
+/**
+ * Gets or creates the Votes sheet.
+ * @returns {Sheet} The votes sheet object.
+ */
+function getVoteSheet() {
+  const spreadsheet = SpreadsheetApp.openById(SPREADSHEET_ID);
+  let sheet = spreadsheet.getSheetByName("Votes");
+  if (!sheet) {
+    sheet = spreadsheet.insertSheet("Votes");
+    sheet.appendRow(["Session Code", "Widget Id", "Option", "Student Email", "Timestamp"]);
+  }
+  return sheet;
+}
+
+/**
+ * Adds the votes logged after sessionData.voteRow to sessionData.polls and
+ * moves voteRow to the end of the log. Counts and voteRow are stored in the
+ * same cell, so a concurrent write that overwrites a fold also rewinds
+ * voteRow, and the next fold counts those votes again: none are lost.
+ * @param {object} sessionData Parsed session data, modified in place.
+ * @param {string} code The session code.
+ * @returns {boolean} Whether any vote for this session was added.
+ */
+function foldVotes(sessionData, code) {
+  const voteSheet = getVoteSheet();
+  const lastRow = voteSheet.getLastRow();
+  const from = (sessionData.voteRow || 1) + 1;
+  if (lastRow < from) return false;
+
+  const votes = voteSheet.getRange(from, 1, lastRow - from + 1, 3).getValues();
+  if (!sessionData.polls) sessionData.polls = {};
+  let added = false;
+  votes.forEach(vote => {
+    if (vote[0] !== code) return;
+    if (!sessionData.polls[vote[1]]) sessionData.polls[vote[1]] = { A: 0, B: 0 };
+    sessionData.polls[vote[1]][vote[2]]++;
+    added = true;
+  });
+  sessionData.voteRow = lastRow;
+  return added;
+}
+
 /**
  * Submits a poll response from a student.
+ * The vote is logged at once; the session's counts are updated by whichever
+ * voter holds the script lock, or else by the teacher's next syncSession.
  * @param {string} code The session code.
  * @param {string} widgetId The poll widget ID.
  * @param {string} option The selected option ('A' or 'B').
+ * @returns {object} Result with the poll's counts (including this vote).
  */
 function submitPollResponse(code, widgetId, option) {
   try {
+    if (option !== 'A' && option !== 'B') {
+      return { success: false, message: "Invalid option." };
+    }
     const sheet = getSessionSheet();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code.toUpperCase() && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
-
-        // Initialize poll data if needed
-        if (!sessionData.polls) sessionData.polls = {};
-        if (!sessionData.polls[widgetId]) {
-          sessionData.polls[widgetId] = { A: 0, B: 0 };
-        }
-
-        // Increment the selected option
-        if (option === 'A' || option === 'B') {
-          sessionData.polls[widgetId][option]++;
+    const upperCode = code.toUpperCase();
+    const session = findSessionRow(sheet, upperCode);
+
+    if (session && session.values[4] === true) {
+      getVoteSheet().appendRow([upperCode, widgetId, option, Session.getActiveUser().getEmail(), new Date()]);
+
+      // One voter counts at a time; in a burst the others return straight away
+      const lock = LockService.getScriptLock();
+      if (lock.tryLock(0)) {
+        try {
+          const current = findSessionRow(sheet, upperCode);
+          const sessionData = JSON.parse(current.values[2]);
+          if (foldVotes(sessionData, upperCode)) {
+            bumpRevision(sessionData);
+            sheet.getRange(current.row, 3).setValue(JSON.stringify(sessionData));
+          }
+          return { success: true, polls: sessionData.polls[widgetId] || { A: 0, B: 0 } };
+        } finally {
+          lock.releaseLock();
         }
-
-        sheet.getRange(i + 1, 3).setValue(JSON.stringify(sessionData));
-        return { success: true, polls: sessionData.polls[widgetId] };
       }
+
+      // Not counted yet: report the last counts plus this vote
+      const polls = Object.assign({ A: 0, B: 0 }, (JSON.parse(session.values[2]).polls || {})[widgetId]);
+      polls[option]++;
+      return { success: true, polls: polls };
     }
 
     return { success: false, message: "Session not found." };
@@ -525,13 +1063,11 @@ function endSession(code) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
-    const data = sheet.getDataRange().getValues();
+    const session = findSessionRow(sheet, code);
 
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code && data[i][1] === userEmail && data[i][4] === true) {
-        sheet.getRange(i + 1, 5).setValue(false);
-        return { success: true, message: "Session ended." };
-      }
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      sheet.getRange(session.row, 5).setValue(false);
+      return { success: true, message: "Session ended." };
     }
 
     return { success: false, message: "Session not found or not authorized." };
@@ -550,14 +1086,18 @@ function getActiveSession() {
     const userEmail = Session.getActiveUser().getEmail();
     if (!userEmail) return { success: false };
 
-    const data = sheet.getDataRange().getValues();
+    const lastRow = sheet.getLastRow();
+    if (lastRow < 2) return { success: false };
+    const teachers = sheet.getRange(2, 2, lastRow - 1, 1).getValues();
+    const active = sheet.getRange(2, 5, lastRow - 1, 1).getValues();
 
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][1] === userEmail && data[i][4] === true) {
+    for (let i = 0; i < teachers.length; i++) {
+      if (teachers[i][0] === userEmail && active[i][0] === true) {
+        const values = sheet.getRange(i + 2, 1, 1, 3).getValues()[0];
         return {
           success: true,
-          code: data[i][0],
-          data: JSON.parse(data[i][2])
+          code: values[0],
+          data: JSON.parse(values[2])
         };
       }
     }
@@ -579,16 +1119,15 @@ function requestScreenshots(code) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code && data[i][1] === userEmail && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
-        sessionData.screenshotRequest = Date.now();
-        sessionData.screenshots = []; // Clear previous screenshots
-        sheet.getRange(i + 1, 3).setValue(JSON.stringify(sessionData));
-        return { success: true };
-      }
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      sessionData.screenshotRequest = Date.now();
+      sessionData.screenshots = []; // Clear previous screenshots
+      bumpRevision(sessionData);
+      sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+      return { success: true };
     }
 
     return { success: false, message: "Session not found or not authorized." };
@@ -598,36 +1137,97 @@ function requestScreenshots(code) {
   }
 }
 
+// Screenshots live in their own sheet, one row per screenshot:
+// [Session Code, Screenshot Id, Student Email, Timestamp, Thumbnail, Chunks, Image chunk 1, ...].
+// The image is split over several cells because a cell holds at most 50,000
+// characters; the session data only keeps { id, studentEmail, timestamp, row }
+// references, so polls no longer download every classmate's image.
+const SCREENSHOT_CHUNK_CHARS = 45000;
+const SCREENSHOT_MAX_CHUNKS = 20;             // ~900 KB of base64 per image
+const SCREENSHOT_THUMBNAIL_MAX_CHARS = 20000;
+const SCREENSHOT_PAGE_SIZE = 12;
+
+/**
+ * Gets or creates the Screenshots sheet.
+ * @returns {Sheet} The screenshots sheet object.
+ */
+function getScreenshotSheet() {
+  const spreadsheet = SpreadsheetApp.openById(SPREADSHEET_ID);
+  let sheet = spreadsheet.getSheetByName("Screenshots");
+  if (!sheet) {
+    sheet = spreadsheet.insertSheet("Screenshots");
+    sheet.appendRow(["Session Code", "Screenshot Id", "Student Email", "Timestamp", "Thumbnail", "Chunks", "Image"]);
+  }
+  return sheet;
+}
+
+/**
+ * Finds the first 6 cells of a screenshot's row: at ref.row if it still
+ * holds that screenshot (compaction deletes rows above it), else by id.
+ * @param {Sheet} sheet The screenshots sheet.
+ * @param {object} ref A screenshot reference from the session data.
+ * @returns {?{row: number, values: Array}} 1-based row and its cells, or null.
+ */
+function findScreenshotRow(sheet, ref) {
+  if (ref.row > 1) {
+    const values = sheet.getRange(ref.row, 1, 1, 6).getValues()[0];
+    if (values[1] === ref.id) return { row: ref.row, values: values };
+  }
+  const lastRow = sheet.getLastRow();
+  if (lastRow < 2) return null;
+  const ids = sheet.getRange(2, 2, lastRow - 1, 1).getValues();
+  for (let i = ids.length - 1; i >= 0; i--) {
+    if (ids[i][0] === ref.id) {
+      return { row: i + 2, values: sheet.getRange(i + 2, 1, 1, 6).getValues()[0] };
+    }
+  }
+  return null;
+}
+
 /**
  * Student submits their screenshot.
  * @param {string} code The session code.
  * @param {string} imageData Base64 image data.
+ * @param {string=} thumbnailData Small base64 thumbnail made by the client.
  */
-function submitScreenshot(code, imageData) {
+function submitScreenshot(code, imageData, thumbnailData) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code.toUpperCase() && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
-
-        if (!sessionData.screenshots) sessionData.screenshots = [];
-
-        // Add screenshot
-        sessionData.screenshots.push({
-          studentEmail: userEmail,
-          data: imageData,
-          timestamp: Date.now()
-        });
+    if (!findSessionRow(sheet, code.toUpperCase())) {
+      return { success: false, message: "Session not found." };
+    }
 
-        sheet.getRange(i + 1, 3).setValue(JSON.stringify(sessionData));
-        return { success: true };
+    const chunks = splitCells(imageData, SCREENSHOT_CHUNK_CHARS);
+    if (chunks.length > SCREENSHOT_MAX_CHUNKS) {
+      return { success: false, message: "Screenshot is too large." };
+    }
+    const thumbnail = typeof thumbnailData === 'string' && thumbnailData.indexOf('data:image/') === 0 &&
+      thumbnailData.length <= SCREENSHOT_THUMBNAIL_MAX_CHARS ? thumbnailData : '';
+
+    const ref = { id: Utilities.getUuid(), studentEmail: userEmail, timestamp: Date.now() };
+    const screenshotSheet = getScreenshotSheet();
+
+    // A whole class submits at once; without the lock concurrent
+    // read-modify-writes of the session row would drop references, and
+    // getLastRow() after appendRow() could be a classmate's row
+    const lock = LockService.getScriptLock();
+    lock.waitLock(10000);
+    try {
+      const session = findSessionRow(sheet, code.toUpperCase());
+      if (!session || session.values[4] !== true) {
+        return { success: false, message: "Session not found." };
       }
+      screenshotSheet.appendRow([code.toUpperCase(), ref.id, userEmail, ref.timestamp, thumbnail, chunks.length].concat(chunks));
+      ref.row = screenshotSheet.getLastRow();
+      const sessionData = JSON.parse(session.values[2]);
+      if (!sessionData.screenshots) sessionData.screenshots = [];
+      sessionData.screenshots.push(ref);
+      sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+    } finally {
+      lock.releaseLock();
     }
-
-    return { success: false, message: "Session not found." };
+    return { success: true };
   } catch (e) {
     Logger.log("Error submitting screenshot: " + e.toString());
     return { success: false, message: "Error: " + e.message };
@@ -635,23 +1235,51 @@ function submitScreenshot(code, imageData) {
 }
 
 /**
- * Teacher gets all screenshots.
+ * Teacher gets a page of screenshots as thumbnails (full images through
+ * getScreenshotImage).
  * @param {string} code The session code.
+ * @param {number=} offset Index of the first screenshot, 0 by default.
+ * @param {number=} limit Page size, SCREENSHOT_PAGE_SIZE by default.
+ * @returns {object} { screenshots: [{ id, studentEmail, timestamp, thumbnail }], total, nextOffset }.
  */
-function getScreenshots(code) {
+function getScreenshots(code, offset, limit) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
-    const data = sheet.getDataRange().getValues();
-
-    for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code && data[i][1] === userEmail && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      const refs = sessionData.screenshots || [];
+      const start = offset || 0;
+      const page = refs.slice(start, start + (limit || SCREENSHOT_PAGE_SIZE));
+
+      // Screenshots of one request are mostly adjacent rows: read the page's span at once
+      const screenshotSheet = getScreenshotSheet();
+      const rows = page.map(ref => ref.row).filter(row => row > 1);
+      const first = Math.min.apply(null, rows);
+      const span = rows.length ? screenshotSheet.getRange(first, 1, Math.max.apply(null, rows) - first + 1, 6).getValues() : [];
+
+      const screenshots = page.map(ref => {
+        let values = span[ref.row - first];
+        if (!values || values[1] !== ref.id) {
+          const found = findScreenshotRow(screenshotSheet, ref);
+          values = found ? found.values : null;
+        }
         return {
-          success: true,
-          screenshots: sessionData.screenshots || []
+          id: ref.id,
+          studentEmail: ref.studentEmail,
+          timestamp: ref.timestamp,
+          thumbnail: values ? values[4] : ''
         };
-      }
+      });
+
+      return {
+        success: true,
+        screenshots: screenshots,
+        total: refs.length,
+        nextOffset: start + page.length < refs.length ? start + page.length : null
+      };
     }
 
     return { success: false, message: "Session not found or not authorized." };
@@ -661,29 +1289,258 @@ function getScreenshots(code) {
   }
 }
 
+/**
+ * Teacher gets one full screenshot.
+ * @param {string} code The session code.
+ * @param {string} screenshotId The screenshot id from getScreenshots.
+ * @returns {object} { data: base64 image }.
+ */
+function getScreenshotImage(code, screenshotId) {
+  try {
+    const sheet = getSessionSheet();
+    const userEmail = Session.getActiveUser().getEmail();
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      const ref = (sessionData.screenshots || []).find(s => s.id === screenshotId);
+      const screenshotSheet = getScreenshotSheet();
+      const found = ref ? findScreenshotRow(screenshotSheet, ref) : null;
+      if (!found) return { success: false, message: "Screenshot not found." };
+
+      const chunks = found.values[5] ? screenshotSheet.getRange(found.row, 7, 1, found.values[5]).getValues()[0] : [];
+      return { success: true, data: chunks.join('') };
+    }
+
+    return { success: false, message: "Session not found or not authorized." };
+  } catch (e) {
+    Logger.log("Error getting screenshot: " + e.toString());
+    return { success: false, message: "Error: " + e.message };
+  }
+}
+
 /**
  * Teacher clears all screenshots.
+ * Only the session's references are cleared; compactSessions deletes the
+ * images from the Screenshots sheet once they are old enough.
  * @param {string} code The session code.
  */
 function clearScreenshots(code) {
   try {
     const sheet = getSessionSheet();
     const userEmail = Session.getActiveUser().getEmail();
+    const session = findSessionRow(sheet, code);
+
+    if (session && session.values[1] === userEmail && session.values[4] === true) {
+      const sessionData = JSON.parse(session.values[2]);
+      sessionData.screenshots = [];
+      sessionData.screenshotRequest = null;
+      bumpRevision(sessionData);
+      sheet.getRange(session.row, 3).setValue(JSON.stringify(sessionData));
+      return { success: true };
+    }
+
+    return { success: false, message: "Session not found or not authorized." };
+  } catch (e) {
+    Logger.log("Error clearing screenshots: " + e.toString());
+    return { success: false, message: "Error: " + e.message };
+  }
+}
+
+// ==================== MAINTENANCE FUNCTIONS ====================
+
+/**
+ * Gets or creates the Sessions Archive sheet (same columns as Sessions).
+ * @returns {Sheet} The archive sheet object.
+ */
+function getSessionArchiveSheet() {
+  const spreadsheet = SpreadsheetApp.openById(SPREADSHEET_ID);
+  let sheet = spreadsheet.getSheetByName("Sessions Archive");
+  if (!sheet) {
+    sheet = spreadsheet.insertSheet("Sessions Archive");
+    sheet.appendRow(["Session Code", "Teacher Email", "Session Data", "Created At", "Active"]);
+  }
+  return sheet;
+}
+
+/**
+ * Gets or creates the Votes Archive sheet (same columns as Votes).
+ * @returns {Sheet} The vote archive sheet object.
+ */
+function getVoteArchiveSheet() {
+  const spreadsheet = SpreadsheetApp.openById(SPREADSHEET_ID);
+  let sheet = spreadsheet.getSheetByName("Votes Archive");
+  if (!sheet) {
+    sheet = spreadsheet.insertSheet("Votes Archive");
+    sheet.appendRow(["Session Code", "Widget Id", "Option", "Student Email", "Timestamp"]);
+  }
+  return sheet;
+}
+
+/**
+ * Deletes the given rows, bottom-up in runs of adjacent rows so earlier row
+ * numbers stay valid.
+ * @param {Sheet} sheet The sheet.
+ * @param {number[]} rows Row numbers in ascending order.
+ */
+function deleteRowRuns(sheet, rows) {
+  let end = rows.length - 1;
+  while (end >= 0) {
+    let start = end;
+    while (start > 0 && rows[start - 1] === rows[start] - 1) start--;
+    sheet.deleteRows(rows[start], end - start + 1);
+    end = start - 1;
+  }
+}
+
+/**
+ * Moves ended sessions older than maxAgeDays from the Sessions sheet to the
+ * Sessions Archive sheet, so the live sheet only holds recent sessions, and
+ * their votes from Votes to Votes Archive. Votes of an archived session not
+ * folded yet are added to its archived counts first. The remaining sessions'
+ * voteRow is re-based to the shorter vote log.
+ * Meant to run from a nightly trigger: deleting rows shifts the rows below,
+ * and syncSession writes session data without the lock, so a teacher syncing
+ * during compaction could restore a voteRow from before the re-base. It
+ * should not run while classes are writing to their sessions.
+ * @param {number=} maxAgeDays Age in days, SESSION_ARCHIVE_AFTER_DAYS by default.
+ * @returns {object} Result with the number of archived and remaining sessions, archived votes and deleted screenshots.
+ */
+function compactSessions(maxAgeDays) {
+  const lock = LockService.getScriptLock();
+  try {
+    lock.waitLock(30000);
+    // Time-driven triggers pass an event object, not a number
+    const days = typeof maxAgeDays === 'number' ? maxAgeDays : SESSION_ARCHIVE_AFTER_DAYS;
+    const cutoff = Date.now() - days * 24 * 60 * 60 * 1000;
+    const sheet = getSessionSheet();
     const data = sheet.getDataRange().getValues();
 
+    const voteSheet = getVoteSheet();
+    const lastVoteRow = voteSheet.getLastRow();
+    const votes = lastVoteRow > 1 ? voteSheet.getRange(2, 1, lastVoteRow - 1, 5).getValues() : [];
+
+    const archived = [];
+    const archivedRows = [];
+    const codes = [];
+    const remaining = {};
     for (let i = 1; i < data.length; i++) {
-      if (data[i][0] === code && data[i][1] === userEmail && data[i][4] === true) {
-        const sessionData = JSON.parse(data[i][2]);
-        sessionData.screenshots = [];
-        sessionData.screenshotRequest = null;
+      codes.push(data[i][0]);
+      const createdAt = new Date(data[i][3]).getTime();
+      if (data[i][4] === true || !(createdAt < cutoff)) {
+        remaining[data[i][0]] = true;
+        continue;
+      }
+
+      const row = data[i].slice(0, 5);
+      try {
+        const sessionData = JSON.parse(row[2]);
+        if (!SESSION_ARCHIVE_KEEP_SCREENSHOTS) delete sessionData.screenshots;
+        // The counts are final once the votes after voteRow are in
+        votes.slice(Math.max(0, (sessionData.voteRow || 1) - 1)).forEach(vote => {
+          if (vote[0] !== row[0]) return;
+          if (!sessionData.polls) sessionData.polls = {};
+          if (!sessionData.polls[vote[1]]) sessionData.polls[vote[1]] = { A: 0, B: 0 };
+          sessionData.polls[vote[1]][vote[2]]++;
+        });
+        delete sessionData.voteRow;
+        row[2] = JSON.stringify(sessionData);
+      } catch (e) {
+        // Keep unparseable data as it is
+      }
+      archived.push(row);
+      archivedRows.push(i + 1);
+    }
+
+    if (archived.length) {
+      const archiveSheet = getSessionArchiveSheet();
+      archiveSheet.getRange(archiveSheet.getLastRow() + 1, 1, archived.length, 5).setValues(archived);
+      deleteRowRuns(sheet, archivedRows);
+
+      // Cached rows (see findSessionRow) have moved; drop them all
+      CacheService.getScriptCache().removeAll(codes.map(code => SESSION_ROW_CACHE_PREFIX + code));
+    }
+
+    // Votes of sessions no longer in the Sessions sheet; keptBefore[n] counts
+    // the votes kept among the first n
+    const archivedVotes = [];
+    const archivedVoteRows = [];
+    const keptBefore = [0];
+    votes.forEach((vote, i) => {
+      const keep = remaining[vote[0]] === true;
+      if (!keep) {
+        archivedVotes.push(vote);
+        archivedVoteRows.push(i + 2);
+      }
+      keptBefore.push(keptBefore[i] + (keep ? 1 : 0));
+    });
+
+    if (archivedVotes.length) {
+      const voteArchiveSheet = getVoteArchiveSheet();
+      voteArchiveSheet.getRange(voteArchiveSheet.getLastRow() + 1, 1, archivedVotes.length, 5).setValues(archivedVotes);
+      deleteRowRuns(voteSheet, archivedVoteRows);
+
+      // foldVotes reads the rows after voteRow: point it at the same vote in
+      // the shorter log (votes appended since the read above move up with it)
+      const sessions = sheet.getDataRange().getValues();
+      for (let i = 1; i < sessions.length; i++) {
+        let sessionData;
+        try {
+          sessionData = JSON.parse(sessions[i][2]);
+        } catch (e) {
+          continue;
+        }
+        if (!sessionData.voteRow || sessionData.voteRow < 2) continue;
+        const seen = Math.min(sessionData.voteRow - 1, votes.length);
+        const voteRow = 1 + keptBefore[seen] + (sessionData.voteRow - 1 - seen);
+        if (voteRow === sessionData.voteRow) continue;
+        sessionData.voteRow = voteRow;
         sheet.getRange(i + 1, 3).setValue(JSON.stringify(sessionData));
-        return { success: true };
       }
     }
 
-    return { success: false, message: "Session not found or not authorized." };
+    // Screenshots are appended in time order, so the old ones are the leading
+    // rows; stop at the first recent one or one of a still-active session
+    let screenshotsDeleted = 0;
+    if (!SESSION_ARCHIVE_KEEP_SCREENSHOTS) {
+      const activeCodes = {};
+      data.forEach(row => { if (row[4] === true) activeCodes[row[0]] = true; });
+      const screenshotSheet = getScreenshotSheet();
+      const lastRow = screenshotSheet.getLastRow();
+      const keys = lastRow > 1 ? screenshotSheet.getRange(2, 1, lastRow - 1, 4).getValues() : [];
+      while (screenshotsDeleted < keys.length && keys[screenshotsDeleted][3] < cutoff &&
+             !activeCodes[keys[screenshotsDeleted][0]]) {
+        screenshotsDeleted++;
+      }
+      if (screenshotsDeleted) screenshotSheet.deleteRows(2, screenshotsDeleted);
+    }
+
+    return {
+      success: true,
+      archived: archived.length,
+      remaining: data.length - 1 - archived.length,
+      votesArchived: archivedVotes.length,
+      screenshotsDeleted: screenshotsDeleted
+    };
   } catch (e) {
-    Logger.log("Error clearing screenshots: " + e.toString());
-    return { success: false, message: "Error: " + e.message };
+    Logger.log("Error compacting sessions: " + e.toString());
+    return { success: false, message: "Error compacting sessions: " + e.message };
+  } finally {
+    lock.releaseLock();
   }
 }
+
+/**
+ * Schedules compactSessions to run every night. Run it once from the script
+ * editor after deploying; running it again replaces the existing trigger.
+ */
+function installCompactionTrigger() {
+  ScriptApp.getProjectTriggers()
+    .filter(trigger => trigger.getHandlerFunction() === 'compactSessions')
+    .forEach(trigger => ScriptApp.deleteTrigger(trigger));
+  ScriptApp.newTrigger('compactSessions')
+    .timeBased()
+    .everyDays(1)
+    .atHour(3)
+    .create();
+}
@@ -0,0 +1,242 @@
+"""
+Local cache of the third-party assets index.html loads from the network.
+
+index.html pulls the Tailwind runtime, html2canvas, Font Awesome (CSS and
+webfonts) and Google Fonts (CSS and font files) from CDNs. Fetched once with
+
+    python verification/asset_cache.py
+
+they are stored under .asset-cache/: every file by the sha256 of its
+contents, plus a manifest of URL -> file, content type and size, stamped with
+ASSET_CACHE_VERSION (bump it to invalidate every entry). CSS is scanned for
+url(...) and @import references, so the webfonts a stylesheet points at are
+cached along with it.
+
+BrowserPool installs the cache on every context it serves: a Playwright
+route answers cached URLs from disk, so page loads no longer wait for (or
+depend on) the CDNs. Uncached requests go to the network as before, unless
+the cache is strict (--offline), in which case they are aborted and reported,
+and the script exits with an error.
+
+Widgets also load content at run time (QR code images, embedded pages). A
+run with --record-assets stores every external response it gets, so that
+the same script can afterwards run --offline.
+
+Usage:
+    python verification/asset_cache.py [--refresh]
+    with sync_playwright() as p, BrowserPool(p, assets=asset_cache_from_args(args)) as pool:
+        ...
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import urllib.request
+from urllib.parse import urljoin
+from gas_shim import RPC_ORIGIN
+
+ASSET_DIR = ".asset-cache"
+MANIFEST_PATH = os.path.join(ASSET_DIR, "manifest.json")
+ASSET_CACHE_VERSION = 1
+INDEX_HTML = "index.html"
+
+# Google Fonts serves a different stylesheet per browser; ask for Chromium's (woff2)
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/120.0.0.0 Safari/537.36")
+
+PAGE_ASSET_RE = re.compile(r"""(?:<script[^>]+src|<link[^>]+href)=["'](https?://[^"']+)["']|@import\s+url\(['"]?(https?://[^'")]+)""")
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)|@import\s+['"]([^'"]+)['"]""")
+
+def page_assets(path=INDEX_HTML):
+    """External scripts, stylesheets and @imported stylesheets a page loads up front."""
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    urls = []
+    for match in PAGE_ASSET_RE.finditer(html):
+        url = match.group(1) or match.group(2)
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+def css_references(css, base_url):
+    """Absolute URLs a stylesheet refers to (fonts, images, imports), data: URLs excluded."""
+    refs = []
+    for match in CSS_URL_RE.finditer(css):
+        ref = (match.group(1) or match.group(2)).strip()
+        if ref and not ref.startswith("data:"):
+            url = urljoin(base_url, ref).split("#")[0]
+            if url not in refs:
+                refs.append(url)
+    return refs
+
+def fetch(url):
+    """(body, content type) of a URL."""
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read(), response.headers.get_content_type()
+
+class AssetCache:
+    """URL -> locally stored response, served to Playwright contexts through request routing."""
+
+    def __init__(self, path=MANIFEST_PATH, offline=False, record=False):
+        self.path = path
+        self.offline = offline
+        self.record = record
+        self.hits = 0
+        self.recorded = 0
+        self.misses = []  # Uncached URLs requested by the pages
+        self._bodies = {}
+        self.entries = self._load_manifest(warn=True)
+
+    def _load_manifest(self, warn=False):
+        """URL entries of the manifest on disk ({} if missing, unreadable or from another version)."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == ASSET_CACHE_VERSION:
+                return manifest["assets"]
+            if warn:
+                print(f"Warning: asset cache {self.path} is from another version; run asset_cache.py --refresh")
+        except (OSError, ValueError, KeyError) as e:
+            if warn:
+                print(f"Warning: ignoring unreadable asset manifest {self.path}: {e}")
+        return {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, url):
+        """(body, content type) of a cached URL, or None."""
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        if url not in self._bodies:
+            try:
+                with open(os.path.join(os.path.dirname(self.path), entry["file"]), "rb") as f:
+                    self._bodies[url] = f.read()
+            except OSError:
+                return None
+        return self._bodies[url], entry["content_type"]
+
+    def store(self, url, body, content_type):
+        """Adds a response to the cache (call save() to persist the manifest)."""
+        digest = hashlib.sha256(body).hexdigest()
+        name = os.path.join(digest[:2], digest)
+        file_path = os.path.join(os.path.dirname(self.path), name)
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(body)
+        self.entries[url] = {"file": name, "sha256": digest, "content_type": content_type, "size": len(body)}
+        self._bodies[url] = body
+
+    def save(self):
+        """Writes the manifest, keeping entries other processes (--jobs workers) added meanwhile."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.entries = dict(self._load_manifest(), **self.entries)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": ASSET_CACHE_VERSION, "assets": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def populate(self, urls, refresh=False):
+        """Fetches `urls` and everything their stylesheets reference; returns the URLs fetched."""
+        fetched, queue, seen = [], list(urls), set()
+        while queue:
+            url = queue.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+            cached = None if refresh else self.lookup(url)
+            if cached:
+                body, content_type = cached
+            else:
+                body, content_type = fetch(url)
+                self.store(url, body, content_type)
+                fetched.append(url)
+            if content_type == "text/css":
+                queue.extend(css_references(body.decode("utf-8", "replace"), url))
+        self.save()
+        return fetched
+
+    def install(self, context):
+        """Serves cached URLs to every page of `context`; uncached ones hit the network, or fail when offline."""
+        if not self.entries and not self.offline and not self.record:
+            return
+
+        def handle(route, request):
+            cached = self.lookup(request.url)
+            if cached:
+                self.hits += 1
+                body, content_type = cached
+                route.fulfill(status=200, content_type=content_type, body=body,
+                              headers={"Access-Control-Allow-Origin": "*"})
+            elif self.offline:
+                if request.url not in self.misses:
+                    self.misses.append(request.url)
+                    print(f"Offline: blocked uncached request {request.url}")
+                route.abort("blockedbyclient")
+            elif self.record:
+                response = route.fetch()
+                if response.ok:
+                    self.store(request.url, response.body(),
+                               response.headers.get("content-type", "application/octet-stream").split(";")[0])
+                    self.save()
+                    self.recorded += 1
+                route.fulfill(response=response)
+            else:
+                route.fallback()
+
+        context.route(lambda url: url.startswith(("http://", "https://")) and not url.startswith(RPC_ORIGIN),
+                      handle)
+
+    def stats(self):
+        return {"asset_hits": self.hits, "asset_misses": len(self.misses), "assets_recorded": self.recorded}
+
+def add_asset_arguments(parser):
+    """Adds the shared --offline/--record-assets flags."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--offline", action="store_true",
+                       help="Serve third-party assets only from the asset cache and fail on any other "
+                            "external request (populate it with verification/asset_cache.py)")
+    group.add_argument("--record-assets", action="store_true",
+                       help="Store every external response in the asset cache, for later --offline runs")
+
+def asset_cache_from_args(args):
+    return AssetCache(offline=args.offline, record=args.record_assets)
+
+def check_offline(stats):
+    """Exits with an error if a strict (--offline) run made uncached requests."""
+    if stats.get("asset_misses"):
+        print(f"Error: {stats['asset_misses']} external request(s) were not in the asset cache "
+              f"(run python verification/asset_cache.py, or a run with --record-assets).")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch the CDN assets of index.html into the local asset cache.")
+    parser.add_argument("--refresh", action="store_true", help="Re-download assets that are already cached")
+    args = parser.parse_args()
+
+    if not os.path.exists(INDEX_HTML):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    cache = AssetCache()
+    try:
+        fetched = cache.populate(page_assets(), refresh=args.refresh)
+    except OSError as e:
+        print(f"Error: could not fetch assets: {e}")
+        sys.exit(1)
+    for url in fetched:
+        entry = cache.entries[url]
+        print(f"{entry['size'] / 1024:>8.1f} KB  {url}")
+    total = sum(e["size"] for e in cache.entries.values())
+    print(f"{len(fetched)} asset(s) fetched; {len(cache)} cached in {ASSET_DIR} ({total / 1e6:.1f} MB).")
+
+if __name__ == "__main__":
+    main()
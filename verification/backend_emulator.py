@@ -0,0 +1,1355 @@
+"""
+In-process Python stand-in for the Code.js Apps Script backend.
+
+Backend ports the server functions of Code.js one-to-one: same names, same
+Sessions/Dashboards row layout and the same sheet reads and writes, on top of
+a small in-memory emulation of SpreadsheetApp and CacheService. Every sheet
+operation is metered (cells and bytes read and written, cache calls), so harness runs can measure what each RPC really costs and watch
+session state evolve across many pages.
+
+Pages reach it through gas_shim.install_backend(); harnesses that don't need a
+browser call Backend.call() directly:
+
+    backend = Backend()
+    code = backend.call("createSession", ['{"widgets": []}'], user="teacher@example.com")["code"]
+    backend.call("getSessionData", [code], user="student-1@example.com")
+    print(backend.report())
+
+Keep this file in step with Code.js: when a server function changes there,
+port the change here.
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import datetime
+import threading
+
+DEFAULT_USER = "teacher@example.com"
+DEFAULT_SCRIPT_URL = "https://script.google.com/macros/s/DEMO/exec"
+SESSION_CODE_CHARS = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+SESSION_ROW_CACHE_PREFIX = "sessionRow:"
+SESSION_ROW_CACHE_SECONDS = 21600
+SESSION_ARCHIVE_AFTER_DAYS = 7
+SESSION_ARCHIVE_KEEP_SCREENSHOTS = False
+SESSION_HEADER = ["Session Code", "Teacher Email", "Session Data", "Created At", "Active"]
+SCREENSHOT_HEADER = ["Session Code", "Screenshot Id", "Student Email", "Timestamp", "Thumbnail", "Chunks", "Image"]
+SCREENSHOT_CHUNK_CHARS = 45000
+SCREENSHOT_MAX_CHUNKS = 20
+SCREENSHOT_THUMBNAIL_MAX_CHARS = 20000
+SCREENSHOT_PAGE_SIZE = 12
+VOTE_HEADER = ["Session Code", "Widget Id", "Option", "Student Email", "Timestamp"]
+DASHBOARD_HEADER = ["User Email", "Dashboard Name", "Last Saved", "Widget Count", "Size", "Chunks", "Dashboard JSON"]
+LEGACY_DASHBOARD_HEADER = ["User Email", "Dashboard JSON", "Last Saved"]
+DASHBOARD_META_COLUMNS = 6
+DEFAULT_MAX_COLUMNS = 26  # Columns of a new sheet
+DASHBOARD_CHUNK_CHARS = 45000
+DASHBOARD_MAX_CHUNKS = 40
+DASHBOARD_MIGRATED_CACHE_PREFIX = "dashboardsMigrated:"
+DASHBOARD_MIGRATED_CACHE_SECONDS = 21600
+
+# Per-thread "execution": the active user and the stats of the running call
+_execution = threading.local()
+
+def js_json(value):
+    """JSON.stringify equivalent (compact separators, non-ASCII kept as is)."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def split_cells(text, max_chars):
+    """splitCells(): chunks of at most max_chars, none starting with a character Sheets would reinterpret."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        while end < len(text) and end > start + 1 and (text[end] in "=+-@'." or text[end].isdigit() or text[end].isspace()):
+            end -= 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+def _date_ms(value):
+    """new Date(value).getTime() of a Last Saved cell, None when it isn't a date."""
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    return None
+
+def dashboard_name_cell(name):
+    """dashboardNameCell(): the name JSON-encoded, so Sheets keeps it as text."""
+    return js_json(str(name))
+
+def dashboard_name(cell):
+    """dashboardName(): the dashboard name stored in a Dashboard Name cell."""
+    try:
+        name = json.loads(cell) if isinstance(cell, str) else None
+    except ValueError:
+        name = None
+    return name if isinstance(name, str) else _js_string(cell)
+
+def _js_string(value):
+    """String(value) for the values a cell holds."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+_NUMBER_TEXT = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)")
+_DATE_TEXT = re.compile(r"(\d{1,2})/(\d{1,2})(?:/(\d{4}))?")
+
+def _sheet_value(value):
+    """What a cell holds after `value` is written, like Sheets' automatic type conversion of text:
+    numbers and m/d[/yyyy] dates are converted, "=..." becomes a formula (its error here) and a
+    leading apostrophe is dropped."""
+    if not isinstance(value, str) or not value:
+        return value
+    if value[0] == "'":
+        return value[1:]
+    if value[0] == "=" and len(value) > 1:
+        return "#ERROR!"
+    text = value.strip()
+    if _NUMBER_TEXT.fullmatch(text):
+        number = float(text)
+        return int(number) if number.is_integer() else number
+    date = _DATE_TEXT.fullmatch(text)
+    if date:
+        try:
+            return datetime.datetime(int(date.group(3) or datetime.date.today().year), int(date.group(1)), int(date.group(2)))
+        except ValueError:
+            pass
+    return value
+
+def _cell_size(value):
+    return len(value) if isinstance(value, str) else len(str(value))
+
+class CallStats:
+    """Sheet traffic of one RPC (or a sum of several)."""
+
+    FIELDS = ("opens", "reads", "cells_read", "bytes_read", "writes", "cells_written", "bytes_written",
+              "cache_ops")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def add(self, other):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+class CostModel:
+    """Rough Apps Script execution time of one call, estimated from its sheet traffic.
+
+    The defaults are ballpark figures for a google.script.run round trip into a
+    Sheet-backed script: a fixed RPC overhead, a cost per SpreadsheetApp.openById,
+    per read/write operation, per cell/KB moved and per CacheService call. Calibrate them against
+    execution logs of a real deployment before trusting absolute numbers.
+    """
+
+    def __init__(self, rpc_ms=250.0, open_ms=40.0, read_ms=25.0, write_ms=60.0,
+                 cell_read_ms=0.002, kb_read_ms=0.3, kb_written_ms=0.5, cache_ms=8.0):
+        self.rpc_ms = rpc_ms
+        self.open_ms = open_ms
+        self.read_ms = read_ms
+        self.write_ms = write_ms
+        self.cell_read_ms = cell_read_ms
+        self.kb_read_ms = kb_read_ms
+        self.kb_written_ms = kb_written_ms
+        self.cache_ms = cache_ms
+
+    def estimate(self, record):
+        """Estimated ms for a Backend.calls record (or any dict with the CallStats fields)."""
+        return (self.rpc_ms
+                + self.open_ms * record["opens"]
+                + self.read_ms * record["reads"]
+                + self.write_ms * record["writes"]
+                + self.cell_read_ms * record["cells_read"]
+                + self.kb_read_ms * record["bytes_read"] / 1024
+                + self.kb_written_ms * record["bytes_written"] / 1024
+                + self.cache_ms * record["cache_ops"])
+
+def _stats():
+    stats = getattr(_execution, "stats", None)
+    if stats is None:
+        stats = _execution.stats = CallStats()
+    return stats
+
+# ==================== SpreadsheetApp stand-in ====================
+
+class Range:
+    """A rectangular block of a Sheet (1-based, like Apps Script)."""
+
+    def __init__(self, sheet, row, column, num_rows=1, num_columns=1):
+        self.sheet = sheet
+        self.row = row
+        self.column = column
+        self.num_rows = num_rows
+        self.num_columns = num_columns
+
+    def getValues(self):
+        return self.sheet._read(self.row, self.column, self.num_rows, self.num_columns)
+
+    def getValue(self):
+        return self.getValues()[0][0]
+
+    def setValue(self, value):
+        self.sheet._write(self.row, self.column, [[value]])
+
+    def setValues(self, values):
+        self.sheet._write(self.row, self.column, values)
+
+class Sheet:
+    """In-memory sheet. Each operation is atomic on its own, like a Sheets API call, but not across calls.
+
+    Written text is converted the way Sheets converts it (see _sheet_value), and
+    ranges past getMaxColumns() throw, as they do in Apps Script.
+    """
+
+    def __init__(self, spreadsheet, name):
+        self.spreadsheet = spreadsheet
+        self.name = name
+        self.rows = []
+        self.max_columns = DEFAULT_MAX_COLUMNS
+
+    def getName(self):
+        return self.name
+
+    def getParent(self):
+        return self.spreadsheet
+
+    def getLastRow(self):
+        return len(self.rows)
+
+    def getMaxColumns(self):
+        return self.max_columns
+
+    def insertColumnsAfter(self, column, how_many):
+        # Rows are kept ragged, so only the width changes
+        with self.spreadsheet._io():
+            self.max_columns += how_many
+            _stats().writes += 1
+
+    def getLastColumn(self):
+        return max((len(r) for r in self.rows), default=0)
+
+    def getDataRange(self):
+        return Range(self, 1, 1, max(1, self.getLastRow()), max(1, self.getLastColumn()))
+
+    def getRange(self, row, column, num_rows=1, num_columns=1):
+        if column + num_columns - 1 > self.max_columns:
+            raise Exception("The coordinates of the range are outside the dimensions of the sheet.")
+        return Range(self, row, column, num_rows, num_columns)
+
+    def appendRow(self, values):
+        with self.spreadsheet._io():
+            self.rows.append([_sheet_value(v) for v in values])
+            self.max_columns = max(self.max_columns, len(values))
+            stats = _stats()
+            stats.writes += 1
+            stats.cells_written += len(values)
+            stats.bytes_written += sum(_cell_size(v) for v in values)
+
+    def deleteRows(self, row, how_many):
+        with self.spreadsheet._io():
+            del self.rows[row - 1:row - 1 + how_many]
+            _stats().writes += 1
+
+    def deleteRow(self, row):
+        self.deleteRows(row, 1)
+
+    def _read(self, row, column, num_rows, num_columns):
+        with self.spreadsheet._io():
+            values = []
+            size = 0
+            for r in range(row - 1, row - 1 + num_rows):
+                src = self.rows[r] if r < len(self.rows) else []
+                out = [src[c] if c < len(src) else "" for c in range(column - 1, column - 1 + num_columns)]
+                size += sum(_cell_size(v) for v in out)
+                values.append(out)
+            stats = _stats()
+            stats.reads += 1
+            stats.cells_read += num_rows * num_columns
+            stats.bytes_read += size
+            return values
+
+    def _write(self, row, column, values):
+        with self.spreadsheet._io():
+            for dr, row_values in enumerate(values):
+                r = row - 1 + dr
+                while len(self.rows) <= r:
+                    self.rows.append([])
+                target = self.rows[r]
+                for dc, value in enumerate(row_values):
+                    c = column - 1 + dc
+                    while len(target) <= c:
+                        target.append("")
+                    target[c] = _sheet_value(value)
+            stats = _stats()
+            stats.writes += 1
+            stats.cells_written += sum(len(v) for v in values)
+            stats.bytes_written += sum(_cell_size(v) for rv in values for v in rv)
+
+class Spreadsheet:
+    """The SPREADSHEET_ID spreadsheet. io_delay (seconds) is added to every sheet operation."""
+
+    def __init__(self, io_delay=0.0):
+        self.sheets = {}
+        self.io_delay = io_delay
+        self._lock = threading.RLock()
+
+    def _io(self):
+        if self.io_delay:
+            time.sleep(self.io_delay)
+        return self._lock
+
+    def getSheetByName(self, name):
+        return self.sheets.get(name)
+
+    def insertSheet(self, name):
+        sheet = self.sheets[name] = Sheet(self, name)
+        return sheet
+
+# ==================== CacheService stand-in ====================
+
+class Cache:
+    """CacheService.getScriptCache(): string values with an expiry, shared by all users."""
+
+    def __init__(self):
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        _stats().cache_ops += 1
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            return entry[0]
+
+    def put(self, key, value, expiration_seconds=600):
+        _stats().cache_ops += 1
+        with self._lock:
+            self.entries[key] = (str(value), time.monotonic() + expiration_seconds)
+
+    def remove(self, key):
+        _stats().cache_ops += 1
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def removeAll(self, keys):
+        _stats().cache_ops += 1
+        with self._lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        """Harness helper (not in Apps Script): forget everything, like an evicted cache."""
+        with self._lock:
+            self.entries.clear()
+
+class ScriptLock:
+    """LockService.getScriptLock(): one lock for all executions of the script."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner = threading.local()
+
+    def tryLock(self, timeout_ms):
+        acquired = self._lock.acquire(timeout=timeout_ms / 1000) if timeout_ms else self._lock.acquire(blocking=False)
+        self._owner.held = acquired
+        return acquired
+
+    def waitLock(self, timeout_ms):
+        if not self.tryLock(timeout_ms):
+            raise Exception("Lock timeout: another process was holding the lock for too long.")
+
+    def releaseLock(self):
+        if getattr(self._owner, "held", False):
+            self._owner.held = False
+            self._lock.release()
+
+# ==================== Code.js port ====================
+
+class Backend:
+    """Code.js server functions over an emulated spreadsheet."""
+
+    # Functions the client may call through google.script.run
+    RPC_METHODS = (
+        "saveDashboard", "deleteDashboard", "renameDashboard", "listDashboards", "getDashboard",
+        "getDashboards", "loadDashboard",
+        "getScriptUrl", "createSession", "joinSession", "getSessionData", "updateSession",
+        "patchSession", "syncSession", "setSessionPaused", "updateWidgetState", "submitPollResponse", "endSession",
+        "getActiveSession", "requestScreenshots", "submitScreenshot", "getScreenshots",
+        "getScreenshotImage", "clearScreenshots",
+    )
+    # Functions run from time-driven triggers
+    TRIGGER_METHODS = ("compactSessions",)
+
+    def __init__(self, script_url=DEFAULT_SCRIPT_URL, session_codes=None, io_delay=0.0, seed=None, clock=None):
+        self.spreadsheet = Spreadsheet(io_delay)
+        self.script_cache = Cache()
+        self.script_lock = ScriptLock()
+        self.clock = clock or datetime.datetime.now  # Date.now() of the maintenance functions
+        self.script_url = script_url
+        self.session_codes = list(session_codes or [])
+        self.random = random.Random(seed)
+        self.calls = []
+        self.logs = []
+        self._calls_lock = threading.Lock()
+
+    # --- Harness API ---
+
+    def call(self, name, args=(), user=DEFAULT_USER):
+        """Runs one server function as `user` and records its cost."""
+        if name not in self.RPC_METHODS + self.TRIGGER_METHODS:
+            raise AttributeError(f"Script function not found: {name}")
+        _execution.user = user
+        _execution.stats = CallStats()
+        start = time.perf_counter()
+        try:
+            return getattr(self, name)(*args)
+        finally:
+            record = {"name": name, "user": user, "ms": (time.perf_counter() - start) * 1000}
+            record.update(_execution.stats.as_dict())
+            with self._calls_lock:
+                self.calls.append(record)
+
+    def seed_session(self, code, teacher_email, data, active=True):
+        """Appends a Sessions row directly, e.g. for a session a page should be able to join."""
+        session_data = {"widgets": [], "bg": "bg-slate-900", "polls": {}, "studentCount": 0}
+        session_data.update(data)
+        self.getSessionSheet().appendRow([code, teacher_email, js_json(session_data), datetime.datetime.now(), active])
+
+    def seed_dashboards(self, user_email, dashboards):
+        """Stores a user's saved dashboards (name -> dashboard) directly, one row each."""
+        sheet = self.getSheet()
+        for name, dashboard in dashboards.items():
+            sheet.appendRow(self.dashboardRow(user_email, name, dashboard, datetime.datetime.now()))
+
+    def seed_legacy_dashboards(self, user_email, dashboards, saved_at=None):
+        """Stores a user's dashboards map as one row of the legacy Dashboards sheet, as before migration."""
+        spreadsheet = self.spreadsheet
+        sheet = spreadsheet.getSheetByName("Dashboards")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Dashboards")
+            sheet.appendRow(LEGACY_DASHBOARD_HEADER)
+        sheet.appendRow([user_email, js_json(dashboards), saved_at or datetime.datetime.now()])
+
+    def summary(self):
+        """Per-function call counts and totals of time and sheet traffic."""
+        summary = {}
+        for record in self.calls:
+            entry = summary.setdefault(record["name"], {"calls": 0, "ms": 0.0, **CallStats().as_dict()})
+            entry["calls"] += 1
+            for key, value in record.items():
+                if key not in ("name", "user", "calls"):
+                    entry[key] += value
+        return summary
+
+    def report(self):
+        """Text table of summary()."""
+        lines = [f"{'Function':<20} {'Calls':>6} {'ms':>9} {'Reads':>6} {'KB read':>9} {'Writes':>6} {'KB written':>10}"]
+        for name, s in sorted(self.summary().items()):
+            lines.append(f"{name:<20} {s['calls']:>6} {s['ms']:>9.1f} {s['reads']:>6} "
+                         f"{s['bytes_read'] / 1024:>9.1f} {s['writes']:>6} {s['bytes_written'] / 1024:>10.1f}")
+        return "\n".join(lines)
+
+    # --- Apps Script services ---
+
+    def _active_user_email(self):
+        return getattr(_execution, "user", DEFAULT_USER)
+
+    def _open_spreadsheet(self):
+        _stats().opens += 1
+        return self.spreadsheet
+
+    def _get_script_cache(self):
+        return self.script_cache
+
+    def _get_script_lock(self):
+        return self.script_lock
+
+    def _log(self, message):
+        self.logs.append(message)
+
+    # --- Dashboards ---
+
+    def getSheet(self):
+        spreadsheet = self._open_spreadsheet()
+        sheet = spreadsheet.getSheetByName("Saved Dashboards")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Saved Dashboards")
+            sheet.appendRow(DASHBOARD_HEADER)
+        return sheet
+
+    def getUserData(self, sheet, userEmail):
+        lastRow = sheet.getLastRow()
+        emails = sheet.getRange(2, 1, lastRow - 1, 1).getValues() if lastRow > 1 else []
+        for i in range(len(emails)):
+            if emails[i][0] == userEmail:
+                values = sheet.getRange(i + 2, 1, 1, 3).getValues()[0]
+                jsonData = values[1]
+                dashboards = {}
+                try:
+                    if jsonData:
+                        parsed = json.loads(jsonData)
+                        # Legacy format (direct dashboard object) has 'widgets' array or 'bg' string
+                        if isinstance(parsed, dict) and (isinstance(parsed.get("widgets"), list) or isinstance(parsed.get("bg"), str)):
+                            dashboards["Default"] = parsed
+                        else:
+                            dashboards = parsed
+                except ValueError as e:
+                    self._log("Error parsing JSON: " + str(e))
+                return {"row": i + 2, "dashboards": dashboards, "lastSaved": values[2]}
+        return {"row": -1, "dashboards": {}, "lastSaved": None}
+
+    def ensureColumns(self, sheet, width):
+        maxColumns = sheet.getMaxColumns()
+        if width > maxColumns:
+            sheet.insertColumnsAfter(maxColumns, width - maxColumns)
+
+    def dashboardRow(self, userEmail, name, dashboard, savedAt):
+        data = js_json(dashboard)
+        chunks = split_cells(data, DASHBOARD_CHUNK_CHARS)
+        widgetCount = len(dashboard["widgets"]) if isinstance(dashboard, dict) and isinstance(dashboard.get("widgets"), list) else 0
+        return [userEmail, dashboard_name_cell(name), savedAt, widgetCount, len(data), len(chunks)] + chunks
+
+    def dashboardMeta(self, values):
+        return {
+            "name": dashboard_name(values[1]),
+            "lastSaved": _date_ms(values[2]),
+            "widgets": int(values[3] or 0),
+            "size": int(values[4] or 0),
+        }
+
+    def findDashboardRows(self, sheet, userEmail):
+        lastRow = sheet.getLastRow()
+        if lastRow < 2:
+            return []
+        data = sheet.getRange(2, 1, lastRow - 1, DASHBOARD_META_COLUMNS).getValues()
+        return [{"row": i + 2, "values": data[i]} for i in range(len(data)) if data[i][0] == userEmail]
+
+    def findDashboardRow(self, sheet, userEmail, name):
+        for found in self.findDashboardRows(sheet, userEmail):
+            if dashboard_name(found["values"][1]) == name:
+                return found
+        return None
+
+    def readDashboard(self, sheet, found):
+        chunks = int(found["values"][5] or 0)
+        if not chunks:
+            return {}
+        return json.loads("".join(sheet.getRange(found["row"], DASHBOARD_META_COLUMNS + 1, 1, chunks).getValues()[0]))
+
+    def migrateLegacyDashboards(self, sheet, userEmail):
+        cache = self._get_script_cache()
+        key = DASHBOARD_MIGRATED_CACHE_PREFIX + userEmail
+        if cache.get(key):
+            return
+
+        legacySheet = sheet.getParent().getSheetByName("Dashboards")
+        if legacySheet:
+            # Two tabs of the same teacher must not migrate the same row twice
+            lock = self._get_script_lock()
+            lock.waitLock(10000)
+            try:
+                legacy = self.getUserData(legacySheet, userEmail)
+                if legacy["row"] != -1:
+                    existing = [dashboard_name(d["values"][1]) for d in self.findDashboardRows(sheet, userEmail)]
+                    savedAt = legacy["lastSaved"] or datetime.datetime.now()
+                    rows = [self.dashboardRow(userEmail, name, dashboard, savedAt)
+                            for name, dashboard in legacy["dashboards"].items() if name not in existing]
+                    if rows:
+                        width = max(len(r) for r in rows)
+                        rows = [r + [""] * (width - len(r)) for r in rows]
+                        self.ensureColumns(sheet, width)
+                        sheet.getRange(sheet.getLastRow() + 1, 1, len(rows), width).setValues(rows)
+                    legacySheet.deleteRow(legacy["row"])
+            finally:
+                lock.releaseLock()
+        cache.put(key, "1", DASHBOARD_MIGRATED_CACHE_SECONDS)
+
+    def saveDashboard(self, name, dashboardJson):
+        try:
+            sheet = self.getSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                raise Exception("Could not identify user.")
+            self.migrateLegacyDashboards(sheet, userEmail)
+
+            values = self.dashboardRow(userEmail, name, json.loads(dashboardJson), datetime.datetime.now())
+            if values[5] > DASHBOARD_MAX_CHUNKS:
+                return {"success": False, "message": "Dashboard is too large to save."}
+
+            existing = self.findDashboardRow(sheet, userEmail, name)
+            if existing:
+                # Blank the chunk cells of the previous version that the new one doesn't use
+                width = DASHBOARD_META_COLUMNS + int(existing["values"][5] or 0)
+                values += [""] * (width - len(values))
+                self.ensureColumns(sheet, len(values))
+                sheet.getRange(existing["row"], 1, 1, len(values)).setValues([values])
+            else:
+                sheet.appendRow(values)
+
+            return {"success": True, "message": "Dashboard saved successfully!", "dashboard": self.dashboardMeta(values)}
+        except Exception as e:
+            self._log("Error saving dashboard: " + str(e))
+            return {"success": False, "message": "Error saving dashboard: " + str(e)}
+
+    def deleteDashboard(self, name):
+        try:
+            sheet = self.getSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                raise Exception("Could not identify user.")
+            self.migrateLegacyDashboards(sheet, userEmail)
+
+            existing = self.findDashboardRow(sheet, userEmail, name)
+            if existing:
+                sheet.deleteRow(existing["row"])
+                return {"success": True, "message": "Dashboard deleted."}
+            return {"success": False, "message": "Dashboard not found."}
+        except Exception as e:
+            self._log("Error deleting dashboard: " + str(e))
+            return {"success": False, "message": "Error deleting dashboard: " + str(e)}
+
+    def renameDashboard(self, oldName, newName):
+        try:
+            sheet = self.getSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                raise Exception("Could not identify user.")
+            self.migrateLegacyDashboards(sheet, userEmail)
+
+            existing = self.findDashboardRow(sheet, userEmail, oldName)
+            if not existing:
+                return {"success": False, "message": "Dashboard not found."}
+            if self.findDashboardRow(sheet, userEmail, newName):
+                return {"success": False, "message": "Dashboard with this name already exists."}
+            if not newName or newName.strip() == "":
+                return {"success": False, "message": "Name cannot be empty."}
+
+            sheet.getRange(existing["row"], 2).setValue(dashboard_name_cell(newName))
+            return {"success": True, "message": "Dashboard renamed."}
+        except Exception as e:
+            self._log("Error renaming dashboard: " + str(e))
+            return {"success": False, "message": "Error renaming dashboard: " + str(e)}
+
+    def listDashboards(self):
+        try:
+            sheet = self.getSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                return {"success": True, "dashboards": []}
+            self.migrateLegacyDashboards(sheet, userEmail)
+            return {"success": True,
+                    "dashboards": [self.dashboardMeta(d["values"]) for d in self.findDashboardRows(sheet, userEmail)]}
+        except Exception as e:
+            self._log("Error listing dashboards: " + str(e))
+            return {"success": False, "message": "Error listing dashboards: " + str(e), "dashboards": []}
+
+    def getDashboard(self, name):
+        try:
+            sheet = self.getSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                raise Exception("Could not identify user.")
+            self.migrateLegacyDashboards(sheet, userEmail)
+
+            existing = self.findDashboardRow(sheet, userEmail, name)
+            if not existing:
+                return {"success": False, "message": "Dashboard not found."}
+            return {"success": True, "name": name, "lastSaved": self.dashboardMeta(existing["values"])["lastSaved"],
+                    "data": self.readDashboard(sheet, existing)}
+        except Exception as e:
+            self._log("Error loading dashboard: " + str(e))
+            return {"success": False, "message": "Error loading dashboard: " + str(e)}
+
+    def getDashboards(self):
+        try:
+            sheet = self.getSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                return js_json({})
+            self.migrateLegacyDashboards(sheet, userEmail)
+            dashboards = {dashboard_name(d["values"][1]): self.readDashboard(sheet, d)
+                          for d in self.findDashboardRows(sheet, userEmail)}
+            return js_json(dashboards)
+        except Exception as e:
+            self._log("Error loading dashboards: " + str(e))
+            return js_json({})
+
+    def loadDashboard(self):
+        return self.getDashboards()
+
+    # --- Live sessions ---
+
+    def getSessionSheet(self):
+        spreadsheet = self._open_spreadsheet()
+        sheet = spreadsheet.getSheetByName("Sessions")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Sessions")
+            sheet.appendRow(SESSION_HEADER)
+        return sheet
+
+    def generateSessionCode(self):
+        if self.session_codes:
+            return self.session_codes.pop(0)
+        return "".join(self.random.choice(SESSION_CODE_CHARS) for _ in range(6))
+
+    def findSessionRow(self, sheet, code):
+        cache = self._get_script_cache()
+        key = SESSION_ROW_CACHE_PREFIX + code
+
+        cachedRow = int(cache.get(key) or 0)
+        if cachedRow > 1:
+            values = sheet.getRange(cachedRow, 1, 1, 5).getValues()[0]
+            if values[0] == code:
+                return {"row": cachedRow, "values": values}
+
+        lastRow = sheet.getLastRow()
+        if lastRow < 2:
+            return None
+        codes = sheet.getRange(2, 1, lastRow - 1, 1).getValues()
+        active = sheet.getRange(2, 5, lastRow - 1, 1).getValues()
+
+        row = 0
+        for i in range(len(codes) - 1, -1, -1):
+            if codes[i][0] != code:
+                continue
+            if not row:
+                row = i + 2
+            if active[i][0] is True:
+                row = i + 2
+                break
+        if not row:
+            return None
+
+        cache.put(key, str(row), SESSION_ROW_CACHE_SECONDS)
+        return {"row": row, "values": sheet.getRange(row, 1, 1, 5).getValues()[0]}
+
+    def bumpRevision(self, sessionData):
+        sessionData["rev"] = (sessionData.get("rev") or 0) + 1
+        return sessionData["rev"]
+
+    def sessionDelta(self, sessionData, sinceRev):
+        widgets = sessionData.get("widgets") or []
+        return {
+            "rev": sessionData.get("rev"),
+            "bg": sessionData.get("bg"),
+            "polls": sessionData.get("polls") or {},
+            "paused": sessionData.get("paused"),
+            "screenshotRequest": sessionData.get("screenshotRequest"),
+            "widgetIds": [w["id"] for w in widgets],
+            "widgets": [w for w in widgets if (w.get("rev") or 0) > sinceRev],
+        }
+
+    def getScriptUrl(self):
+        return self.script_url
+
+    def createSession(self, dashboardJson):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                raise Exception("Could not identify user.")
+
+            # End any existing sessions for this teacher (code, teacher and active columns only)
+            lastRow = sheet.getLastRow()
+            keys = sheet.getRange(2, 1, lastRow - 1, 2).getValues() if lastRow > 1 else []
+            active = sheet.getRange(2, 5, lastRow - 1, 1).getValues() if lastRow > 1 else []
+            for i in range(len(keys)):
+                if keys[i][1] == userEmail and active[i][0] is True:
+                    sheet.getRange(i + 2, 5).setValue(False)
+                    active[i][0] = False
+
+            # Generate unique code
+            code = self.generateSessionCode()
+            attempts = 0
+            while attempts < 10:
+                exists = any(keys[i][0] == code and active[i][0] is True for i in range(len(keys)))
+                if not exists:
+                    break
+                code = self.generateSessionCode()
+                attempts += 1
+
+            dashboardData = json.loads(dashboardJson)
+            sessionData = {
+                "widgets": dashboardData.get("widgets") or [],
+                "bg": dashboardData.get("bg") or "bg-slate-900",
+                "polls": {},
+                "studentCount": 0,
+                "rev": 1,
+                "voteRow": self.getVoteSheet().getLastRow(),
+            }
+            sheet.appendRow([code, userEmail, js_json(sessionData), datetime.datetime.now(), True])
+            self._get_script_cache().put(SESSION_ROW_CACHE_PREFIX + code, str(sheet.getLastRow()),
+                                         SESSION_ROW_CACHE_SECONDS)
+            return {"success": True, "code": code, "rev": sessionData["rev"]}
+        except Exception as e:
+            self._log("Error creating session: " + str(e))
+            return {"success": False, "message": "Error creating session: " + str(e)}
+
+    def joinSession(self, code):
+        try:
+            sheet = self.getSessionSheet()
+            session = self.findSessionRow(sheet, code.upper())
+            if session and session["values"][4] is True:
+                return {"success": True, "data": json.loads(session["values"][2]), "teacherEmail": session["values"][1]}
+            return {"success": False, "message": "Session not found or has ended."}
+        except Exception as e:
+            self._log("Error joining session: " + str(e))
+            return {"success": False, "message": "Error joining session: " + str(e)}
+
+    def getSessionData(self, code, sinceRev=None):
+        try:
+            sheet = self.getSessionSheet()
+            session = self.findSessionRow(sheet, code.upper())
+            if session and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                rev = sessionData.get("rev") or 0
+                if sinceRev and sinceRev == rev:
+                    return {"success": True, "active": True, "notModified": True, "rev": rev}
+                if sinceRev and sinceRev < rev:
+                    return {"success": True, "active": True, "delta": True, "rev": rev,
+                            "data": self.sessionDelta(sessionData, sinceRev)}
+                return {"success": True, "data": sessionData, "active": True, "rev": rev}
+            elif session and session["values"][4] is False:
+                return {"success": False, "active": False, "message": "Session has ended."}
+            return {"success": False, "message": "Session not found."}
+        except Exception as e:
+            self._log("Error getting session: " + str(e))
+            return {"success": False, "message": "Error getting session: " + str(e)}
+
+    def updateSession(self, code, dashboardJson):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                existingData = json.loads(session["values"][2])
+                newData = json.loads(dashboardJson)
+
+                rev = self.bumpRevision(existingData)
+                existingData["bg"] = newData.get("bg") or existingData.get("bg")
+                existingData["polls"] = existingData.get("polls") or {}
+
+                # Full replace of widgets, but keep the server's 'data' for interactive widgets
+                mergedWidgets = []
+                for newW in newData.get("widgets") or []:
+                    oldW = next((w for w in existingData.get("widgets") or [] if w["id"] == newW["id"]), None)
+                    if oldW and newW.get("allowInteraction"):
+                        if "data" in oldW:
+                            newW["data"] = oldW["data"]
+                        else:
+                            newW.pop("data", None)
+                    # Only widgets that actually changed get the new revision
+                    newW.pop("rev", None)
+                    if oldW and oldW.get("rev") is not None:
+                        newW["rev"] = oldW["rev"]
+                    if not oldW or js_json(newW) != js_json(oldW):
+                        newW["rev"] = rev
+                    mergedWidgets.append(newW)
+                existingData["widgets"] = mergedWidgets
+
+                sheet.getRange(session["row"], 3).setValue(js_json(existingData))
+                return {"success": True, "rev": rev}
+            return {"success": False, "message": "Session not found or not authorized."}
+        except Exception as e:
+            self._log("Error updating session: " + str(e))
+            return {"success": False, "message": "Error updating session: " + str(e)}
+
+    def applySessionPatch(self, sessionData, patch):
+        widgets = sessionData.get("widgets") or []
+        rev = (sessionData.get("rev") or 0) + 1
+        changed = False
+
+        if patch.get("bg") and patch["bg"] != sessionData.get("bg"):
+            sessionData["bg"] = patch["bg"]
+            changed = True
+
+        for newW in patch.get("widgets") or []:
+            index = next((k for k, w in enumerate(widgets) if w["id"] == newW["id"]), -1)
+            # As in updateSession, interactive widgets keep the server's data
+            if index != -1 and newW.get("allowInteraction"):
+                if "data" in widgets[index]:
+                    newW["data"] = widgets[index]["data"]
+                else:
+                    newW.pop("data", None)
+            newW["rev"] = rev
+            if index != -1:
+                widgets[index] = newW
+            else:
+                widgets.append(newW)
+            changed = True
+
+        if patch.get("removed"):
+            before = len(widgets)
+            widgets = [w for w in widgets if w["id"] not in patch["removed"]]
+            if len(widgets) != before:
+                changed = True
+        sessionData["widgets"] = widgets
+
+        if changed:
+            sessionData["rev"] = rev
+        return changed
+
+    def patchSession(self, code, patchJson):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            patch = json.loads(patchJson)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                if self.applySessionPatch(sessionData, patch):
+                    sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+                return {"success": True, "rev": sessionData.get("rev") or 0}
+            return {"success": False, "message": "Session not found or not authorized."}
+        except Exception as e:
+            self._log("Error patching session: " + str(e))
+            return {"success": False, "message": "Error patching session: " + str(e)}
+
+    def syncSession(self, code, patchJson, sinceRev=None):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                patch = json.loads(patchJson) if patchJson else {}
+                # Votes that arrived while another voter was counting are picked up here
+                voted = self.foldVotes(sessionData, code)
+                if voted:
+                    self.bumpRevision(sessionData)
+                if self.applySessionPatch(sessionData, patch) or voted:
+                    sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+
+                rev = sessionData.get("rev") or 0
+                if sinceRev and sinceRev == rev:
+                    return {"success": True, "active": True, "notModified": True, "rev": rev}
+                delta = self.sessionDelta(sessionData, sinceRev or 0)
+                sent = {w["id"] for w in patch.get("widgets") or [] if not w.get("allowInteraction")}
+                delta["widgets"] = [w for w in delta["widgets"] if w["id"] not in sent]
+                return {"success": True, "active": True, "delta": True, "rev": rev, "data": delta}
+            return {"success": False, "message": "Session not found or not authorized."}
+        except Exception as e:
+            self._log("Error syncing session: " + str(e))
+            return {"success": False, "message": "Error syncing session: " + str(e)}
+
+    def setSessionPaused(self, code, paused):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                sessionData["paused"] = paused
+                self.bumpRevision(sessionData)
+                sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+                return {"success": True, "paused": paused}
+            return {"success": False, "message": "Session not found."}
+        except Exception as e:
+            self._log("Error setting pause state: " + str(e))
+            return {"success": False, "message": str(e)}
+
+    def updateWidgetState(self, code, widgetId, stateJson):
+        try:
+            sheet = self.getSessionSheet()
+            session = self.findSessionRow(sheet, code.upper())
+            newState = json.loads(stateJson)
+            if session and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                if sessionData.get("paused"):
+                    return {"success": False, "message": "Session is paused."}
+                # Loose (==) id match, as in Code.js
+                widget = next((w for w in sessionData.get("widgets") or [] if str(w["id"]) == str(widgetId)), None)
+                if widget:
+                    if widget.get("allowInteraction"):
+                        widget["data"] = newState
+                        widget["rev"] = self.bumpRevision(sessionData)
+                        sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+                        return {"success": True}
+                    return {"success": False, "message": "Interaction not allowed."}
+                return {"success": False, "message": "Widget not found."}
+            return {"success": False, "message": "Session not found."}
+        except Exception as e:
+            self._log("Error updating widget: " + str(e))
+            return {"success": False, "message": str(e)}
+
+    def getVoteSheet(self):
+        spreadsheet = self._open_spreadsheet()
+        sheet = spreadsheet.getSheetByName("Votes")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Votes")
+            sheet.appendRow(VOTE_HEADER)
+        return sheet
+
+    def foldVotes(self, sessionData, code):
+        voteSheet = self.getVoteSheet()
+        lastRow = voteSheet.getLastRow()
+        start = (sessionData.get("voteRow") or 1) + 1
+        if lastRow < start:
+            return False
+
+        votes = voteSheet.getRange(start, 1, lastRow - start + 1, 3).getValues()
+        polls = sessionData.setdefault("polls", {})
+        added = False
+        for vote in votes:
+            if vote[0] != code:
+                continue
+            key = str(vote[1])  # JS object keys are strings
+            polls.setdefault(key, {"A": 0, "B": 0})[vote[2]] += 1
+            added = True
+        sessionData["voteRow"] = lastRow
+        return added
+
+    def submitPollResponse(self, code, widgetId, option):
+        try:
+            if option not in ("A", "B"):
+                return {"success": False, "message": "Invalid option."}
+            sheet = self.getSessionSheet()
+            upperCode = code.upper()
+            session = self.findSessionRow(sheet, upperCode)
+            if session and session["values"][4] is True:
+                self.getVoteSheet().appendRow([upperCode, widgetId, option, self._active_user_email(),
+                                               datetime.datetime.now()])
+
+                # One voter counts at a time; in a burst the others return straight away
+                lock = self._get_script_lock()
+                if lock.tryLock(0):
+                    try:
+                        current = self.findSessionRow(sheet, upperCode)
+                        sessionData = json.loads(current["values"][2])
+                        if self.foldVotes(sessionData, upperCode):
+                            self.bumpRevision(sessionData)
+                            sheet.getRange(current["row"], 3).setValue(js_json(sessionData))
+                        return {"success": True, "polls": sessionData["polls"].get(str(widgetId)) or {"A": 0, "B": 0}}
+                    finally:
+                        lock.releaseLock()
+
+                # Not counted yet: report the last counts plus this vote
+                polls = dict({"A": 0, "B": 0}, **(json.loads(session["values"][2]).get("polls") or {}).get(str(widgetId), {}))
+                polls[option] += 1
+                return {"success": True, "polls": polls}
+            return {"success": False, "message": "Session not found."}
+        except Exception as e:
+            self._log("Error submitting poll: " + str(e))
+            return {"success": False, "message": "Error submitting poll: " + str(e)}
+
+    def endSession(self, code):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                sheet.getRange(session["row"], 5).setValue(False)
+                return {"success": True, "message": "Session ended."}
+            return {"success": False, "message": "Session not found or not authorized."}
+        except Exception as e:
+            self._log("Error ending session: " + str(e))
+            return {"success": False, "message": "Error ending session: " + str(e)}
+
+    def getActiveSession(self):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            if not userEmail:
+                return {"success": False}
+            lastRow = sheet.getLastRow()
+            if lastRow < 2:
+                return {"success": False}
+            teachers = sheet.getRange(2, 2, lastRow - 1, 1).getValues()
+            active = sheet.getRange(2, 5, lastRow - 1, 1).getValues()
+            for i in range(len(teachers)):
+                if teachers[i][0] == userEmail and active[i][0] is True:
+                    values = sheet.getRange(i + 2, 1, 1, 3).getValues()[0]
+                    return {"success": True, "code": values[0], "data": json.loads(values[2])}
+            return {"success": False}
+        except Exception as e:
+            self._log("Error getting active session: " + str(e))
+            return {"success": False}
+
+    # --- Screenshots ---
+
+    def _update_teacher_session(self, code, mutate):
+        """Shared body of the teacher-only screenshot functions: find the row, mutate its data, write it back."""
+        sheet = self.getSessionSheet()
+        userEmail = self._active_user_email()
+        session = self.findSessionRow(sheet, code)
+        if session and session["values"][1] == userEmail and session["values"][4] is True:
+            sessionData = json.loads(session["values"][2])
+            mutate(sessionData)
+            sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+            return {"success": True}
+        return {"success": False, "message": "Session not found or not authorized."}
+
+    def requestScreenshots(self, code):
+        try:
+            def mutate(sessionData):
+                sessionData["screenshotRequest"] = int(time.time() * 1000)
+                sessionData["screenshots"] = []
+                self.bumpRevision(sessionData)
+            return self._update_teacher_session(code, mutate)
+        except Exception as e:
+            self._log("Error requesting screenshots: " + str(e))
+            return {"success": False, "message": "Error: " + str(e)}
+
+    def getScreenshotSheet(self):
+        spreadsheet = self._open_spreadsheet()
+        sheet = spreadsheet.getSheetByName("Screenshots")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Screenshots")
+            sheet.appendRow(SCREENSHOT_HEADER)
+        return sheet
+
+    def findScreenshotRow(self, sheet, ref):
+        if (ref.get("row") or 0) > 1:
+            values = sheet.getRange(ref["row"], 1, 1, 6).getValues()[0]
+            if values[1] == ref["id"]:
+                return {"row": ref["row"], "values": values}
+        lastRow = sheet.getLastRow()
+        if lastRow < 2:
+            return None
+        ids = sheet.getRange(2, 2, lastRow - 1, 1).getValues()
+        for i in range(len(ids) - 1, -1, -1):
+            if ids[i][0] == ref["id"]:
+                return {"row": i + 2, "values": sheet.getRange(i + 2, 1, 1, 6).getValues()[0]}
+        return None
+
+    def submitScreenshot(self, code, imageData, thumbnailData=None):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            if not self.findSessionRow(sheet, code.upper()):
+                return {"success": False, "message": "Session not found."}
+
+            chunks = split_cells(imageData, SCREENSHOT_CHUNK_CHARS)
+            if len(chunks) > SCREENSHOT_MAX_CHUNKS:
+                return {"success": False, "message": "Screenshot is too large."}
+            thumbnail = thumbnailData if (isinstance(thumbnailData, str) and thumbnailData.startswith("data:image/")
+                                          and len(thumbnailData) <= SCREENSHOT_THUMBNAIL_MAX_CHARS) else ""
+
+            ref = {"id": str(uuid.uuid4()), "studentEmail": userEmail, "timestamp": int(time.time() * 1000)}
+            screenshotSheet = self.getScreenshotSheet()
+
+            # A whole class submits at once; the lock keeps concurrent updates of the session row from
+            # dropping refs and getLastRow() after appendRow() from returning a classmate's row
+            lock = self._get_script_lock()
+            lock.waitLock(10000)
+            try:
+                session = self.findSessionRow(sheet, code.upper())
+                if not session or session["values"][4] is not True:
+                    return {"success": False, "message": "Session not found."}
+                screenshotSheet.appendRow([code.upper(), ref["id"], userEmail, ref["timestamp"], thumbnail, len(chunks)] + chunks)
+                ref["row"] = screenshotSheet.getLastRow()
+                sessionData = json.loads(session["values"][2])
+                sessionData.setdefault("screenshots", []).append(ref)
+                sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+            finally:
+                lock.releaseLock()
+            return {"success": True}
+        except Exception as e:
+            self._log("Error submitting screenshot: " + str(e))
+            return {"success": False, "message": "Error: " + str(e)}
+
+    def getScreenshots(self, code, offset=None, limit=None):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                refs = sessionData.get("screenshots") or []
+                start = offset or 0
+                page = refs[start:start + (limit or SCREENSHOT_PAGE_SIZE)]
+
+                # Screenshots of one request are mostly adjacent rows: read the page's span at once
+                screenshotSheet = self.getScreenshotSheet()
+                rows = [ref["row"] for ref in page if (ref.get("row") or 0) > 1]
+                first = min(rows, default=0)
+                span = screenshotSheet.getRange(first, 1, max(rows) - first + 1, 6).getValues() if rows else []
+
+                screenshots = []
+                for ref in page:
+                    index = (ref.get("row") or 0) - first
+                    values = span[index] if 0 <= index < len(span) else None
+                    if not values or values[1] != ref["id"]:
+                        found = self.findScreenshotRow(screenshotSheet, ref)
+                        values = found["values"] if found else None
+                    screenshots.append({"id": ref["id"], "studentEmail": ref.get("studentEmail"),
+                                        "timestamp": ref.get("timestamp"), "thumbnail": values[4] if values else ""})
+
+                return {"success": True, "screenshots": screenshots, "total": len(refs),
+                        "nextOffset": start + len(page) if start + len(page) < len(refs) else None}
+            return {"success": False, "message": "Session not found or not authorized."}
+        except Exception as e:
+            self._log("Error getting screenshots: " + str(e))
+            return {"success": False, "message": "Error: " + str(e)}
+
+    def getScreenshotImage(self, code, screenshotId):
+        try:
+            sheet = self.getSessionSheet()
+            userEmail = self._active_user_email()
+            session = self.findSessionRow(sheet, code)
+            if session and session["values"][1] == userEmail and session["values"][4] is True:
+                sessionData = json.loads(session["values"][2])
+                ref = next((r for r in sessionData.get("screenshots") or [] if r.get("id") == screenshotId), None)
+                screenshotSheet = self.getScreenshotSheet()
+                found = self.findScreenshotRow(screenshotSheet, ref) if ref else None
+                if not found:
+                    return {"success": False, "message": "Screenshot not found."}
+                count = found["values"][5]
+                chunks = screenshotSheet.getRange(found["row"], 7, 1, count).getValues()[0] if count else []
+                return {"success": True, "data": "".join(chunks)}
+            return {"success": False, "message": "Session not found or not authorized."}
+        except Exception as e:
+            self._log("Error getting screenshot: " + str(e))
+            return {"success": False, "message": "Error: " + str(e)}
+
+    def clearScreenshots(self, code):
+        try:
+            def mutate(sessionData):
+                sessionData["screenshots"] = []
+                sessionData["screenshotRequest"] = None
+                self.bumpRevision(sessionData)
+            return self._update_teacher_session(code, mutate)
+        except Exception as e:
+            self._log("Error clearing screenshots: " + str(e))
+            return {"success": False, "message": "Error: " + str(e)}
+
+    # --- Maintenance ---
+
+    def getSessionArchiveSheet(self):
+        spreadsheet = self._open_spreadsheet()
+        sheet = spreadsheet.getSheetByName("Sessions Archive")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Sessions Archive")
+            sheet.appendRow(SESSION_HEADER)
+        return sheet
+
+    def getVoteArchiveSheet(self):
+        spreadsheet = self._open_spreadsheet()
+        sheet = spreadsheet.getSheetByName("Votes Archive")
+        if not sheet:
+            sheet = spreadsheet.insertSheet("Votes Archive")
+            sheet.appendRow(VOTE_HEADER)
+        return sheet
+
+    def deleteRowRuns(self, sheet, rows):
+        """Deletes rows (ascending) bottom-up in runs of adjacent rows so earlier row numbers stay valid."""
+        end = len(rows) - 1
+        while end >= 0:
+            start = end
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            sheet.deleteRows(rows[start], end - start + 1)
+            end = start - 1
+
+    def compactSessions(self, maxAgeDays=None):
+        lock = self._get_script_lock()
+        try:
+            lock.waitLock(30000)
+            days = maxAgeDays if isinstance(maxAgeDays, (int, float)) else SESSION_ARCHIVE_AFTER_DAYS
+            cutoff = self.clock() - datetime.timedelta(days=days)
+            sheet = self.getSessionSheet()
+            data = sheet.getDataRange().getValues()
+
+            voteSheet = self.getVoteSheet()
+            lastVoteRow = voteSheet.getLastRow()
+            votes = voteSheet.getRange(2, 1, lastVoteRow - 1, 5).getValues() if lastVoteRow > 1 else []
+
+            archived = []
+            archivedRows = []
+            codes = []
+            remaining = set()
+            for i in range(1, len(data)):
+                codes.append(data[i][0])
+                createdAt = data[i][3]
+                # new Date(...) of anything else is NaN, which is never older than the cutoff
+                if data[i][4] is True or not (isinstance(createdAt, datetime.datetime) and createdAt < cutoff):
+                    remaining.add(data[i][0])
+                    continue
+
+                row = list(data[i][:5])
+                try:
+                    sessionData = json.loads(row[2])
+                    if not SESSION_ARCHIVE_KEEP_SCREENSHOTS:
+                        sessionData.pop("screenshots", None)
+                    # The counts are final once the votes after voteRow are in
+                    for vote in votes[max(0, (sessionData.get("voteRow") or 1) - 1):]:
+                        if vote[0] != row[0]:
+                            continue
+                        polls = sessionData.setdefault("polls", {})
+                        polls.setdefault(str(vote[1]), {"A": 0, "B": 0})[vote[2]] += 1
+                    sessionData.pop("voteRow", None)
+                    row[2] = js_json(sessionData)
+                except (ValueError, AttributeError):
+                    pass  # Keep unparseable data as it is
+                archived.append(row)
+                archivedRows.append(i + 1)
+
+            if archived:
+                archiveSheet = self.getSessionArchiveSheet()
+                archiveSheet.getRange(archiveSheet.getLastRow() + 1, 1, len(archived), 5).setValues(archived)
+                self.deleteRowRuns(sheet, archivedRows)
+
+                self._get_script_cache().removeAll([SESSION_ROW_CACHE_PREFIX + code for code in codes])
+
+            # Votes of sessions no longer in the Sessions sheet; keptBefore[n] counts the kept ones among the first n
+            archivedVotes = []
+            archivedVoteRows = []
+            keptBefore = [0]
+            for i, vote in enumerate(votes):
+                keep = vote[0] in remaining
+                if not keep:
+                    archivedVotes.append(vote)
+                    archivedVoteRows.append(i + 2)
+                keptBefore.append(keptBefore[i] + (1 if keep else 0))
+
+            if archivedVotes:
+                voteArchiveSheet = self.getVoteArchiveSheet()
+                voteArchiveSheet.getRange(voteArchiveSheet.getLastRow() + 1, 1, len(archivedVotes), 5).setValues(archivedVotes)
+                self.deleteRowRuns(voteSheet, archivedVoteRows)
+
+                # foldVotes reads the rows after voteRow: point it at the same vote in the shorter log
+                sessions = sheet.getDataRange().getValues()
+                for i in range(1, len(sessions)):
+                    try:
+                        sessionData = json.loads(sessions[i][2])
+                    except (ValueError, TypeError):
+                        continue
+                    oldRow = sessionData.get("voteRow") or 0
+                    if oldRow < 2:
+                        continue
+                    seen = min(oldRow - 1, len(votes))
+                    voteRow = 1 + keptBefore[seen] + (oldRow - 1 - seen)
+                    if voteRow == oldRow:
+                        continue
+                    sessionData["voteRow"] = voteRow
+                    sheet.getRange(i + 1, 3).setValue(js_json(sessionData))
+
+            # Screenshots are appended in time order: delete the leading old ones of ended sessions
+            screenshotsDeleted = 0
+            if not SESSION_ARCHIVE_KEEP_SCREENSHOTS:
+                activeCodes = {row[0] for row in data if row[4] is True}
+                cutoffMs = cutoff.timestamp() * 1000
+                screenshotSheet = self.getScreenshotSheet()
+                lastRow = screenshotSheet.getLastRow()
+                keys = screenshotSheet.getRange(2, 1, lastRow - 1, 4).getValues() if lastRow > 1 else []
+                while (screenshotsDeleted < len(keys) and isinstance(keys[screenshotsDeleted][3], (int, float))
+                       and keys[screenshotsDeleted][3] < cutoffMs and keys[screenshotsDeleted][0] not in activeCodes):
+                    screenshotsDeleted += 1
+                if screenshotsDeleted:
+                    screenshotSheet.deleteRows(2, screenshotsDeleted)
+
+            return {"success": True, "archived": len(archived), "remaining": len(data) - 1 - len(archived),
+                    "votesArchived": len(archivedVotes), "screenshotsDeleted": screenshotsDeleted}
+        except Exception as e:
+            self._log("Error compacting sessions: " + str(e))
+            return {"success": False, "message": "Error compacting sessions: " + str(e)}
+        finally:
+            lock.releaseLock()
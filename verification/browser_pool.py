@@ -0,0 +1,146 @@
+"""
+Shared browser/context pool for the verification scripts.
+
+Launching and tearing down Chromium is the largest fixed cost of a harness run.
+BrowserPool keeps a single browser up for the whole run and hands out a fresh
+BrowserContext per scenario or widget. Pages that can be reused are returned to
+a clean dashboard with reset_page() instead of being reloaded.
+
+The pool times the one launch/teardown and every page load it performs, so a
+run can report how much time reuse saved compared to a launch per scenario.
+Every context it serves gets the local asset cache (asset_cache.py), so CDN
+assets load from disk once they have been fetched.
+
+Usage:
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        with pool.context(viewport={"width": 1280, "height": 720}) as context:
+            page = context.new_page()
+            pool.load(page, URL_FILE)
+        print(format_report(pool.stats()))
+"""
+
+import time
+from contextlib import contextmanager
+from asset_cache import AssetCache
+
+# Closes every widget and rewinds the ID counter so the next spawnWidget()
+# gets widget-1 again, exactly as on a freshly loaded page.
+RESET_DASHBOARD_JS = """
+    () => {
+        widgets.slice().forEach(w => closeWidget(w.id));
+        document.querySelectorAll('#app-container .widget').forEach(el => el.remove());
+        widgets = [];
+        nextId = 1;
+        polls = {};
+        currentDashboardName = null;
+        setBg('bg-slate-900');
+        ['bg-menu', 'dashboards-menu', 'record-menu', 'session-menu'].forEach(id => {
+            const menu = document.getElementById(id);
+            if (menu) menu.classList.add('hidden');
+        });
+    }
+"""
+
+class BrowserPool:
+    """Keeps one Chromium process alive and serves fresh contexts from it."""
+
+    def __init__(self, playwright, headless=True, assets=None, **launch_options):
+        self.playwright = playwright
+        self.launch_options = dict(headless=headless, **launch_options)
+        self.assets = assets if assets is not None else AssetCache()
+        self.browser = None
+        self.launches = 0
+        self.launch_seconds = 0.0
+        self.close_seconds = 0.0
+        self.contexts_served = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.resets = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_browser(self):
+        """Returns the shared browser, relaunching it if it crashed."""
+        if self.browser is None or not self.browser.is_connected():
+            start = time.monotonic()
+            self.browser = self.playwright.chromium.launch(**self.launch_options)
+            self.launch_seconds += time.monotonic() - start
+            self.launches += 1
+        return self.browser
+
+    @contextmanager
+    def context(self, **context_options):
+        """Yields a fresh BrowserContext on the shared browser and closes it afterwards."""
+        context = self.get_browser().new_context(**context_options)
+        self.assets.install(context)
+        self.contexts_served += 1
+        try:
+            yield context
+        finally:
+            context.close()
+
+    def load(self, page, url):
+        """Navigates to url, timing the load."""
+        start = time.monotonic()
+        page.goto(url)
+        self.load_seconds += time.monotonic() - start
+        self.loads += 1
+
+    def reset_page(self, page):
+        """Returns an already loaded dashboard page to a clean state without reloading it."""
+        page.evaluate(RESET_DASHBOARD_JS)
+        self.resets += 1
+
+    def close(self):
+        if self.browser is not None:
+            start = time.monotonic()
+            self.browser.close()
+            self.close_seconds += time.monotonic() - start
+            self.browser = None
+
+    def stats(self):
+        """Returns the pool's counters as a plain (picklable) dict."""
+        return {
+            "launches": self.launches,
+            "launch_seconds": self.launch_seconds,
+            "close_seconds": self.close_seconds,
+            "contexts_served": self.contexts_served,
+            "loads": self.loads,
+            "load_seconds": self.load_seconds,
+            "resets": self.resets,
+            **self.assets.stats(),
+        }
+
+def saved_seconds(stats):
+    """Estimates the time saved versus one browser launch per context and one page load per reset."""
+    saved = 0.0
+    if stats["launches"]:
+        cycle = (stats["launch_seconds"] + stats["close_seconds"]) / stats["launches"]
+        saved += cycle * max(0, stats["contexts_served"] - stats["launches"])
+    if stats["loads"]:
+        saved += stats["load_seconds"] / stats["loads"] * stats["resets"]
+    return saved
+
+def merge_stats(all_stats):
+    """Sums the stats dicts of several pools (e.g. one per worker process)."""
+    merged = {}
+    for stats in all_stats:
+        for key, value in stats.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+def format_report(stats):
+    """One-line summary of browser reuse for the end of a run."""
+    report = (
+        f"Browser pool: {stats['launches']} launch(es) served {stats['contexts_served']} context(s), "
+        f"{stats['resets']} page reset(s) instead of reloads; "
+        f"~{saved_seconds(stats):.1f}s of launch/teardown/load time saved."
+    )
+    if stats["loads"]:
+        report += (f" {stats['loads']} page load(s) averaging {stats['load_seconds'] / stats['loads']:.2f}s, "
+                   f"{stats.get('asset_hits', 0)} asset(s) served from the local cache.")
+    return report
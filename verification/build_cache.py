@@ -0,0 +1,108 @@
+"""
+Content-addressed incremental build cache for generated screenshots and videos.
+
+Each artifact (e.g. onboarding-video/public/clock_comparison.png or
+videos/clock.webm) is keyed on a hash of everything that can change its
+pixels: index.html, the backend emulator and shim, the source of the code that drives the
+page and the viewport/recording settings. The keys are stored in a manifest
+and an artifact is only re-rendered when its key changed or the file is gone.
+
+Usage:
+    cache = BuildCache(force=args.force)
+    key = artifact_key(INDEX_HTML, *BACKEND_SOURCES, scenario_fn, {"viewport": [1280, 720]})
+    if not cache.is_fresh(path, key):
+        render(path)
+        cache.record(path, key)
+"""
+
+import os
+import json
+import time
+import inspect
+import hashlib
+
+MANIFEST_PATH = ".build-cache/manifest.json"
+INDEX_HTML = "index.html"
+
+def file_digest(path):
+    """sha256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def artifact_key(*parts):
+    """Hashes the inputs of an artifact into a single key.
+
+    Parts may be paths of existing files (hashed by content), functions or
+    classes (hashed by source), bytes, strings or JSON-serializable settings.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str) and os.path.isfile(part):
+            data = file_digest(part).encode()
+        elif inspect.isfunction(part) or inspect.isclass(part):
+            data = inspect.getsource(part).encode()
+        elif isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode()
+        else:
+            data = json.dumps(part, sort_keys=True).encode()
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+class BuildCache:
+    """Manifest of artifact path -> key of the inputs it was last rendered from."""
+
+    def __init__(self, path=MANIFEST_PATH, force=False):
+        self.path = path
+        self.force = force
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable build manifest {path}: {e}")
+
+    def is_fresh(self, artifact, key):
+        """True if artifact exists and was rendered from exactly these inputs."""
+        if self.force:
+            return False
+        entry = self.entries.get(artifact)
+        return bool(entry) and entry["key"] == key and os.path.exists(artifact)
+
+    def record(self, artifact, key):
+        """Stores the key of a freshly rendered artifact and saves the manifest."""
+        self.entries[artifact] = {"key": key, "rendered_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def select_stale(cache, names, keys, artifact_for, explicit, only_stale):
+    """Picks which of `names` to render.
+
+    Without explicit names only stale artifacts are rendered. Explicitly named
+    artifacts are always rendered unless only_stale is set. cache.force makes
+    every artifact stale.
+    """
+    if explicit and not only_stale:
+        return list(names), []
+    stale, fresh = [], []
+    for name in names:
+        (fresh if cache.is_fresh(artifact_for(name), keys[name]) else stale).append(name)
+    return stale, fresh
+
+def add_cache_arguments(parser):
+    """Adds the shared --force/--only-stale flags."""
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render every selected artifact even if its inputs are unchanged")
+    parser.add_argument("--only-stale", action="store_true",
+                        help="Skip up-to-date artifacts even when they are named explicitly")
@@ -0,0 +1,143 @@
+"""
+Precompiles the Tailwind CSS index.html uses into tailwind.html.
+
+index.html used to style itself with the Tailwind Play CDN, which scans the
+DOM and compiles CSS in the browser on every load and again whenever a widget
+with new classes is spawned. This build runs that same compiler once,
+headless: every candidate class token in index.html (markup, the widget
+<template>s and the class strings in its scripts, getWidgetConfig and setBg
+included) is put on one hidden element of a blank page that loads the
+Tailwind runtime, and the stylesheet it generates is minified and written to
+tailwind.html as <style id="tailwind-css">.
+
+doGet() renders index.html as a template, so <?!= include('tailwind') ?>
+inlines that stylesheet. When tailwind.html is missing (or the page is opened
+straight from disk, as the verification scripts do) index.html falls back to
+the runtime CDN, and warns in the console when that happens in a deployed
+page.
+
+tailwind.html is committed. Rebuild it and commit the result whenever
+index.html's classes change, and check it before every clasp push (see
+README.md); --check fails when the committed file doesn't match index.html:
+
+    python verification/asset_cache.py        # once, optional: build offline
+    python verification/build_tailwind.py [--check]
+
+Usage: python verification/build_tailwind.py [--output tailwind.html] [--check]
+"""
+
+import os
+import re
+import sys
+import argparse
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+
+INDEX_HTML = "index.html"
+OUTPUT_HTML = "tailwind.html"
+TAILWIND_CDN = "https://cdn.tailwindcss.com"
+STYLE_ID = "tailwind-css"
+
+# Tailwind's default extractor, roughly: runs of class-name characters, arbitrary values included
+CANDIDATE_RE = re.compile(r"[A-Za-z0-9_\-:/.\[\]#%!(),@&>+~=*]+")
+CANDIDATE_FILTER_RE = re.compile(r"^-?!?[a-z@\[]")
+INCLUDE_RE = re.compile(r"<\?!=\s*include\(['\"]([\w.-]+)['\"]\)\s*\?>")
+
+BUILD_PAGE = """<!DOCTYPE html>
+<html><head><script src="%s"></script></head>
+<body><div id="candidates" hidden></div></body></html>
+""" % TAILWIND_CDN
+
+# Puts the candidates on the page, then waits until Tailwind's generated stylesheet stops changing
+COMPILE_JS = """
+async (classes) => {
+    document.getElementById('candidates').className = classes.join(' ');
+    const generated = () => [...document.querySelectorAll('style')]
+        .map(s => s.textContent).filter(css => css.includes('--tw-')).join('\\n');
+    let last = '', stable = 0;
+    while (stable < 5) {
+        await new Promise(resolve => setTimeout(resolve, 100));
+        const css = generated();
+        stable = css && css === last ? stable + 1 : 0;
+        last = css;
+    }
+    return last;
+}
+"""
+
+def candidate_classes(html):
+    """Every token of index.html that could be a Tailwind class; the compiler ignores the rest."""
+    tokens = set()
+    for token in CANDIDATE_RE.findall(html):
+        token = token.strip(".,:()")
+        if 1 < len(token) < 120 and CANDIDATE_FILTER_RE.match(token):
+            tokens.add(token)
+    return sorted(tokens)
+
+def minify_css(css):
+    """Drops comments and the whitespace the browser doesn't need."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{},])\s*", r"\1", css)
+    css = re.sub(r";\s*", ";", css)
+    # Tailwind's empty custom properties ("--tw-pan-x: ;") keep their space
+    css = re.sub(r":\s+(?=[^;\s])", ":", css)
+    css = re.sub(r"(\S);}", r"\1}", css)
+    return css.strip()
+
+def compile_css(pool, classes):
+    """Tailwind's stylesheet for `classes`, generated by the CDN runtime in a blank page."""
+    with pool.context() as context:
+        page = context.new_page()
+        page.set_content(BUILD_PAGE, wait_until="load")
+        page.wait_for_function("typeof tailwind !== 'undefined'")
+        return page.evaluate(COMPILE_JS, classes)
+
+def stylesheet_html(css):
+    return f'<style id="{STYLE_ID}">{css}</style>\n'
+
+def resolve_includes(html, root="."):
+    """index.html as doGet() serves it: <?!= include('name') ?> replaced by name.html ('' if missing)."""
+    def include(match):
+        path = os.path.join(root, match.group(1) + ".html")
+        if not os.path.exists(path):
+            return ""
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return INCLUDE_RE.sub(include, html)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompile the Tailwind CSS of index.html into tailwind.html.")
+    parser.add_argument("--output", default=OUTPUT_HTML, help="Stylesheet file to write (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="Don't write; exit with an error if the output is missing or out of date")
+    args = parser.parse_args()
+
+    if not os.path.exists(INDEX_HTML):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    with open(INDEX_HTML, encoding="utf-8") as f:
+        classes = candidate_classes(f.read())
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        css = compile_css(pool, classes)
+    if not css:
+        print("Error: the Tailwind runtime generated no CSS.")
+        sys.exit(1)
+    output = stylesheet_html(minify_css(css))
+
+    if args.check:
+        current = open(args.output, encoding="utf-8").read() if os.path.exists(args.output) else None
+        if current != output:
+            print(f"{args.output} is out of date; run python verification/build_tailwind.py")
+            sys.exit(1)
+        print(f"{args.output} is up to date.")
+        return
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(output)
+    print(f"Wrote {args.output}: {len(output) / 1024:.1f} KB of CSS from {len(classes)} candidate classes "
+          f"({len(css) / 1024:.1f} KB before minifying).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cost of a student screenshot (captureScreenshot) on slow devices.
+
+Loads index.html, fills the dashboard with 1, 10 and 40 widgets and times
+captureScreenshot() under several SCREENSHOT_CONFIG settings and CPU
+throttling rates (Chrome DevTools' Emulation.setCPUThrottlingRate, 4x-6x is
+close to a low-end Chromebook). For each combination it reports the median of
+--runs captures:
+
+- capture ms: html2canvas rendering plus JPEG/thumbnail encoding;
+- blocking ms: main-thread time beyond 50 ms per long task (Total Blocking
+  Time), i.e. how long the page is frozen for the student;
+- longest ms: the longest single task;
+- KB: base64 size of the image plus thumbnail sent to the server.
+
+Usage: python verification/capture_bench.py [--widgets 1,10,40] [--cpu 1,4,6]
+       [--configs previous,default,low,widgets] [--runs 3]
+"""
+
+import os
+import sys
+import argparse
+import statistics
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1366, "height": 768}  # Common Chromebook screen
+
+# Widgets that render without camera, microphone or network access
+WIDGET_TYPES = ["clock", "timer", "traffic", "text", "checklist", "timetable", "random", "dice", "poll", "drawing"]
+
+# SCREENSHOT_CONFIG overrides; "previous" is the capture before the settings existed
+CONFIGS = {
+    "previous": {"scale": 0.5, "maxDimension": 100000, "quality": 0.6, "region": "page"},
+    "default": {},
+    "low": {"scale": 0.35, "maxDimension": 640, "quality": 0.5},
+    "widgets": {"region": "widgets"},
+}
+
+# Spreads the widgets over the screen in a grid of small tiles
+FILL_JS = """
+([types, count]) => {
+    for (let i = 0; i < count; i++) spawnWidget(types[i % types.length]);
+    const cols = Math.ceil(Math.sqrt(count));
+    const tileW = Math.floor(window.innerWidth / cols), tileH = Math.floor((window.innerHeight - 80) / cols);
+    widgets.forEach((w, i) => {
+        w.el.style.left = (i % cols) * tileW + 'px';
+        w.el.style.top = Math.floor(i / cols) * tileH + 'px';
+        if (count > 1) {
+            w.el.style.width = Math.max(120, tileW - 8) + 'px';
+            w.el.style.height = Math.max(100, tileH - 8) + 'px';
+        }
+    });
+}
+"""
+
+MEASURE_JS = """
+async (config) => {
+    const tasks = [];
+    const observer = new PerformanceObserver(list => list.getEntries().forEach(e => tasks.push(e.duration)));
+    observer.observe({ type: 'longtask' });
+    const start = performance.now();
+    const shot = await captureScreenshot(config);
+    const ms = performance.now() - start;
+    await new Promise(resolve => requestAnimationFrame(() => setTimeout(resolve, 0)));
+    observer.takeRecords().forEach(e => tasks.push(e.duration));
+    observer.disconnect();
+    return {
+        ms: ms,
+        blocking: tasks.reduce((sum, d) => sum + Math.max(0, d - 50), 0),
+        longest: Math.max(0, ...tasks),
+        bytes: shot.imageData.length + shot.thumbnailData.length
+    };
+}
+"""
+
+def parse_list(text, cast=str):
+    return [cast(item) for item in text.split(",") if item]
+
+def measure(page, config, runs):
+    """Median capture ms, blocking ms, longest task ms and payload bytes over `runs` captures."""
+    samples = [page.evaluate(MEASURE_JS, config) for _ in range(runs)]
+    return {key: statistics.median(s[key] for s in samples) for key in ("ms", "blocking", "longest", "bytes")}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark student screenshot capture on throttled CPUs.")
+    parser.add_argument("--widgets", default="1,10,40", help="Widget counts (default: %(default)s)")
+    parser.add_argument("--cpu", default="1,4,6", help="CPU slowdown factors (default: %(default)s)")
+    parser.add_argument("--configs", default=",".join(CONFIGS),
+                        help=f"Capture settings from {', '.join(CONFIGS)} (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=3, help="Captures per combination (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    configs = parse_list(args.configs)
+    unknown = [c for c in configs if c not in CONFIGS]
+    if unknown:
+        parser.error(f"unknown config(s): {', '.join(unknown)}")
+
+    print(f"{'CPU':>4} {'Widgets':>8} {'Config':<9} {'Capture ms':>11} {'Blocking ms':>12} "
+          f"{'Longest ms':>11} {'KB':>7}")
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        for count in parse_list(args.widgets, int):
+            with pool.context(viewport=VIEWPORT) as context:
+                install_backend(context, Backend())
+                page = context.new_page()
+                pool.load(page, URL_FILE)
+                page.wait_for_function("typeof html2canvas !== 'undefined'")
+                page.evaluate(FILL_JS, [WIDGET_TYPES, count])
+                cdp = context.new_cdp_session(page)
+                for rate in parse_list(args.cpu, float):
+                    cdp.send("Emulation.setCPUThrottlingRate", {"rate": rate})
+                    for name in configs:
+                        r = measure(page, CONFIGS[name], args.runs)
+                        print(f"{rate:>3g}x {count:>8} {name:<9} {r['ms']:>11.0f} {r['blocking']:>12.0f} "
+                              f"{r['longest']:>11.0f} {r['bytes'] / 1024:>7.1f}")
+                cdp.send("Emulation.setCPUThrottlingRate", {"rate": 1})
+
+if __name__ == "__main__":
+    main()
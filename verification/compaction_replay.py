@@ -0,0 +1,109 @@
+"""
+Replays a CSV export of the Sessions sheet through compactSessions.
+
+Loads the export (File > Download > CSV of the Sessions tab) into the Code.js
+emulator, runs the same compaction the nightly trigger runs, and prints the
+live sheet before and after: rows, size, and the projected Apps Script time
+of the reads that grow with it:
+
+- cold lookup: getSessionData when findSessionRow's cached row is missing
+  (it then scans the code and active columns);
+- full read: one getDataRange().getValues() of the sheet, which the
+  compaction job itself and any export pay.
+
+Projections use backend_emulator.CostModel; calibrate it before trusting
+absolute numbers.
+
+Usage: python verification/compaction_replay.py sessions.csv [--max-age-days 7]
+       [--now 2026-10-16T08:00:00]
+"""
+
+import csv
+import sys
+import datetime
+import argparse
+from backend_emulator import Backend, CallStats, CostModel, SESSION_ARCHIVE_AFTER_DAYS
+
+DATE_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y", "%Y-%m-%d %H:%M:%S")
+
+def parse_date(text):
+    """A Created At cell as exported by Sheets; unparseable text is kept as is."""
+    text = text.strip()
+    try:
+        return datetime.datetime.fromisoformat(text.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return text
+
+def load_csv(path):
+    """Sessions rows (without the header) with typed Created At and Active cells."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if rows and rows[0] and rows[0][0] == "Session Code":
+        rows = rows[1:]
+    return [[r[0], r[1], r[2], parse_date(r[3]), r[4].strip().upper() == "TRUE"]
+            for r in rows if len(r) >= 5]
+
+def sheet_size(sheet):
+    """(data rows, bytes) of a sheet, header excluded."""
+    rows = sheet.rows[1:]
+    return len(rows), sum(len(str(v)) for row in rows for v in row)
+
+def measure(backend, cost):
+    """Size and projected read costs of the live Sessions sheet."""
+    sheet = backend.getSessionSheet()
+    rows, size = sheet_size(sheet)
+
+    lookup_ms = 0.0
+    if rows:
+        backend.script_cache.clear()
+        backend.call("getSessionData", [sheet.rows[-1][0]], "student@example.com")
+        lookup_ms = cost.estimate(backend.calls[-1])
+
+    full_read = CallStats().as_dict()
+    full_read.update(opens=1, reads=1, cells_read=(rows + 1) * 5, bytes_read=size)
+    return {"rows": rows, "bytes": size, "lookup_ms": lookup_ms, "full_read_ms": cost.estimate(full_read)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Show what compactSessions would do to a Sessions sheet export.")
+    parser.add_argument("csv", help="CSV export of the Sessions sheet")
+    parser.add_argument("--max-age-days", type=float, default=SESSION_ARCHIVE_AFTER_DAYS,
+                        help="Archive ended sessions older than this (default: %(default)s)")
+    parser.add_argument("--now", help="Time the job runs at, ISO format (default: newest Created At in the export)")
+    args = parser.parse_args()
+
+    rows = load_csv(args.csv)
+    if not rows:
+        print(f"Error: no session rows in {args.csv}.")
+        sys.exit(1)
+    dates = [r[3] for r in rows if isinstance(r[3], datetime.datetime)]
+    now = datetime.datetime.fromisoformat(args.now) if args.now else max(dates, default=datetime.datetime.now())
+
+    backend = Backend(clock=lambda: now)
+    sheet = backend.getSessionSheet()
+    for row in rows:
+        sheet.appendRow(row)
+
+    cost = CostModel()
+    before = measure(backend, cost)
+    result = backend.call("compactSessions", [args.max_age_days])
+    if not result["success"]:
+        print(f"Error: {result['message']}")
+        sys.exit(1)
+    after = measure(backend, cost)
+    archive_rows, archive_bytes = sheet_size(backend.getSessionArchiveSheet())
+
+    print(f"Compaction at {now:%Y-%m-%d %H:%M} of ended sessions older than {args.max_age_days:g} days")
+    print(f"{'':<8} {'Rows':>8} {'MB':>9} {'Cold lookup ms':>15} {'Full read ms':>13}")
+    for label, m in (("before", before), ("after", after)):
+        print(f"{label:<8} {m['rows']:>8} {m['bytes'] / 1e6:>9.2f} {m['lookup_ms']:>15.0f} {m['full_read_ms']:>13.0f}")
+    print(f"Archived {result['archived']} sessions ({archive_bytes / 1e6:.2f} MB in Sessions Archive, "
+          f"{archive_rows} rows), {result['remaining']} remain live.")
+
+if __name__ == "__main__":
+    main()
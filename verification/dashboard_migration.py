@@ -0,0 +1,231 @@
+"""
+Replays the move from one dashboards blob per user to one row per dashboard.
+
+Before, every user had one row in the Dashboards sheet holding a JSON map of
+all their dashboards: listing them read the whole sheet (getDataRange) and
+every save rewrote the whole map. Code.js now keeps one row per dashboard in
+Saved Dashboards and migrates a user's legacy row the first time their
+dashboards are accessed (migrateLegacyDashboards).
+
+This tool loads legacy rows into the Code.js emulator, either a CSV export of
+the Dashboards sheet (File > Download > CSV of the Dashboards tab) or a
+synthetic school of --teachers teachers plus one teacher with each of
+--boards saved boards, migrates every user and checks that getDashboards
+returns exactly the dashboards of their legacy row. Synthetic users also have
+boards named "001", "3/4" and "=x", which Sheets would turn into a number, a
+date and a formula; the measured teacher opens each of them, saves it grown
+past a new sheet's 26 columns, renames and deletes it. It then compares, per
+teacher, the projected Apps Script time of:
+
+- list: before, getDashboards (the whole sheet, every dashboard in full);
+  after, listDashboards (the metadata columns only);
+- open: after, getDashboard of one board (before, the list had them all);
+- save: before, saveDashboard rewriting the whole map; after, one row;
+- migrate: the first call after the change, which moves the legacy row.
+
+Projections use backend_emulator.CostModel; calibrate it before trusting
+absolute numbers. --write stores the migrated Saved Dashboards rows as CSV
+(before any of the measured saves), ready to import instead of migrating
+lazily.
+
+Usage: python verification/dashboard_migration.py [dashboards.csv] [--boards 10,50,100,200]
+       [--teachers 30] [--write saved_dashboards.csv]
+"""
+
+import csv
+import sys
+import json
+import random
+import datetime
+import argparse
+from backend_emulator import (Backend, CallStats, CostModel, DASHBOARD_HEADER, LEGACY_DASHBOARD_HEADER,
+                              DASHBOARD_CHUNK_CHARS, js_json)
+from compaction_replay import parse_date
+
+TARGET_USER = "teacher-{}@example.com"
+WIDGET_TYPES = ["clock", "timer", "traffic", "text", "checklist", "timetable", "random", "dice", "poll", "drawing"]
+BACKGROUND_BOARDS = (1, 10)
+# Names Sheets would turn into a number, a date and a formula if they were written as is
+TRICKY_NAMES = ["001", "3/4", "=x"]
+# Chunks of the board the name check saves; more than fit in a new sheet's 26 columns
+LARGE_BOARD_CHUNKS = 25
+
+def synthetic_dashboard(rng, widgets):
+    """A saved dashboard as saveDashboard() in index.html builds it."""
+    return {
+        "bg": "h-screen w-screen overflow-hidden transition-colors duration-500 bg-slate-900",
+        "widgets": [{
+            "id": i + 1,
+            "type": rng.choice(WIDGET_TYPES),
+            "x": rng.randrange(0, 1600, 40), "y": rng.randrange(0, 900, 40),
+            "w": 320, "h": 240, "z": str(10 + i),
+            "minimized": False, "settings": False,
+            "data": {"text": "".join(rng.choice("abcdefghij klmnop") for _ in range(rng.randint(50, 1500)))},
+        } for i in range(widgets)],
+        "polls": {},
+    }
+
+def synthetic_user(rng, boards):
+    dashboards = {f"Board {i + 1}": synthetic_dashboard(rng, rng.randint(2, 12)) for i in range(boards)}
+    dashboards.update((name, synthetic_dashboard(rng, 2)) for name in TRICKY_NAMES)
+    return dashboards
+
+def load_csv(path):
+    """Legacy Dashboards rows (without the header) with typed Last Saved cells."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if rows and rows[0] and rows[0][0] == "User Email":
+        rows = rows[1:]
+    return [[r[0], r[1], parse_date(r[2]) if len(r) > 2 else ""] for r in rows if len(r) >= 2 and r[0]]
+
+def legacy_stats(sheet, user):
+    """Sheet traffic of the old getDashboards and saveDashboard of `user` (one full read; saving adds the map)."""
+    size = sum(len(str(v)) for row in sheet.rows for v in row)
+    read = CallStats().as_dict()
+    read.update(opens=1, reads=1, cells_read=len(sheet.rows) * 3, bytes_read=size)
+    blob = next((len(str(row[1])) for row in sheet.rows[1:] if row[0] == user), 0)
+    save = dict(read, writes=2, cells_written=2, bytes_written=blob + 24)
+    return read, save
+
+def migrate(backend, users, cost):
+    """Migrates every user of the legacy sheet; returns per-user costs and the users whose data changed."""
+    legacy = backend.spreadsheet.getSheetByName("Dashboards")
+    before = {}
+    for user in users:
+        found = backend.getUserData(legacy, user)
+        list_stats, save_stats = legacy_stats(legacy, user)
+        before[user] = {"dashboards": json.loads(js_json(found["dashboards"])),
+                        "list_ms": cost.estimate(list_stats), "save_ms": cost.estimate(save_stats)}
+
+    results, mismatched = [], []
+    for user in users:
+        backend.call("listDashboards", [], user)
+        migrate_ms = cost.estimate(backend.calls[-1])
+        migrated = json.loads(backend.call("getDashboards", [], user))
+        if migrated != before[user]["dashboards"]:
+            mismatched.append(user)
+        results.append({"user": user, "boards": len(migrated), "migrate_ms": migrate_ms,
+                        "before_list_ms": before[user]["list_ms"], "before_save_ms": before[user]["save_ms"]})
+    return results, mismatched
+
+def measure(backend, results, cost):
+    """Adds the list, open and save costs after migration to each user's results (saving changes one board)."""
+    for r in results:
+        user = r["user"]
+        listed = backend.call("listDashboards", [], user)["dashboards"]
+        r["list_ms"] = cost.estimate(backend.calls[-1])
+        r["list_kb"] = backend.calls[-1]["bytes_read"] / 1024
+        if not listed:
+            r.update(open_ms=None, save_ms=None)
+            continue
+        name = listed[len(listed) // 2]["name"]
+        board = backend.call("getDashboard", [name], user)["data"]
+        r["open_ms"] = cost.estimate(backend.calls[-1])
+        board.setdefault("widgets", []).append({"id": 9999, "type": "clock", "x": 0, "y": 0, "data": {}})
+        backend.call("saveDashboard", [name, js_json(board)], user)
+        r["save_ms"] = cost.estimate(backend.calls[-1])
+
+def check_names(backend, user):
+    """Opens, saves (growing past the sheet's width), renames and deletes TRICKY_NAMES; returns what failed."""
+    failures = []
+    for name in TRICKY_NAMES:
+        count = len(backend.call("listDashboards", [], user)["dashboards"])
+        opened = backend.call("getDashboard", [name], user)
+        if not opened["success"]:
+            failures.append(f"open {name!r}: {opened['message']}")
+            continue
+        board = opened["data"]
+        board["widgets"][0]["data"]["text"] = "x" * (LARGE_BOARD_CHUNKS * DASHBOARD_CHUNK_CHARS)
+        saved = backend.call("saveDashboard", [name, js_json(board)], user)
+        if not saved["success"]:
+            failures.append(f"save {name!r}: {saved['message']}")
+        elif len(backend.call("listDashboards", [], user)["dashboards"]) != count:
+            failures.append(f"save {name!r} added a row instead of updating it")
+        renamed = backend.call("renameDashboard", [name, name + "0"], user)
+        deleted = backend.call("deleteDashboard", [name + "0"], user)
+        if not renamed["success"] or not deleted["success"]:
+            failures.append(f"rename/delete {name!r}: {renamed['message']} / {deleted['message']}")
+    return failures
+
+def write_csv(backend, path):
+    sheet = backend.getSheet()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(DASHBOARD_HEADER)
+        for row in sheet.rows[1:]:
+            writer.writerow([v.isoformat(sep=" ", timespec="seconds") if isinstance(v, datetime.datetime) else v
+                             for v in row])
+    print(f"Wrote {len(sheet.rows) - 1} Saved Dashboards rows to {path}")
+
+def print_table(results):
+    print(f"{'Boards':>6} {'Migrate ms':>11} {'List ms before':>15} {'after':>7} {'List KB':>8} "
+          f"{'Open ms':>8} {'Save ms before':>15} {'after':>7}")
+    for r in results:
+        open_ms = "-" if r["open_ms"] is None else f"{r['open_ms']:.0f}"
+        save_ms = "-" if r["save_ms"] is None else f"{r['save_ms']:.0f}"
+        print(f"{r['boards']:>6} {r['migrate_ms']:>11.0f} {r['before_list_ms']:>15.0f} {r['list_ms']:>7.0f} "
+              f"{r['list_kb']:>8.1f} {open_ms:>8} {r['before_save_ms']:>15.0f} {save_ms:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate legacy dashboard blobs to per-dashboard rows and compare costs.")
+    parser.add_argument("csv", nargs="?", help="CSV export of the legacy Dashboards sheet (default: synthetic data)")
+    parser.add_argument("--boards", default="10,50,100,200",
+                        help="Saved boards of the measured teacher, synthetic data only (default: %(default)s)")
+    parser.add_argument("--teachers", type=int, default=30,
+                        help="Other teachers in the sheet, synthetic data only (default: %(default)s)")
+    parser.add_argument("--largest", type=int, default=10,
+                        help="Users to show for a CSV export, most boards first (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    parser.add_argument("--write", help="Write the migrated Saved Dashboards sheet to this CSV file")
+    args = parser.parse_args()
+
+    cost = CostModel()
+    mismatched, name_failures = [], []
+    if args.csv:
+        rows = load_csv(args.csv)
+        if not rows:
+            print(f"Error: no dashboard rows in {args.csv}.")
+            sys.exit(1)
+        backend = Backend()
+        legacy = backend.spreadsheet.insertSheet("Dashboards")
+        legacy.appendRow(LEGACY_DASHBOARD_HEADER)
+        for row in rows:
+            legacy.appendRow(row)
+        results, mismatched = migrate(backend, [r[0] for r in rows], cost)
+        if args.write:
+            write_csv(backend, args.write)
+        measure(backend, results, cost)
+        print(f"Migrated {len(results)} users, {sum(r['boards'] for r in results)} dashboards from {args.csv}")
+        print_table(sorted(results, key=lambda r: -r["boards"])[:args.largest])
+    else:
+        rng = random.Random(args.seed)
+        print(f"Synthetic sheet: one measured teacher plus {args.teachers} others with "
+              f"{BACKGROUND_BOARDS[0]}-{BACKGROUND_BOARDS[1]} boards each")
+        measured = []
+        for boards in (int(b) for b in args.boards.split(",") if b.strip()):
+            backend = Backend(seed=args.seed)
+            users = [TARGET_USER.format(i) for i in range(args.teachers)]
+            for user in users:
+                backend.seed_legacy_dashboards(user, synthetic_user(rng, rng.randint(*BACKGROUND_BOARDS)))
+            target = TARGET_USER.format("measured")
+            backend.seed_legacy_dashboards(target, synthetic_user(rng, boards))
+            results, bad = migrate(backend, users + [target], cost)
+            mismatched += bad
+            if args.write:
+                write_csv(backend, args.write)
+            measure(backend, results[-1:], cost)
+            measured.append(results[-1])
+            name_failures += check_names(backend, target)
+        print_table(measured)
+
+    if mismatched:
+        print(f"FAIL: migrated dashboards differ from the legacy data for {len(mismatched)} user(s): "
+              f"{', '.join(mismatched[:5])}")
+        sys.exit(1)
+    if name_failures:
+        print(f"FAIL: {len(name_failures)} name check(s) failed: {'; '.join(name_failures[:5])}")
+        sys.exit(1)
+    print("OK: every user's migrated dashboards match their legacy row.")
+
+if __name__ == "__main__":
+    main()
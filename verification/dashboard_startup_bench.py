@@ -0,0 +1,136 @@
+"""
+Time to first widget painted at page startup, with and without the local
+dashboard cache.
+
+A teacher with --boards saved dashboards (the measured one, Default, holding
+--widgets widgets) loads index.html with every google.script.run reply held
+back by --latency ms (1-3 s is common on Apps Script). Each run uses a fresh
+browser context and measures one of:
+
+- cold: first visit, empty localStorage; the board waits for listDashboards
+  and then getDashboard;
+- warm: a reload after a visit that filled the cache; the board is drawn from
+  localStorage and listDashboards only confirms its version;
+- stale: like warm, but the dashboard was saved elsewhere in between (one
+  widget more); the cached copy is drawn first and then replaced.
+
+first paint ms is the frame after the first .widget element is added (a
+MutationObserver installed before the page loads, plus two animation
+frames); settled ms is when the board last changed, read once the page has
+settled (settle.py: no google.script.run call left in flight). After every run the page
+must show the server's current version of the board (its widget count), or
+the run counts as wrong.
+
+Usage: python verification/dashboard_startup_bench.py [--latency 1500] [--runs 5]
+       [--widgets 8] [--boards 20] [--cpu 1]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+from settle import Settler
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1366, "height": 768}
+USER = "teacher@example.com"
+BOARD_TYPES = ["clock", "text", "checklist", "timetable", "traffic", "random", "dice", "poll"]
+
+# Notes when the first widget, and the last change to the board, reach the screen
+PAINT_PROBE_JS = """
+window.__firstWidgetPaint = null;
+window.__lastBoardChange = null;
+new MutationObserver(records => {
+    const widgetAdded = records.some(r => [...r.addedNodes].some(n => n.classList && n.classList.contains('widget')));
+    const boardChanged = widgetAdded || records.some(r => [...r.removedNodes].some(n => n.classList && n.classList.contains('widget')));
+    if (!boardChanged) return;
+    requestAnimationFrame(() => requestAnimationFrame(() => {
+        const now = performance.now();
+        if (widgetAdded && window.__firstWidgetPaint === null) window.__firstWidgetPaint = now;
+        window.__lastBoardChange = now;
+    }));
+}).observe(document, { childList: true, subtree: true });
+"""
+
+def board(widgets):
+    """A saved dashboard of `widgets` widgets, as index.html saves it."""
+    return {
+        "bg": "h-screen w-screen overflow-hidden transition-colors duration-500 bg-slate-900",
+        "widgets": [{
+            "id": i + 1, "type": BOARD_TYPES[i % len(BOARD_TYPES)],
+            "x": 40 + (i % 4) * 320, "y": 40 + (i // 4) * 280, "w": 300, "h": 240, "z": str(10 + i),
+            "minimized": False, "settings": False, "data": {},
+        } for i in range(widgets)],
+        "polls": {},
+    }
+
+def run_once(pool, settler, variant, latency_ms, widgets, boards, cpu_rate):
+    """(first paint ms, settled ms, correct) of one startup."""
+    backend = Backend()
+    saved = {"Default": board(widgets)}
+    saved.update({f"Board {i}": board(2 + i % 6) for i in range(1, boards)})
+    backend.seed_dashboards(USER, saved)
+    expected = widgets
+
+    with pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, backend, user=USER, latency_ms=latency_ms)
+        settler.install(context)
+        context.add_init_script(PAINT_PROBE_JS)
+        page = context.new_page()
+        settle_ms = 3 * latency_ms + 1000
+        if variant != "cold":
+            # The visit that fills the cache
+            pool.load(page, URL_FILE)
+            page.wait_for_function("widgets.length > 0")
+            settler.wait(page, "fill cache", timeout_ms=settle_ms)
+            if variant == "stale":
+                expected = widgets + 1
+                backend.call("saveDashboard", ["Default", json.dumps(board(expected))], USER)
+
+        cdp = context.new_cdp_session(page)
+        cdp.send("Emulation.setCPUThrottlingRate", {"rate": cpu_rate})
+        pool.load(page, URL_FILE)
+        page.wait_for_function("window.__firstWidgetPaint !== null", timeout=settle_ms + 30000)
+        settler.wait(page, variant, timeout_ms=settle_ms)
+        first, settled, shown = page.evaluate("[window.__firstWidgetPaint, window.__lastBoardChange, widgets.length]")
+        return first, settled, shown == expected
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first widget painted with and without the dashboard cache.")
+    parser.add_argument("--latency", type=float, default=1500,
+                        help="Injected google.script.run round trip, ms (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=5, help="Startups per variant (default: %(default)s)")
+    parser.add_argument("--widgets", type=int, default=8, help="Widgets on the measured board (default: %(default)s)")
+    parser.add_argument("--boards", type=int, default=20, help="Saved dashboards of the teacher (default: %(default)s)")
+    parser.add_argument("--cpu", type=float, default=1, help="CPU slowdown factor (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    print(f"{args.latency:g} ms per google.script.run call, {args.widgets} widgets, {args.boards} saved boards, "
+          f"median of {args.runs} run(s)")
+    print(f"{'Variant':<8} {'First paint ms':>15} {'Settled ms':>11} {'Wrong':>6}")
+    wrong_total = 0
+    settler = Settler()
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        for variant in ("cold", "warm", "stale"):
+            runs = [run_once(pool, settler, variant, args.latency, args.widgets, args.boards, args.cpu)
+                    for _ in range(args.runs)]
+            wrong = sum(1 for _, _, correct in runs if not correct)
+            wrong_total += wrong
+            print(f"{variant:<8} {statistics.median(r[0] for r in runs):>15.0f} "
+                  f"{statistics.median(r[1] for r in runs):>11.0f} {wrong:>6}", flush=True)
+
+    print(settler.report())
+    if wrong_total:
+        print(f"FAIL: {wrong_total} startup(s) ended on an outdated board.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Shared google.script.run shim for the verification scripts.
+
+install_backend(context, backend, user) makes every page of a BrowserContext
+talk to a backend_emulator.Backend: an init script defines google.script.run
+before index.html runs, and each server call is POSTed to RPC_ORIGIN, where a
+Playwright route handler runs it against the emulator as `user`.
+
+Because the calls travel as real (routed) requests they are asynchronous, as
+in Apps Script, and one Backend can serve many pages at once, e.g. a teacher
+context and several student contexts sharing the same Sessions sheet.
+
+The emulator answers in about a millisecond, where a real google.script.run
+round trip takes 300 ms to several seconds and sometimes fails. A network
+profile (PROFILES: fast-lan, school-wifi, quota-throttled) draws a latency
+and, now and then, a failure for every call; the reply is held back in the
+page for that long and a failed call reaches the failure handler with the
+error Apps Script would give, without running the server function. Draws
+come from a seeded random.Random, so a run can be repeated. latency_ms is a
+fixed latency for every call instead.
+
+The page logs every finished call (name, start and end in page ms, ok);
+rpc_calls(page) reads the log and format_rpc_report() summarizes it per
+function, with how many calls of it were in flight at once at most. A
+teacherSessionLoop that fires syncSession every 2 s shows up there with
+more than one syncSession in flight once the round trip is slower than that.
+
+Usage:
+    backend = Backend(session_codes=["TEST12"])
+    with pool.context() as context:
+        install_backend(context, backend, user="teacher@example.com", profile="school-wifi")
+        page = context.new_page()
+        pool.load(page, URL_FILE)
+        ...
+        print(format_rpc_report(rpc_calls(page)))
+    print(backend.report())
+"""
+
+import os
+import json
+import random
+from backend_emulator import Backend, DEFAULT_USER, js_json
+from percentiles import percentile
+
+RPC_ORIGIN = "https://gas-emulator.invalid"
+CALL_LOG_LIMIT = 2000
+
+# Files whose contents decide what the page sees of the backend (for build-cache keys)
+BACKEND_SOURCES = [
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend_emulator.py"),
+]
+
+# Errors google.script.run reports to failure handlers
+NETWORK_ERROR = "NetworkError: Connection failure due to HTTP 0"
+QUOTA_ERROR = "Exception: Too many simultaneous invocations: Spreadsheets"
+
+class NetworkProfile:
+    """Latency and failures of google.script.run round trips as a page sees them."""
+
+    def __init__(self, name, latency_ms=0, jitter_ms=0, failure_rate=0.0, error=NETWORK_ERROR, description=""):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.error = error
+        self.description = description
+
+    def sample(self, rng):
+        """(latency ms, error or None) of one call: latency +- jitter, uniformly."""
+        latency = max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms))
+        error = self.error if self.failure_rate and rng.random() < self.failure_rate else None
+        return latency, error
+
+PROFILES = {p.name: p for p in [
+    NetworkProfile("instant", description="The emulator as is, about 1 ms"),
+    NetworkProfile("fast-lan", 350, 100, description="Wired school network, warm script"),
+    NetworkProfile("school-wifi", 1200, 900, 0.02, NETWORK_ERROR,
+                   description="Busy classroom wifi, occasional dropped calls"),
+    NetworkProfile("quota-throttled", 3000, 2000, 0.1, QUOTA_ERROR,
+                   description="Script near its quotas, slow and often refused"),
+]}
+
+def get_profile(profile):
+    """A NetworkProfile, given one or the name of one of PROFILES."""
+    if isinstance(profile, NetworkProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown network profile '{profile}' (known: {', '.join(PROFILES)})")
+    return PROFILES[profile]
+
+# google.script.run as a chainable runner: with*Handler/withUserObject return a
+# new runner, any other property is a server function.
+SHIM_JS = """
+(() => {
+    const ORIGIN = '%s';
+
+    // Injected round-trip latency (the network profile's draw for this call)
+    function delayed(reply) {
+        const ms = reply.delay;
+        return ms ? new Promise(resolve => setTimeout(() => resolve(reply), ms)) : reply;
+    }
+
+    // Calls in flight, until their handlers have run (settle.py waits for zero)
+    window.__gasPending = 0;
+    // Finished calls, the last %d (rpc_calls() reads them)
+    window.__gasCalls = [];
+
+    function finish(entry, ok) {
+        entry.end = performance.now();
+        entry.ok = ok;
+        window.__gasCalls.push(entry);
+        if (window.__gasCalls.length > %d) window.__gasCalls.shift();
+    }
+
+    function call(name, args, success, failure, userObject) {
+        window.__gasPending++;
+        const entry = { name, start: performance.now() };
+        fetch(ORIGIN + '/rpc/' + name, {
+            method: 'POST',
+            headers: { 'Content-Type': 'text/plain' },
+            body: JSON.stringify(args)
+        })
+            .then(response => response.json())
+            .then(delayed)
+            .then(reply => {
+                finish(entry, reply.ok);
+                if (reply.ok) {
+                    if (success) success(reply.value, userObject);
+                } else if (failure) {
+                    failure(new Error(reply.error), userObject);
+                } else {
+                    console.error('google.script.run.' + name + ' failed: ' + reply.error);
+                }
+            }, err => {
+                finish(entry, false);
+                if (failure) failure(err, userObject);
+            })
+            .finally(() => { window.__gasPending--; });
+    }
+
+    function runner(success, failure, userObject) {
+        return new Proxy({}, {
+            get(_, prop) {
+                if (prop === 'withSuccessHandler') return cb => runner(cb, failure, userObject);
+                if (prop === 'withFailureHandler') return cb => runner(success, cb, userObject);
+                if (prop === 'withUserObject') return obj => runner(success, failure, obj);
+                if (typeof prop !== 'string' || prop === 'then') return undefined;
+                return (...args) => call(prop, args, success, failure, userObject);
+            }
+        });
+    }
+
+    window.google = window.google || {};
+    window.google.script = { run: runner(null, null, undefined) };
+})();
+""" % (RPC_ORIGIN, CALL_LOG_LIMIT, CALL_LOG_LIMIT)
+
+def install_backend(context, backend, user=DEFAULT_USER, latency_ms=0, profile=None, seed=0):
+    """Routes google.script.run calls of every page in `context` to `backend`, running them as `user`.
+
+    Must be called before the pages load index.html. profile (a NetworkProfile
+    or one of PROFILES by name) draws each call's latency and failure from a
+    random.Random(seed); without one, every reply is delayed latency_ms.
+    """
+    profile = get_profile(profile) if profile else NetworkProfile("fixed", latency_ms)
+    rng = random.Random(seed)
+
+    def handle(route, request):
+        name = request.url.rsplit("/", 1)[-1]
+        delay, error = profile.sample(rng)
+        if error:
+            reply = {"ok": False, "error": error}
+        else:
+            try:
+                args = json.loads(request.post_data or "[]")
+                reply = {"ok": True, "value": backend.call(name, args, user)}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+        reply["delay"] = delay
+        route.fulfill(status=200, headers={"Access-Control-Allow-Origin": "*"},
+                      content_type="application/json", body=js_json(reply))
+
+    context.route(RPC_ORIGIN + "/rpc/*", handle)
+    context.add_init_script(SHIM_JS)
+    return backend
+
+def rpc_calls(page):
+    """The page's finished google.script.run calls: dicts of name, start and end (page ms) and ok."""
+    return page.evaluate("window.__gasCalls || []")
+
+def peak_in_flight(calls):
+    """Most calls in flight at the same time (a call ending as another starts doesn't overlap it)."""
+    events = sorted([(c["start"], 1) for c in calls] + [(c["end"], -1) for c in calls])
+    peak = current = 0
+    for _, step in events:
+        current += step
+        peak = max(peak, current)
+    return peak
+
+def rpc_summary(calls):
+    """Per-function calls, failures, p50/p95/max round trip ms and peak calls in flight."""
+    summary = {}
+    for name in sorted({c["name"] for c in calls}):
+        own = [c for c in calls if c["name"] == name]
+        ms = [c["end"] - c["start"] for c in own]
+        summary[name] = {"calls": len(own), "failed": sum(1 for c in own if not c["ok"]),
+                         "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95), "max_ms": max(ms),
+                         "peak_in_flight": peak_in_flight(own)}
+    return summary
+
+def format_rpc_report(calls):
+    """Text table of rpc_summary(), with the peak of all calls in flight."""
+    lines = [f"{'Function':<20} {'Calls':>6} {'Failed':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'In flight':>10}"]
+    for name, s in rpc_summary(calls).items():
+        lines.append(f"{name:<20} {s['calls']:>6} {s['failed']:>7} {s['p50_ms']:>8.0f} {s['p95_ms']:>8.0f} "
+                     f"{s['max_ms']:>8.0f} {s['peak_in_flight']:>10}")
+    lines.append(f"Peak google.script.run calls in flight: {peak_in_flight(calls)}")
+    return "\n".join(lines)
@@ -1,23 +1,111 @@
 
 from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool, format_report
+from build_cache import BuildCache, artifact_key, select_stale, add_cache_arguments, INDEX_HTML
+from gas_shim import Backend, install_backend, BACKEND_SOURCES
+from asset_cache import add_asset_arguments, asset_cache_from_args, check_offline
+from settle import Settler, SETTLE_SOURCES
+import argparse
 import os
 import sys
 
-def run(playwright):
+VIEWPORT = {'width': 1920, 'height': 1080}
+
+# List of widgets to process
+WIDGETS = [
+    'clock', 'timer', 'traffic', 'text', 'checklist', 'timetable',
+    'random', 'dice', 'qr', 'sound', 'drawing', 'embed', 'poll', 'webcam'
+]
+
+def screenshot_path(widget_type):
+    return f"onboarding-video/public/{widget_type}_comparison.png"
+
+def load_page(pool, page, file_path, settler):
+    """Loads index.html (google.script.run is served by the context's backend emulator)."""
+    pool.load(page, file_path)
+
+    # Wait for page to settle
+    page.wait_for_load_state('load')
+    settler.wait(page, "load")
+
+def capture_widget(page, widget_type, settler):
+    """Spawns two widgets side by side, flips the second to settings and screenshots the pair."""
+    # Spawn Widget 1 & 2 safely
+    page.evaluate("type => spawnWidget(type)", widget_type)
+    page.evaluate("type => spawnWidget(type)", widget_type)
+
+    # Position and resize widgets (wrapped in a function so the consts don't
+    # leak into the global scope of a recycled page)
+    page.evaluate("""() => {
+        const w1 = document.getElementById('widget-1');
+        const w2 = document.getElementById('widget-2');
+
+        if (w1 && w2) {
+            // Target size
+            const width = 500;
+            const height = 400;
+            const gap = 40;
+            const top = (window.innerHeight - height) / 2;
+
+            // Center horizontally: Total width = width * 2 + gap
+            const totalWidth = (width * 2) + gap;
+            const startX = (window.innerWidth - totalWidth) / 2;
+
+            // Position W1 (Left - Active Side)
+            w1.style.width = width + 'px';
+            w1.style.height = height + 'px';
+            w1.style.left = startX + 'px';
+            w1.style.top = top + 'px';
+            w1.style.zIndex = 100;
+
+            // Position W2 (Right - Settings Side)
+            w2.style.width = width + 'px';
+            w2.style.height = height + 'px';
+            w2.style.left = (startX + width + gap) + 'px';
+            w2.style.top = top + 'px';
+            w2.style.zIndex = 100;
+        }
+    }""")
+
+    # Flip the second widget to settings
+    settings_btn = page.locator("#widget-2 .btn-settings")
+    try:
+        settings_btn.wait_for(state="visible", timeout=5000)
+        settings_btn.click()
+        # Wait for the flip transition (0.6s) to finish
+        settler.wait(page, "settings flip")
+    except Exception:
+        print(f"Warning: Settings button not found or not visible for {widget_type}")
+
+    # Take screenshot
+    output_path = screenshot_path(widget_type)
+    page.screenshot(path=output_path)
+    print(f"Saved screenshot to {output_path}")
+
+def widget_key(widget_type):
+    """Build-cache key of a widget's screenshot: everything that can change its pixels."""
+    return artifact_key(INDEX_HTML, *BACKEND_SOURCES, *SETTLE_SOURCES, load_page, capture_widget, widget_type, VIEWPORT)
+
+def run(playwright, args):
     # Validate environment
     if not os.path.exists('index.html'):
         print("Error: index.html not found. Please run this script from the project root.")
         sys.exit(1)
 
-    browser = playwright.chromium.launch(headless=True)
-    context = browser.new_context(viewport={'width': 1920, 'height': 1080})
-    page = context.new_page()
-
-    # List of widgets to process
-    widgets = [
-        'clock', 'timer', 'traffic', 'text', 'checklist', 'timetable',
-        'random', 'dice', 'qr', 'sound', 'drawing', 'embed', 'poll', 'webcam'
-    ]
+    for name in args.names:
+        if name not in WIDGETS:
+            print(f"Warning: Widget '{name}' not found.")
+
+    # Skip widgets whose screenshot inputs are unchanged
+    cache = BuildCache(force=args.force)
+    keys = {w: widget_key(w) for w in WIDGETS}
+    selected = [w for w in WIDGETS if not args.names or w in args.names]
+    widgets, fresh = select_stale(cache, selected, keys, screenshot_path, bool(args.names), args.only_stale)
+    if fresh:
+        print(f"Skipping {len(fresh)} up-to-date screenshot(s): {', '.join(fresh)}")
+    if not widgets:
+        print("All screenshots are up to date (use --force to regenerate).")
+        return
 
     # File path to index.html
     file_path = f"file://{os.path.abspath('index.html')}"
@@ -25,97 +113,43 @@ def run(playwright):
     # Create output directory if it doesn't exist
     os.makedirs('onboarding-video/public', exist_ok=True)
 
-    for widget_type in widgets:
-        print(f"Processing widget: {widget_type}")
-
-        try:
-            # Reload page for fresh state
-            page.goto(file_path)
-
-            # Mock google.script.run and other necessary setups
-            page.evaluate("""
-                window.google = {
-                    script: {
-                        run: {
-                            withSuccessHandler: function(callback) {
-                                this.callback = callback;
-                                return this;
-                            },
-                            withFailureHandler: function(callback) {
-                                return this;
-                            },
-                            getDashboards: function() {
-                                if (this.callback) this.callback(JSON.stringify({}));
-                            },
-                            saveDashboard: function(name, data) {
-                                if (this.callback) this.callback({success: true});
-                            }
-                        }
-                    }
-                };
-            """)
-
-            # Wait for page to settle
-            page.wait_for_load_state('load')
-
-            # Spawn Widget 1 & 2 safely
-            page.evaluate("type => spawnWidget(type)", widget_type)
-            page.evaluate("type => spawnWidget(type)", widget_type)
-
-            # Position and resize widgets
-            page.evaluate("""
-                const w1 = document.getElementById('widget-1');
-                const w2 = document.getElementById('widget-2');
-
-                if (w1 && w2) {
-                    // Target size
-                    const width = 500;
-                    const height = 400;
-                    const gap = 40;
-                    const top = (window.innerHeight - height) / 2;
-
-                    // Center horizontally: Total width = width * 2 + gap
-                    const totalWidth = (width * 2) + gap;
-                    const startX = (window.innerWidth - totalWidth) / 2;
-
-                    // Position W1 (Left - Active Side)
-                    w1.style.width = width + 'px';
-                    w1.style.height = height + 'px';
-                    w1.style.left = startX + 'px';
-                    w1.style.top = top + 'px';
-                    w1.style.zIndex = 100;
-
-                    // Position W2 (Right - Settings Side)
-                    w2.style.width = width + 'px';
-                    w2.style.height = height + 'px';
-                    w2.style.left = (startX + width + gap) + 'px';
-                    w2.style.top = top + 'px';
-                    w2.style.zIndex = 100;
-                }
-            """)
-
-            # Flip the second widget to settings
-            settings_btn = page.locator("#widget-2 .btn-settings")
+    settler = Settler()
+    with BrowserPool(playwright, assets=asset_cache_from_args(args)) as pool, \
+            pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, Backend())
+        settler.install(context)
+        page = context.new_page()
+        loaded = False
+
+        for widget_type in widgets:
+            print(f"Processing widget: {widget_type}")
+
             try:
-                settings_btn.wait_for(state="visible", timeout=5000)
-                settings_btn.click()
-                # Wait for the flip animation to potentially finish
-                # The CSS transition is 0.6s.
-                page.wait_for_timeout(1000)
-            except Exception:
-                print(f"Warning: Settings button not found or not visible for {widget_type}")
-
-            # Take screenshot
-            output_path = f"onboarding-video/public/{widget_type}_comparison.png"
-            page.screenshot(path=output_path)
-            print(f"Saved screenshot to {output_path}")
-
-        except Exception as e:
-            print(f"FAILED to process {widget_type}: {type(e).__name__}: {e}")
-            # We continue to the next widget to attempt to generate as many as possible
-            continue
-
-    browser.close()
+                if loaded:
+                    # Recycle the page: clear the board instead of reloading index.html
+                    pool.reset_page(page)
+                else:
+                    load_page(pool, page, file_path, settler)
+                    loaded = True
+
+                capture_widget(page, widget_type, settler)
+                cache.record(screenshot_path(widget_type), keys[widget_type])
+
+            except Exception as e:
+                print(f"FAILED to process {widget_type}: {type(e).__name__}: {e}")
+                # Reload from scratch next time in case the page was left in a bad state,
+                # and continue to the next widget to generate as many as possible
+                loaded = False
+                continue
+
+    print(format_report(pool.stats()))
+    print(settler.report())
+    check_offline(pool.stats())
+
+parser = argparse.ArgumentParser(description="Generate widget comparison screenshots for the onboarding video.")
+parser.add_argument("names", nargs="*", help="Widgets to capture (default: all)")
+add_cache_arguments(parser)
+add_asset_arguments(parser)
 
 with sync_playwright() as playwright:
-    run(playwright)
+    run(playwright, parser.parse_args())
@@ -0,0 +1,202 @@
+"""
+Widget lifecycle soak test: does spawning and closing a widget leak?
+
+For every widget type the soak loads a fresh index.html and runs --cycles
+spawnWidget() / closeWidget() pairs, starting the widget's loop in between
+where it needs a click (timer, dice, name picker, sound meter, webcam; the
+same buttons widget_profile.py presses). Every --sample-every cycles it forces
+a garbage collection and samples, over the Chrome DevTools Protocol:
+
+- heap: JSHeapUsedSize (Performance.getMetrics);
+- nodes / listeners / documents: live DOM nodes (detached but still reachable
+  ones included), JS event listeners and documents (iframes);
+- timers: setInterval timers and setTimeout / requestAnimationFrame
+  callbacks still pending, counted by wrappers installed before the page
+  loads. A widget whose loop outlives it keeps one pending per instance.
+
+A least-squares line through the samples (the first one is the warm-up and is
+left out) gives the growth per cycle. A widget type is flagged as LEAK when
+its heap grows by more than --heap-threshold bytes per cycle, or its nodes,
+listeners or timers keep growing, with the line explaining most of the
+variance (R² above 0.8), i.e. growth that is linear rather than noise.
+
+Usage: python verification/leak_soak.py [clock timer ...] [--cycles 2000]
+       [--sample-every 100] [--output leak_soak.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+from widget_profile import WIDGETS, START_BUTTONS, LAUNCH_ARGS
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1366, "height": 768}
+MIN_R2 = 0.8
+
+# Per-cycle growth above which a counter counts as leaking
+DEFAULT_HEAP_THRESHOLD = 256
+COUNT_THRESHOLDS = {"nodes": 0.5, "listeners": 0.5, "documents": 0.01, "timers": 0.01}
+
+# Counts live timers: intervals until cleared, timeouts and animation frames until run or cancelled
+TIMER_PROBE_JS = """
+(() => {
+    const intervals = new Set(), pending = new Set(), frames = new Set();
+    const { setInterval: si, clearInterval: ci, setTimeout: st, clearTimeout: ct,
+            requestAnimationFrame: raf, cancelAnimationFrame: caf } = window;
+    window.setInterval = function (...args) {
+        const id = si.apply(window, args);
+        intervals.add(id);
+        return id;
+    };
+    window.setTimeout = function (fn, ...rest) {
+        if (typeof fn !== 'function') return st.call(window, fn, ...rest);
+        const id = st.call(window, function (...args) { pending.delete(id); return fn.apply(this, args); }, ...rest);
+        pending.add(id);
+        return id;
+    };
+    // Timeout and interval ids share one pool, so either clear function clears both
+    window.clearInterval = window.clearTimeout = function (id) {
+        intervals.delete(id);
+        pending.delete(id);
+        return ci.call(window, id);
+    };
+    window.requestAnimationFrame = function (fn) {
+        const id = raf.call(window, ts => { frames.delete(id); fn(ts); });
+        frames.add(id);
+        return id;
+    };
+    window.cancelAnimationFrame = function (id) {
+        frames.delete(id);
+        return caf.call(window, id);
+    };
+    window.__liveTimers = () => intervals.size + pending.size + frames.size;
+})();
+"""
+
+# n spawn/close pairs; each widget lives for one frame so its loops get going
+CYCLE_JS = """
+async ([type, button, n]) => {
+    const frame = () => new Promise(resolve => requestAnimationFrame(resolve));
+    for (let i = 0; i < n; i++) {
+        spawnWidget(type);
+        const w = widgets[widgets.length - 1];
+        if (button) {
+            const btn = w.el.querySelector(button);
+            if (btn) btn.click();
+        }
+        await frame();
+        closeWidget(w.id);
+    }
+    // Let async starts (getUserMedia) settle before sampling
+    await new Promise(resolve => setTimeout(resolve, 50));
+}
+"""
+
+def sample(page, cdp):
+    """Counters of the page after a forced garbage collection."""
+    cdp.send("HeapProfiler.collectGarbage")
+    metrics = {m["name"]: m["value"] for m in cdp.send("Performance.getMetrics")["metrics"]}
+    return {
+        "heap": metrics.get("JSHeapUsedSize", 0),
+        "nodes": metrics.get("Nodes", 0),
+        "listeners": metrics.get("JSEventListeners", 0),
+        "documents": metrics.get("Documents", 0),
+        "timers": page.evaluate("__liveTimers()"),
+    }
+
+def fit(xs, ys):
+    """Least-squares (slope, R²) of ys against xs."""
+    n = len(xs)
+    if n < 2:
+        return 0.0, 0.0
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    if not sxx:
+        return 0.0, 0.0
+    slope = sxy / sxx
+    r2 = sxy * sxy / (sxx * syy) if syy else 0.0
+    return slope, r2
+
+def soak_widget(pool, widget, cycles, sample_every, heap_threshold):
+    """Soaks one widget type and returns its samples, growth per cycle and verdict."""
+    with pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, Backend())
+        context.add_init_script(TIMER_PROBE_JS)
+        page = context.new_page()
+        pool.load(page, URL_FILE)
+        page.wait_for_load_state("load")
+        cdp = context.new_cdp_session(page)
+        cdp.send("Performance.enable")
+
+        samples = []
+        done = 0
+        while done < cycles:
+            n = min(sample_every, cycles - done)
+            page.evaluate(CYCLE_JS, [widget, START_BUTTONS.get(widget), n])
+            done += n
+            samples.append(dict(sample(page, cdp), cycle=done))
+
+    thresholds = dict(COUNT_THRESHOLDS, heap=heap_threshold)
+    steady = samples[1:]
+    growth, leaking = {}, []
+    for key, threshold in thresholds.items():
+        slope, r2 = fit([s["cycle"] for s in steady], [s[key] for s in steady])
+        growth[key] = {"per_cycle": round(slope, 3), "r2": round(r2, 3)}
+        if slope > threshold and r2 > MIN_R2:
+            leaking.append(key)
+    return {"widget": widget, "cycles": cycles, "leak": bool(leaking), "leaking": leaking,
+            "growth": growth, "final": samples[-1], "samples": samples}
+
+def main():
+    parser = argparse.ArgumentParser(description="Spawn and close every widget type and flag linear memory growth.")
+    parser.add_argument("names", nargs="*", help="Widgets to soak (default: all)")
+    parser.add_argument("--cycles", type=int, default=2000, help="Spawn/close pairs per widget (default: %(default)s)")
+    parser.add_argument("--sample-every", type=int, default=100,
+                        help="Cycles between samples (default: %(default)s)")
+    parser.add_argument("--heap-threshold", type=float, default=DEFAULT_HEAP_THRESHOLD,
+                        help="Heap bytes per cycle that count as a leak (default: %(default)s)")
+    parser.add_argument("--output", help="Also write the results, samples included, to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    unknown = [n for n in args.names if n not in WIDGETS]
+    if unknown:
+        parser.error(f"unknown widget(s): {', '.join(unknown)}")
+    if args.cycles < 3 * args.sample_every:
+        parser.error("--cycles must allow at least three samples")
+
+    print(f"{args.cycles} spawn/close cycles per widget, sampled every {args.sample_every}")
+    print(f"{'Widget':<10} {'Heap B/cycle':>13} {'Nodes/cycle':>12} {'Listeners/cycle':>16} "
+          f"{'Timers left':>12} {'Verdict':<8}")
+    results = []
+    with sync_playwright() as p, BrowserPool(p, args=LAUNCH_ARGS) as pool:
+        for widget in args.names or WIDGETS:
+            r = soak_widget(pool, widget, args.cycles, args.sample_every, args.heap_threshold)
+            results.append(r)
+            g = r["growth"]
+            verdict = f"LEAK ({', '.join(r['leaking'])})" if r["leak"] else "ok"
+            print(f"{widget:<10} {g['heap']['per_cycle']:>13.0f} {g['nodes']['per_cycle']:>12.2f} "
+                  f"{g['listeners']['per_cycle']:>16.2f} {r['final']['timers']:>12} {verdict:<8}", flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {len(results)} result(s) to {args.output}")
+
+    leaks = [r["widget"] for r in results if r["leak"]]
+    if leaks:
+        print(f"FAIL: linear growth in {', '.join(leaks)}.")
+        sys.exit(1)
+    print("OK: no widget type leaks.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Classroom-scale load generator for the live-session backend.
+
+Simulates K classrooms, each with one teacher and N students, against the
+Code.js emulator (backend_emulator.py). The clients are protocol-level: they
+make the same google.script.run calls on the same timers as index.html, but
+without a browser, so hundreds of them fit in one process.
+
+- Teacher: createSession, then every 2 s teacherSessionLoop fires one
+  syncSession with its changes (if any) and its last revision, without
+  waiting for the reply.
+- Student: listDashboards then joinSession, then pollSessionData's
+  getSessionData with its last revision, plus one submitPollResponse vote.
+  The next poll is 3 s after a reply that changed something, and twice the
+  previous delay (up to 15 s) after a "not modified" reply or while the
+  session is paused; --student-polling fixed polls every 3 s instead.
+
+--paused makes every teacher pause the session right after creating it.
+
+For comparison, --protocol delta replays the teacher's previous two calls per
+tick (patchSession when something changed, then getSessionData), and
+--protocol full the full-state sync before that (updateSession with the whole
+dashboard every 2 s, revision-less polls).
+
+Time is simulated. Every call really runs against the emulator, so session
+state and sheet traffic evolve as in a real class, and CostModel turns each
+call's traffic into an Apps Script execution time. At most --concurrency
+executions run at once (the simultaneous-execution quota); calls arriving
+while all slots are busy queue up and are counted as over the limit, since
+in production they would fail.
+
+For each N the run reports calls per minute, p50/p95/p99 RPC latency and
+whether the backend is saturated (over-limit calls above 1%, or p95 latency
+longer than the student poll interval), and names the first saturated N.
+
+Usage: python verification/load_test.py [--students 10,30,60] [--classrooms 3]
+       [--duration 120] [--concurrency 30] [--history-rows 0]
+       [--protocol batched|delta|full] [--teacher-changes N]
+       [--student-polling adaptive|fixed] [--paused]
+"""
+
+import json
+import heapq
+import datetime
+import random
+import argparse
+from collections import deque
+from backend_emulator import Backend, CostModel, js_json
+from percentiles import percentile
+
+TEACHER_INTERVAL_MS = 2000  # teacherSessionLoop
+STUDENT_INTERVAL_MS = 3000  # pollSessionData
+STUDENT_MAX_INTERVAL_MS = 15000  # SYNC_CONFIG.studentPollMaxMs
+STUDENT_BACKOFF = 2  # SYNC_CONFIG.studentPollBackoff
+OVER_LIMIT_SATURATION = 0.01
+GRID = 40  # index.html snaps widget moves to a 40px grid
+
+# A typical live dashboard, shaped like getDashboardState()
+CLASSROOM_DASHBOARD = {
+    "bg": "bg-slate-900",
+    "widgets": [
+        {"id": 1, "type": "clock", "x": 40, "y": 40, "w": 280, "h": 160, "z": "10", "minimized": False,
+         "settings": False, "allowInteraction": False, "data": {"is24h": False, "showSeconds": True}},
+        {"id": 2, "type": "traffic", "x": 360, "y": 40, "w": 140, "h": 320, "z": "11", "minimized": False,
+         "settings": False, "allowInteraction": False, "data": {"active": "green"}},
+        {"id": 3, "type": "text", "x": 540, "y": 40, "w": 250, "h": 200, "z": "12", "minimized": False,
+         "settings": False, "allowInteraction": False,
+         "data": {"content": "Read chapter 4 and answer questions 1-5 in your notebook.",
+                  "fontSize": "18", "bgColor": "rgb(254, 243, 199)"}},
+        {"id": 4, "type": "poll", "x": 40, "y": 240, "w": 300, "h": 250, "z": "13", "minimized": False,
+         "settings": False, "allowInteraction": True,
+         "data": {"votes": None, "labelA": "Ready", "labelB": "Need help"}},
+    ],
+    "polls": {},
+}
+POLL_WIDGET_ID = 4
+
+def seed_history(backend, rows):
+    """Adds `rows` ended sessions, like a Sessions sheet after months of use."""
+    sheet = backend.getSessionSheet()
+    # One shared JSON string keeps a 100k-row sheet small in memory
+    data = js_json({"studentCount": 0, **CLASSROOM_DASHBOARD})
+    created = datetime.datetime.now()
+    for i in range(rows):
+        sheet.appendRow([f"H{i:05d}", f"teacher-{i % 50}@example.com", data, created, False])
+
+class LoadSimulation:
+    """Discrete-event simulation of clients calling one emulated Apps Script deployment."""
+
+    def __init__(self, backend, cost=None, concurrency=30):
+        self.backend = backend
+        self.cost = cost or CostModel()
+        self.concurrency = concurrency
+        self.now = 0.0
+        self._events = []
+        self._seq = 0
+        self._queue = deque()
+        self.running = 0
+        self.peak_running = 0
+        self.over_limit = 0
+        self.bytes_sent = 0  # Request payloads (client -> Apps Script)
+        self.bytes_received = 0  # Replies (Apps Script -> client)
+        self.completed = []  # (name, latency_ms, finished_at_ms)
+
+    def at(self, t, fn):
+        """Schedules fn() at simulated time t (ms)."""
+        heapq.heappush(self._events, (t, self._seq, fn))
+        self._seq += 1
+
+    def every(self, start, interval, fn, until):
+        """setInterval: fn() at start + k * interval for as long as it is before `until`."""
+        def tick():
+            fn()
+            if self.now + interval < until:
+                self.at(self.now + interval, tick)
+        self.at(start + interval, tick)
+
+    def rpc(self, user, name, args, on_success=None):
+        """google.script.run.withSuccessHandler(on_success)[name](*args) from `user`, issued now."""
+        call = (self.now, user, name, args, on_success)
+        self.bytes_sent += len(js_json(args))
+        if self.running < self.concurrency:
+            self._start(call)
+        else:
+            self.over_limit += 1
+            self._queue.append(call)
+
+    def _start(self, call):
+        issued, user, name, args, on_success = call
+        self.running += 1
+        self.peak_running = max(self.peak_running, self.running)
+        result = self.backend.call(name, args, user)
+        self.bytes_received += len(js_json(result))
+        service_ms = self.cost.estimate(self.backend.calls[-1])
+
+        def finish():
+            self.running -= 1
+            self.completed.append((name, self.now - issued, self.now))
+            if self._queue:
+                self._start(self._queue.popleft())
+            if on_success:
+                on_success(result)
+        self.at(self.now + service_ms, finish)
+
+    def run(self, until):
+        while self._events and self._events[0][0] <= until:
+            self.now, _, fn = heapq.heappop(self._events)
+            fn()
+        self.now = until
+
+def widget_sync_key(w):
+    """index.html's widgetSyncKey(): interactive widgets' data doesn't count as a change."""
+    return js_json({k: v for k, v in w.items() if k != "data"} if w.get("allowInteraction") else w)
+
+def add_classroom(sim, index, students, duration_ms, rng, protocol="batched", teacher_changes_per_min=0,
+                  teacher_interval=TEACHER_INTERVAL_MS, student_interval=STUDENT_INTERVAL_MS,
+                  student_polling="adaptive", paused=False):
+    """Schedules one teacher and `students` students, with the call pattern of index.html.
+
+    protocol "batched" is the current revisioned sync (one syncSession per
+    teacher tick, getSessionData with the client's revision); "delta" sends the
+    teacher's patchSession and getSessionData separately; "full" is the
+    full-state push and poll.
+    The teacher moves a widget teacher_changes_per_min times a minute, and
+    pauses the session straight away when `paused`. student_polling
+    "adaptive" is scheduleStudentPoll()'s backoff, "fixed" the previous
+    setInterval.
+    """
+    teacher = f"teacher-{index}@example.com"
+    dashboard = json.loads(json.dumps(CLASSROOM_DASHBOARD))
+    teacher_state = {"code": None, "rev": 0, "pushed": {}, "bg": None}
+    start = rng.uniform(0, teacher_interval)
+
+    def joined_as(student):
+        def on_join(response):
+            if not response.get("success"):
+                return
+            state = {"rev": response["data"].get("rev") or 0, "delay": student_interval}
+
+            def schedule(delay):
+                """scheduleStudentPoll()"""
+                state["delay"] = delay
+                if sim.now + delay < duration_ms:
+                    sim.at(sim.now + delay, poll)
+
+            def on_polled(r):
+                state.update(rev=r.get("rev", state["rev"]))
+                if student_polling != "adaptive" or not r.get("success"):
+                    return
+                if r.get("notModified") or r["data"].get("paused"):
+                    schedule(min(STUDENT_MAX_INTERVAL_MS, state["delay"] * STUDENT_BACKOFF))
+                else:
+                    schedule(student_interval)
+
+            def poll():
+                if protocol == "full":
+                    sim.rpc(student, "getSessionData", [teacher_state["code"]], on_polled)
+                else:
+                    sim.rpc(student, "getSessionData", [teacher_state["code"], state["rev"]], on_polled)
+            if student_polling == "adaptive":
+                schedule(student_interval)
+            else:
+                sim.every(sim.now, student_interval, poll, duration_ms)
+
+            vote_at = sim.now + rng.uniform(5000, 60000)
+            if vote_at < duration_ms:
+                option = rng.choice("AB")
+                sim.at(vote_at, lambda: sim.rpc(student, "submitPollResponse",
+                                                [teacher_state["code"], POLL_WIDGET_ID, option]))
+        return on_join
+
+    def join(student):
+        sim.rpc(student, "listDashboards", [],
+                lambda _: sim.rpc(student, "joinSession", [teacher_state["code"]], joined_as(student)))
+
+    def build_patch():
+        """buildSessionPatch(): (patch, pushed, bg) of the changed widgets, None when idle."""
+        pushed = {w["id"]: widget_sync_key(w) for w in dashboard["widgets"]}
+        patch = {"widgets": [w for w in dashboard["widgets"] if teacher_state["pushed"].get(w["id"]) != pushed[w["id"]]],
+                 "removed": [i for i in teacher_state["pushed"] if i not in pushed]}
+        if dashboard["bg"] != teacher_state["bg"]:
+            patch["bg"] = dashboard["bg"]
+        if not patch["widgets"] and not patch["removed"] and "bg" not in patch:
+            return None
+        return patch, pushed, dashboard["bg"]
+
+    def on_pushed(pending, response):
+        if response.get("success") and pending:
+            teacher_state.update(pushed=pending[1], bg=pending[2])
+
+    def on_polled(response):
+        teacher_state.update(rev=response.get("rev", teacher_state["rev"]))
+
+    def loop():
+        """teacherSessionLoop()"""
+        if protocol == "full":
+            sim.rpc(teacher, "updateSession", [teacher_state["code"], js_json(dashboard)])
+            sim.rpc(teacher, "getSessionData", [teacher_state["code"]])
+            return
+        pending = build_patch()
+        if protocol == "delta":
+            if pending:
+                sim.rpc(teacher, "patchSession", [teacher_state["code"], js_json(pending[0])],
+                        lambda r: on_pushed(pending, r))
+            sim.rpc(teacher, "getSessionData", [teacher_state["code"], teacher_state["rev"]], on_polled)
+            return
+        sim.rpc(teacher, "syncSession", [teacher_state["code"], js_json(pending[0]) if pending else "",
+                                         teacher_state["rev"]],
+                lambda r: (on_pushed(pending, r), on_polled(r)))
+
+    def move_widget():
+        dashboard["widgets"][0]["x"] += GRID
+
+    def on_created(response):
+        teacher_state.update(code=response["code"], rev=response.get("rev") or 0, bg=dashboard["bg"],
+                             pushed={w["id"]: widget_sync_key(w) for w in dashboard["widgets"]})
+        sim.every(sim.now, teacher_interval, loop, duration_ms)
+        if paused:
+            sim.rpc(teacher, "setSessionPaused", [teacher_state["code"], True])
+        if teacher_changes_per_min:
+            sim.every(sim.now, 60000 / teacher_changes_per_min, move_widget, duration_ms)
+
+        for s in range(students):
+            student = f"student-{index}-{s}@example.com"
+            sim.at(sim.now + rng.uniform(0, student_interval), lambda student=student: join(student))
+
+    sim.at(start, lambda: sim.rpc(teacher, "createSession", [js_json(dashboard)], on_created))
+
+def run_load(students, classrooms=1, duration_s=120, concurrency=30, cost=None, history_rows=0, seed=0,
+             protocol="batched", teacher_changes_per_min=0,
+             teacher_interval=TEACHER_INTERVAL_MS, student_interval=STUDENT_INTERVAL_MS,
+             student_polling="adaptive", paused=False):
+    """Runs one load level and returns its metrics."""
+    backend = Backend(seed=seed)
+    seed_history(backend, history_rows)
+    sim = LoadSimulation(backend, cost, concurrency)
+    rng = random.Random(seed)
+    duration_ms = duration_s * 1000
+    for c in range(classrooms):
+        add_classroom(sim, c, students, duration_ms, rng, protocol, teacher_changes_per_min,
+                      teacher_interval, student_interval, student_polling, paused)
+    sim.run(duration_ms)
+
+    minutes = duration_s / 60
+    latencies = [latency for _, latency, _ in sim.completed]
+    issued = len(sim.completed) + sim.running + len(sim._queue)
+    result = {
+        "students": students,
+        "classrooms": classrooms,
+        "calls": len(sim.completed),
+        "calls_per_min": len(sim.completed) / minutes,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "peak_running": sim.peak_running,
+        "over_limit": sim.over_limit,
+        "over_limit_rate": sim.over_limit / issued if issued else 0.0,
+        "kb_read_per_min": sum(c["bytes_read"] for c in backend.calls) / 1024 / minutes,
+        "writes_per_min": sum(c["writes"] for c in backend.calls) / minutes,
+        "kb_written_per_min": sum(c["bytes_written"] for c in backend.calls) / 1024 / minutes,
+        "kb_sent_per_min": sim.bytes_sent / 1024 / minutes,
+        "kb_received_per_min": sim.bytes_received / 1024 / minutes,
+        "student_polls_per_min": sum(1 for c in backend.calls if c["name"] == "getSessionData"
+                                     and c["user"].startswith("student")) / minutes / (students * classrooms or 1),
+        "backend": backend,
+    }
+    result["saturated"] = (result["over_limit_rate"] > OVER_LIMIT_SATURATION
+                           or result["p95"] > student_interval)
+    return result
+
+def print_results(results):
+    print(f"{'Students':>8} {'Calls/min':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'Peak exec':>9} {'Over limit':>10} {'KB read/min':>12}")
+    for r in results:
+        flag = "  SATURATED" if r["saturated"] else ""
+        print(f"{r['students']:>8} {r['calls_per_min']:>10.0f} {r['p50']:>8.0f} {r['p95']:>8.0f} {r['p99']:>8.0f} "
+              f"{r['peak_running']:>9} {r['over_limit_rate']:>9.1%} {r['kb_read_per_min']:>12.0f}{flag}")
+    saturated = [r for r in results if r["saturated"]]
+    if saturated:
+        print(f"Saturation point: {saturated[0]['students']} students per classroom "
+              f"({saturated[0]['students'] * saturated[0]['classrooms']} clients in total).")
+    else:
+        print("Saturation point: not reached.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate classrooms polling one live session backend.")
+    parser.add_argument("--students", default="5,10,20,30,45,60,90",
+                        help="Comma-separated students per classroom to sweep (default: %(default)s)")
+    parser.add_argument("--classrooms", type=int, default=3, help="Concurrent classrooms (default: %(default)s)")
+    parser.add_argument("--duration", type=int, default=120, help="Simulated seconds per level (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=30,
+                        help="Simultaneous Apps Script executions (default: %(default)s)")
+    parser.add_argument("--history-rows", type=int, default=0,
+                        help="Ended sessions to pre-populate the Sessions sheet with (default: %(default)s)")
+    parser.add_argument("--protocol", choices=["batched", "delta", "full"], default="batched",
+                        help="Session sync protocol of the clients (default: %(default)s)")
+    parser.add_argument("--teacher-changes", type=float, default=0,
+                        help="Widget moves per minute by each teacher (default: idle)")
+    parser.add_argument("--student-polling", choices=["adaptive", "fixed"], default="adaptive",
+                        help="Student poll schedule (default: %(default)s)")
+    parser.add_argument("--paused", action="store_true", help="Teachers pause their session right after creating it")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    parser.add_argument("--report", action="store_true", help="Print the per-function backend report of each level")
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(s) for s in args.students.split(",") if s.strip()]:
+        r = run_load(n, args.classrooms, args.duration, args.concurrency,
+                     history_rows=args.history_rows, seed=args.seed,
+                     protocol=args.protocol, teacher_changes_per_min=args.teacher_changes,
+                     student_polling=args.student_polling, paused=args.paused)
+        results.append(r)
+        if args.report:
+            print(f"--- {n} students x {args.classrooms} classrooms ---")
+            print(r["backend"].report())
+
+    print(f"{args.classrooms} classroom(s), {args.duration}s simulated per level, "
+          f"{args.concurrency} simultaneous executions")
+    print_results(results)
+
+if __name__ == "__main__":
+    main()
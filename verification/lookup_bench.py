@@ -0,0 +1,60 @@
+"""
+Session lookup benchmark: cost of one poll as the Sessions sheet grows.
+
+Seeds the Code.js emulator with 100 .. 100,000 ended sessions plus one live
+one, then times getSessionData for the live session in two ways:
+
+- indexed: findSessionRow's code -> row entry is in the script cache, so the
+  call reads the one row it needs;
+- evicted: the script cache is cleared before every call, so findSessionRow
+  falls back to scanning the code and active columns (and re-caches the row).
+
+Reported per sheet size: emulator wall time, the CostModel estimate of the
+Apps Script execution time and the cells read per call. Indexed lookups should
+stay flat as the history grows; evicted ones grow with it.
+
+Usage: python verification/lookup_bench.py [--rows 100,1000,10000,100000]
+       [--calls 200]
+"""
+
+import time
+import argparse
+from backend_emulator import Backend, CostModel, js_json
+from load_test import CLASSROOM_DASHBOARD, seed_history
+
+TEACHER = "teacher@example.com"
+STUDENT = "student@example.com"
+
+def measure(backend, code, calls, evict):
+    """Average (wall ms, CostModel ms, cells read) of `calls` getSessionData polls."""
+    cost = CostModel()
+    wall = model = cells = 0.0
+    for _ in range(calls):
+        if evict:
+            backend.script_cache.clear()
+        start = time.perf_counter()
+        backend.call("getSessionData", [code], STUDENT)
+        wall += (time.perf_counter() - start) * 1000
+        record = backend.calls[-1]
+        model += cost.estimate(record)
+        cells += record["cells_read"]
+    return wall / calls, model / calls, cells / calls
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure session lookup cost against Sessions sheet size.")
+    parser.add_argument("--rows", default="100,1000,10000,100000",
+                        help="Comma-separated historical session counts (default: %(default)s)")
+    parser.add_argument("--calls", type=int, default=200, help="getSessionData calls per measurement (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"{'Rows':>8} {'Lookup':<8} {'Wall ms':>9} {'Model ms':>9} {'Cells read':>11}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        backend = Backend(session_codes=["LIVE01"])
+        seed_history(backend, rows)
+        code = backend.call("createSession", [js_json(CLASSROOM_DASHBOARD)], TEACHER)["code"]
+        for label, evict in (("indexed", False), ("evicted", True)):
+            wall, model, cells = measure(backend, code, args.calls, evict)
+            print(f"{rows:>8} {label:<8} {wall:>9.3f} {model:>9.1f} {cells:>11.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Percentiles shared by the benchmarks and the google.script.run shim.
+
+Usage:
+    from percentiles import percentile
+    p95 = percentile(latencies, 95)
+"""
+
+def percentile(values, p):
+    """Nearest-rank percentile of an unsorted list (0 for an empty one)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
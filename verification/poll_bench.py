@@ -0,0 +1,52 @@
+"""
+Student polling cost for idle, paused and active classroom traces.
+
+Replays one classroom with load_test's protocol-level clients, once with the
+previous fixed student poll (getSessionData every 3 s) and once with
+pollSessionData's adaptive schedule (3 s after a change, backing off to 15 s
+while replies are "not modified" or the session is paused). Traces:
+
+- idle: the teacher leaves the dashboard alone;
+- paused: the teacher pauses the session right after starting it;
+- active: the teacher moves a widget --active-changes times a minute.
+
+Students still vote once each, which changes the session for the whole class.
+The table reports getSessionData calls per student per minute, all calls per
+minute and reply KB per minute.
+
+Usage: python verification/poll_bench.py [--students 30] [--duration 300]
+       [--active-changes 6]
+"""
+
+import argparse
+from load_test import run_load
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixed and adaptive student polling per classroom trace.")
+    parser.add_argument("--students", type=int, default=30, help="Students in the classroom (default: %(default)s)")
+    parser.add_argument("--duration", type=int, default=300, help="Simulated seconds per run (default: %(default)s)")
+    parser.add_argument("--active-changes", type=float, default=6,
+                        help="Widget moves per minute in the active trace (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    traces = {
+        "idle": {},
+        "paused": {"paused": True},
+        "active": {"teacher_changes_per_min": args.active_changes},
+    }
+    print(f"1 classroom, {args.students} students, {args.duration}s simulated per run")
+    print(f"{'Trace':<7} {'Polling':<9} {'Polls/student/min':>18} {'Calls/min':>10} {'KB recv/min':>12}")
+    for trace, options in traces.items():
+        runs = {}
+        for polling in ("fixed", "adaptive"):
+            r = runs[polling] = run_load(args.students, 1, args.duration, seed=args.seed,
+                                         student_polling=polling, **options)
+            print(f"{trace:<7} {polling:<9} {r['student_polls_per_min']:>18.1f} {r['calls_per_min']:>10.0f} "
+                  f"{r['kb_received_per_min']:>12.1f}")
+        before, after = runs["fixed"], runs["adaptive"]
+        print(f"  {trace}: student polls {1 - after['student_polls_per_min'] / before['student_polls_per_min']:.0%} "
+              f"lower with adaptive polling")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Teacher-to-student propagation latency benchmark.
+
+Runs one teacher page and several student pages in one browser, all served by
+a shared Code.js emulator (gas_shim.py). The teacher makes timestamped changes
+(moving a widget, switching the traffic light, editing a note, changing the
+background); a MutationObserver on every student page records the moment its
+DOM first reflects each change. A change travels teacherSessionLoop ->
+syncSession on the teacher's push timer, then getSessionData ->
+updateStudentView on each student's poll timer, so the measured latency is the
+staleness those two timers add on top of the backend round trips.
+
+The timers are set per run through window.DASHBOARD_SYNC_CONFIG, so several
+polling configurations can be compared in one invocation. A configuration is
+teacherPushMs:studentPollMs, optionally followed by :studentPollMaxMs; without
+it the student poll does not back off, so the interval is fixed. The output is the
+latency distribution per change type and per configuration.
+
+The emulator answers instantly; the numbers therefore isolate timer-induced
+staleness and page work, not Apps Script latency.
+
+Usage: python verification/propagation_latency.py [--students 4] [--changes 8]
+       [--configs 2000:3000,1000:1500,2000:3000:15000]
+"""
+
+import os
+import sys
+import random
+import argparse
+from contextlib import ExitStack
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+from percentiles import percentile
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1280, "height": 720}
+DEFAULT_CONFIGS = "2000:3000,1000:1500,500:1000"
+
+# Student side: __watchFor(key, test, arg) records when test(arg) first holds after a DOM mutation
+WATCH_JS = """
+(() => {
+    const state = window.__propagation = { watches: [], seen: {} };
+    const check = () => {
+        const now = performance.timeOrigin + performance.now();
+        state.watches = state.watches.filter(w => {
+            let done = false;
+            try { done = w.test(w.arg); } catch (e) {}
+            if (done) state.seen[w.key] = now;
+            return !done;
+        });
+    };
+    window.__watchFor = (key, test, arg) => {
+        state.watches.push({ key, test, arg });
+        check();
+    };
+    new MutationObserver(check).observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+})();
+"""
+
+# Change type -> (teacher action returning its timestamp, student predicate). Both take [id, value].
+CHANGES = {
+    "clock: move": (
+        """([id, x]) => {
+            widgets.find(w => w.id === id).el.style.left = x + 'px';
+            return performance.timeOrigin + performance.now();
+        }""",
+        """([id, x]) => document.getElementById('widget-' + id).style.left === x + 'px'""",
+    ),
+    "traffic: light": (
+        """([id, color]) => {
+            const el = widgets.find(w => w.id === id).el;
+            el.querySelector(`.traffic-light[data-color="${color}"]`).click();
+            return performance.timeOrigin + performance.now();
+        }""",
+        """([id, color]) => {
+            const light = document.getElementById('widget-' + id).querySelector('.traffic-light.active');
+            return !!light && light.dataset.color === color;
+        }""",
+    ),
+    "text: edit": (
+        """([id, text]) => {
+            widgets.find(w => w.id === id).el.querySelector('.widget-content div').innerHTML = text;
+            return performance.timeOrigin + performance.now();
+        }""",
+        """([id, text]) => document.getElementById('widget-' + id).querySelector('.widget-content div').innerHTML === text""",
+    ),
+    "dashboard: background": (
+        """([id, bg]) => {
+            setBg(bg);
+            return performance.timeOrigin + performance.now();
+        }""",
+        """([id, bg]) => document.getElementById('app-body').classList.contains(bg)""",
+    ),
+}
+TRAFFIC_COLORS = ["red", "yellow", "green"]
+BACKGROUNDS = ["bg-emerald-800", "bg-sky-200", "bg-orange-100", "bg-slate-900"]
+
+def parse_configs(text):
+    """'2000:3000,1000:1500:6000' -> [(2000, 3000, 3000), (1000, 1500, 6000)]
+    as (teacher push ms, student poll ms, student poll backoff cap ms)."""
+    configs = []
+    for item in text.split(","):
+        push, poll, *cap = (int(v) for v in item.split(":"))
+        configs.append((push, poll, cap[0] if cap else poll))
+    return configs
+
+def sync_config_script(push_ms, poll_ms, poll_max_ms):
+    return (f"window.DASHBOARD_SYNC_CONFIG = {{ teacherPushMs: {push_ms}, studentPollMs: {poll_ms}, "
+            f"studentPollMaxMs: {poll_max_ms} }};")
+
+def change_value(change, k, ids):
+    """The k-th distinct value for a change type, and the widget it targets."""
+    if change == "clock: move":
+        return ids["clock"], 40 + (k + 1) * 13
+    if change == "traffic: light":
+        return ids["traffic"], TRAFFIC_COLORS[k % len(TRAFFIC_COLORS)]
+    if change == "text: edit":
+        return ids["text"], f"Change {k}"
+    return 0, BACKGROUNDS[k % len(BACKGROUNDS)]
+
+def measure_config(pool, push_ms, poll_ms, poll_max_ms, students, changes_per_type, rng):
+    """Runs one polling configuration and returns {change type: [latency ms, ...]}."""
+    backend = Backend()
+    timeout = 5 * (push_ms + poll_max_ms)
+    with ExitStack() as stack:
+        teacher_context = stack.enter_context(pool.context(viewport=VIEWPORT))
+        install_backend(teacher_context, backend, user="teacher@example.com")
+        teacher_context.add_init_script(sync_config_script(push_ms, poll_ms, poll_max_ms))
+        teacher = teacher_context.new_page()
+        pool.load(teacher, URL_FILE)
+
+        ids = {t: teacher.evaluate("type => { spawnWidget(type); return nextId - 1; }", t)
+               for t in ("clock", "traffic", "text")}
+        teacher.evaluate("startLiveSession()")
+        teacher.wait_for_selector("#session-indicator", state="visible")
+        code = teacher.locator("#session-code-display").inner_text()
+
+        student_pages = []
+        for i in range(students):
+            context = stack.enter_context(pool.context(viewport=VIEWPORT))
+            install_backend(context, backend, user=f"student-{i}@example.com")
+            context.add_init_script(sync_config_script(push_ms, poll_ms, poll_max_ms))
+            context.add_init_script(WATCH_JS)
+            page = context.new_page()
+            pool.load(page, f"{URL_FILE}?join={code}")
+            page.evaluate("handleJoinSession()")
+            # The first poll replaces the pinned copies with mirrored session widgets
+            page.wait_for_selector(f"#widget-{ids['text']}", state="attached", timeout=timeout)
+            student_pages.append(page)
+
+        schedule = [c for c in CHANGES for _ in range(changes_per_type)]
+        rng.shuffle(schedule)
+        counters = {c: 0 for c in CHANGES}
+        latencies = {c: [] for c in CHANGES}
+        for n, change in enumerate(schedule):
+            action, predicate = CHANGES[change]
+            target, value = change_value(change, counters[change], ids)
+            counters[change] += 1
+            key = f"c{n}"
+            for page in student_pages:
+                page.evaluate(f"([key, arg]) => __watchFor(key, {predicate}, arg)", [key, [target, value]])
+            changed_at = teacher.evaluate(action, [target, value])
+            for page in student_pages:
+                page.wait_for_function("key => key in window.__propagation.seen", arg=key, timeout=timeout)
+                latencies[change].append(page.evaluate("key => window.__propagation.seen[key]", key) - changed_at)
+            # Land the next change at a random phase of the timers
+            teacher.wait_for_timeout(rng.uniform(0, push_ms))
+        return latencies
+
+def print_config(push_ms, poll_ms, poll_max_ms, latencies):
+    backoff = f" backing off to {poll_max_ms} ms" if poll_max_ms > poll_ms else ""
+    print(f"--- Teacher push {push_ms} ms, student poll {poll_ms} ms{backoff} ---")
+    print(f"{'Change':<24} {'n':>4} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    everything = []
+    for change, values in latencies.items():
+        everything.extend(values)
+        print(f"{change:<24} {len(values):>4} {percentile(values, 50):>8.0f} "
+              f"{percentile(values, 95):>8.0f} {max(values, default=0):>8.0f}")
+    print(f"{'all':<24} {len(everything):>4} {percentile(everything, 50):>8.0f} "
+          f"{percentile(everything, 95):>8.0f} {max(everything, default=0):>8.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long teacher changes take to reach student screens.")
+    parser.add_argument("--students", type=int, default=4, help="Student pages (default: %(default)s)")
+    parser.add_argument("--changes", type=int, default=8, help="Changes per change type (default: %(default)s)")
+    parser.add_argument("--configs", default=DEFAULT_CONFIGS,
+                        help="Comma-separated teacherPushMs:studentPollMs[:studentPollMaxMs] (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        for push_ms, poll_ms, poll_max_ms in parse_configs(args.configs):
+            latencies = measure_config(pool, push_ms, poll_ms, poll_max_ms, args.students, args.changes, rng)
+            print_config(push_ms, poll_ms, poll_max_ms, latencies)
+
+if __name__ == "__main__":
+    main()
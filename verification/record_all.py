@@ -7,15 +7,38 @@ for each scenario, intended for use in a product release video.
 
 Features:
 - "Cinematic Mode": Injects a custom cursor and smooth camera pan/zoom.
-- Mocks: Simulates Google Apps Script backend and hardware (microphone/camera).
+- Backend: google.script.run is served by the Code.js emulator through the
+  shared shim (gas_shim.py); hardware (microphone/camera) is mocked.
 - Scenarios: Covers 17 distinct features/widgets.
-- Usage: python verification/record_all.py [scenarios...]
+- Parallelism: --jobs N spreads scenarios across N worker processes, each with
+  its own Playwright instance.
+- Browser reuse: each process keeps one Chromium up for all of its scenarios
+  and gives every scenario a fresh BrowserContext.
+- Virtual time: --virtual-time drives the page with a fake clock and encodes
+  frames at a fixed timestep (see virtual_time.py) instead of screencasting.
+- Incremental: videos whose inputs (index.html, backend, scenario source,
+  settings) are unchanged are skipped; see build_cache.py.
+- Offline: CDN assets are served from the local asset cache once fetched
+  (asset_cache.py); --offline fails on anything it cannot serve.
+- Usage: python verification/record_all.py [--jobs N] [--virtual-time [--fps N]]
+         [--force] [--only-stale] [--offline | --record-assets] [scenarios...]
 """
 
 import os
 import sys
+import time
+import queue
+import shutil
+import tempfile
 import argparse
+import traceback
+import multiprocessing
 from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool, merge_stats, format_report
+from virtual_time import VirtualRecorder, install_clock, DEFAULT_FPS
+from build_cache import BuildCache, artifact_key, select_stale, add_cache_arguments, INDEX_HTML
+from gas_shim import Backend, install_backend, BACKEND_SOURCES
+from asset_cache import AssetCache, add_asset_arguments, check_offline
 
 # Constants
 OUTPUT_DIR = "videos/"
@@ -23,104 +46,8 @@ URL_FILE = f"file://{os.path.abspath('index.html')}"
 ZOOM_MIN_SCALE = 1.2
 ZOOM_MAX_SCALE = 2.5
 ZOOM_TARGET_HEIGHT_RATIO = 0.6
-
-def mock_google_script(page):
-    """Injects the google.script.run mock into the page using a robust builder pattern."""
-    page.evaluate("""
-        window.google = {
-            script: {
-                run: (function() {
-                    function Runner(success, failure) {
-                        this._success = success;
-                        this._failure = failure;
-                    }
-
-                    Runner.prototype.withSuccessHandler = function(cb) {
-                        return new Runner(cb, this._failure);
-                    };
-
-                    Runner.prototype.withFailureHandler = function(cb) {
-                        return new Runner(this._success, cb);
-                    };
-
-                    // Define API methods
-                    const methods = {
-                        createSession: function(data) {
-                            if (this._success) {
-                                this._success({
-                                    success: true,
-                                    code: 'DEMO12',
-                                    data: JSON.parse(data)
-                                });
-                            }
-                        },
-                        joinSession: function(code) {
-                            if (this._success) {
-                                this._success({
-                                    success: true,
-                                    data: {
-                                        bg: 'bg-slate-900',
-                                        widgets: [
-                                            { id: 't1', type: 'clock', x: 100, y: 100, w: 280, h: 160, z: 1, allowInteraction: false, data: { is24h: false, showSeconds: true } }
-                                        ],
-                                        polls: {}
-                                    }
-                                });
-                            }
-                        },
-                        getSessionData: function(code) {
-                            if (this._success) {
-                                this._success({
-                                    success: true,
-                                    active: true,
-                                    data: {
-                                        paused: false,
-                                        widgets: [],
-                                        polls: {'poll-1': {A: 5, B: 3}}
-                                    }
-                                });
-                            }
-                        },
-                        updateSession: function(code, data) {
-                            console.log("Session updated");
-                        },
-                        setSessionPaused: function(code, paused) {
-                            if (this._success) this._success({ success: true, paused: paused });
-                        },
-                        endSession: function(code) {
-                            if (this._success) this._success({ success: true });
-                        },
-                        saveDashboard: function(name, state) {
-                            if (this._success) this._success({ success: true, message: 'Saved!' });
-                        },
-                        getDashboards: function() {
-                            if (this._success) this._success(JSON.stringify({
-                                'My Saved Dashboard': { bg: 'bg-slate-900', widgets: [] }
-                            }));
-                        },
-                        updateWidgetState: function(code, id, state) {
-                            console.log("Widget updated");
-                        },
-                        submitPollResponse: function(code, id, opt) {
-                            if (this._success) this._success({ success: true, polls: {A: 1, B: 0} });
-                        },
-                        getScriptUrl: function() {
-                            if (this._success) this._success("https://script.google.com/macros/s/...");
-                        }
-                    };
-
-                    // Attach methods to Runner prototype
-                    Object.assign(Runner.prototype, methods);
-
-                    // Return a default instance which serves as the root google.script.run
-                    return new Runner(null, null);
-                })()
-            }
-        };
-        window.spawnWidget = window.spawnWidget || function() {
-            throw new Error("spawnWidget called before it is ready");
-        };
-    """)
+MOVE_DURATION_MS = 300  # Virtual-time duration of one Director mouse glide
+RESULT_POLL_SECONDS = 5  # How often run_parallel checks for dead workers while waiting
 
 def inject_cinematic_styles(page):
     """Injects CSS/JS for custom cursor and camera animations."""
@@ -222,9 +149,43 @@ def inject_cinematic_styles(page):
     """)
 
 class Director:
-    """Helper class for cinematic interactions."""
-    def __init__(self, page):
+    """Helper class for cinematic interactions.
+
+    All pauses go through wait() so that the same scenario can run in real time
+    or, with a VirtualRecorder, on the page's virtual clock.
+    """
+    def __init__(self, page, recorder=None, backend=None):
         self.page = page
+        self.recorder = recorder
+        self.backend = backend
+        self.mouse_x = 0
+        self.mouse_y = 0
+
+    def wait(self, ms):
+        """Pauses for ms of (real or virtual) time."""
+        if self.recorder:
+            self.recorder.advance(ms)
+        else:
+            self.page.wait_for_timeout(ms)
+
+    def glide(self, x, y, steps, duration=MOVE_DURATION_MS):
+        """Moves the mouse in `steps` increments; in virtual time they are spread over `duration` ms."""
+        if not self.recorder:
+            self.page.mouse.move(x, y, steps=steps)
+        else:
+            x0, y0 = self.mouse_x, self.mouse_y
+            for i in range(1, steps + 1):
+                self.page.mouse.move(x0 + (x - x0) * i / steps, y0 + (y - y0) * i / steps)
+                self.recorder.advance(duration / steps)
+        self.mouse_x, self.mouse_y = x, y
+
+    def drag(self, x0, y0, x1, y1, steps=20):
+        """Presses at (x0, y0), glides to (x1, y1) and releases."""
+        self.page.mouse.move(x0, y0)
+        self.mouse_x, self.mouse_y = x0, y0
+        self.page.mouse.down()
+        self.glide(x1, y1, steps)
+        self.page.mouse.up()
 
     def move_to(self, locator):
         """Smooth move to center of locator."""
@@ -232,39 +193,44 @@ class Director:
         if box:
             x = box['x'] + box['width'] / 2
             y = box['y'] + box['height'] / 2
-            self.page.mouse.move(x, y, steps=30)
+            self.glide(x, y, steps=30)
             return x, y
         return 0, 0
 
     def click(self, locator):
         """Cinematic click: move, wait, click, wait."""
         self.move_to(locator)
-        self.page.wait_for_timeout(100)
+        self.wait(100)
         locator.click()
-        self.page.wait_for_timeout(300)
+        self.wait(300)
 
     def type(self, locator, text):
         """Cinematic type: click then slow type (simulates user typing)."""
         self.click(locator)
-        locator.type(text, delay=100)
-        self.page.wait_for_timeout(500)
+        if self.recorder:
+            for char in text:
+                self.page.keyboard.type(char)
+                self.wait(100)
+        else:
+            locator.type(text, delay=100)
+        self.wait(500)
 
     def fill(self, locator, text):
         """Immediate fill: moves to element then fills value (for replacements)."""
         self.move_to(locator)
-        self.page.wait_for_timeout(100)
+        self.wait(100)
         locator.fill(text)
-        self.page.wait_for_timeout(300)
+        self.wait(300)
 
     def press(self, locator, key):
         """Press a key on the element."""
         self.move_to(locator)
         locator.press(key)
-        self.page.wait_for_timeout(300)
+        self.wait(300)
 
     def zoom_to_widget(self, locator):
         """Zooms the camera to frame the widget."""
-        self.page.wait_for_timeout(500)
+        self.wait(500)
         box = locator.bounding_box()
         if box:
             cx = box['x'] + box['width'] / 2
@@ -276,50 +242,190 @@ class Director:
             if scale > ZOOM_MAX_SCALE: scale = ZOOM_MAX_SCALE
 
             self.page.evaluate(f"window.setCamera({cx}, {cy}, {scale})")
-            self.page.wait_for_timeout(1200)
+            self.wait(1200)
 
     def reset_camera(self):
         """Resets camera to default view."""
         self.page.evaluate("window.setCamera(0, 0, 1)")
-        self.page.wait_for_timeout(1200)
+        self.wait(1200)
+
+def record_scenario(pool, name, action_callback, fps=None):
+    """Records a single scenario to a video file.
+
+    The video is written into a private temp directory so that concurrent
+    workers never see each other's in-progress files. With `fps` set, the
+    scenario runs in virtual time and frames are encoded by a VirtualRecorder
+    instead of Playwright's real-time screencast.
 
-def record_scenario(playwright, name, action_callback):
-    """Records a single scenario to a video file."""
+    Returns a result dict with the scenario name, duration and error (if any).
+    """
     print(f"--- Recording Scenario: {name} ---")
-    browser = playwright.chromium.launch(headless=True)
-    context = browser.new_context(
-        record_video_dir=OUTPUT_DIR,
-        record_video_size={"width": 1280, "height": 720},
-        viewport={"width": 1280, "height": 720}
-    )
-    page = context.new_page()
-    page.goto(URL_FILE)
-
-    mock_google_script(page)
-    inject_cinematic_styles(page)
-
-    director = Director(page)
-    try:
-        action_callback(director)
-    except Exception as e:
-        print(f"Error in scenario {name}: {e}")
-        import traceback
-        traceback.print_exc()
-
-    # Retrieve path before closing context
-    video_path = page.video.path()
-
-    context.close()
-    browser.close()
+    start = time.monotonic()
+    error = None
+    video_dir = tempfile.mkdtemp(prefix=f".{name}-", dir=OUTPUT_DIR)
+
+    context_options = {"viewport": {"width": 1280, "height": 720}}
+    if not fps:
+        context_options.update(
+            record_video_dir=video_dir,
+            record_video_size={"width": 1280, "height": 720}
+        )
+
+    with pool.context(**context_options) as context:
+        backend = install_backend(context, Backend(session_codes=["DEMO12"]))
+        page = context.new_page()
+        if fps:
+            install_clock(page)
+        pool.load(page, URL_FILE)
+
+        inject_cinematic_styles(page)
+
+        recorder = None
+        try:
+            if fps:
+                recorder = VirtualRecorder(page, os.path.join(video_dir, f"{name}.webm"), fps)
+            director = Director(page, recorder, backend)
+            action_callback(director)
+            if recorder:
+                # Hold the final frame briefly, like the screencast does while the context closes
+                director.wait(500)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Error in scenario {name}: {e}")
+            traceback.print_exc()
+
+        # Retrieve path before closing context; closing the recorder waits for ffmpeg,
+        # so an encode failure is this scenario's error, not the whole run's
+        try:
+            if not fps:
+                video_path = page.video.path()
+            elif recorder:
+                video_path = recorder.close()
+            else:
+                video_path = None
+        except Exception as e:
+            video_path = None
+            error = error or f"{type(e).__name__}: {e}"
+            print(f"Error saving video of {name}: {e}")
+            traceback.print_exc()
 
     if video_path and os.path.exists(video_path):
-        new_path = os.path.join(OUTPUT_DIR, f"{name}.webm")
+        new_path = video_output_path(name)
         if os.path.exists(new_path):
             os.remove(new_path)
-        os.rename(video_path, new_path)
+        shutil.move(video_path, new_path)
         print(f"Saved video: {new_path}")
     else:
+        error = error or "video file not found"
         print(f"Warning: Video file not found for {name}")
+    shutil.rmtree(video_dir, ignore_errors=True)
+
+    return {"name": name, "seconds": time.monotonic() - start, "error": error}
+
+def video_output_path(name):
+    return os.path.join(OUTPUT_DIR, f"{name}.webm")
+
+def scenario_key(name, fps):
+    """Build-cache key of a scenario's video: everything that can change its frames."""
+    settings = {
+        "viewport": [1280, 720],
+        "fps": fps,
+        "zoom": [ZOOM_MIN_SCALE, ZOOM_MAX_SCALE, ZOOM_TARGET_HEIGHT_RATIO],
+        "move_ms": MOVE_DURATION_MS,
+    }
+    return artifact_key(INDEX_HTML, *BACKEND_SOURCES, inject_cinematic_styles, Director,
+                        SCENARIOS[name], settings)
+
+def _record_worker(task_queue, result_queue, current, names, fps, asset_options):
+    """Worker process: owns one Playwright instance and browser, records queued scenarios until it gets None.
+
+    Tasks are indices into `names`; `current` holds the one being recorded (-1
+    between scenarios), so the parent can tell what a worker that died was doing.
+    Puts ("result", pid, dict) for every scenario and a final ("pool", pid, stats) message.
+    """
+    pid = os.getpid()
+    with sync_playwright() as p, BrowserPool(p, assets=AssetCache(**asset_options)) as pool:
+        while True:
+            index = task_queue.get()
+            if index is None:
+                break
+            current.value = index
+            name = names[index]
+            try:
+                result = record_scenario(pool, name, SCENARIOS[name], fps)
+            except Exception as e:
+                traceback.print_exc()
+                result = {"name": name, "seconds": 0.0, "error": f"{type(e).__name__}: {e}"}
+            result_queue.put(("result", pid, result))
+            current.value = -1
+    result_queue.put(("pool", pid, pool.stats()))
+
+def run_parallel(names, jobs, fps=None, asset_options=None):
+    """Records scenarios across `jobs` worker processes.
+
+    A worker that dies without reporting (OOM, browser crash) fails the
+    scenario it was recording, and once every worker is gone the scenarios
+    nobody got to fail too. Returns the results in input order and the merged
+    browser pool stats of the workers that finished.
+    """
+    task_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    for index in range(len(names)):
+        task_queue.put(index)
+    currents = [multiprocessing.Value("i", -1) for _ in range(min(jobs, len(names)))]
+    workers = [
+        multiprocessing.Process(target=_record_worker,
+                                args=(task_queue, result_queue, current, names, fps, asset_options or {}))
+        for current in currents
+    ]
+    for worker in workers:
+        task_queue.put(None)
+        worker.start()
+
+    results, pool_stats = {}, []
+    reported = set()  # Pids of the workers that sent their pool stats
+
+    def waiting():
+        return len(results) < len(names) or any(w.is_alive() and w.pid not in reported for w in workers)
+
+    while waiting():
+        try:
+            kind, pid, payload = result_queue.get(timeout=RESULT_POLL_SECONDS)
+        except queue.Empty:
+            for worker, current in zip(workers, currents):
+                if worker.is_alive() or current.value < 0:
+                    continue
+                name, current.value = names[current.value], -1
+                if name not in results:
+                    print(f"Error: worker {worker.pid} died (exit code {worker.exitcode}) while recording {name}")
+                    results[name] = {"name": name, "seconds": 0.0,
+                                     "error": f"worker died (exit code {worker.exitcode})"}
+            if not any(w.is_alive() for w in workers):
+                for name in names:
+                    results.setdefault(name, {"name": name, "seconds": 0.0, "error": "not recorded: every worker died"})
+            continue
+        if kind == "result":
+            results[payload["name"]] = payload
+        else:
+            reported.add(pid)
+            pool_stats.append(payload)
+    for worker in workers:
+        worker.join()
+    return [results[name] for name in names], merge_stats(pool_stats)
+
+def print_summary(results, wall_seconds):
+    """Prints a per-scenario duration/failure table."""
+    width = max([len("Scenario")] + [len(r["name"]) for r in results])
+    print()
+    print(f"{'Scenario':<{width}}  {'Time (s)':>8}  Status")
+    print(f"{'-' * width}  {'-' * 8}  {'-' * 6}")
+    for r in results:
+        status = "ok" if not r["error"] else f"FAILED ({r['error']})"
+        print(f"{r['name']:<{width}}  {r['seconds']:>8.1f}  {status}")
+    total = sum(r["seconds"] for r in results)
+    failed = sum(1 for r in results if r["error"])
+    print(f"\n{len(results)} scenarios, {failed} failed. "
+          f"Wall time {wall_seconds:.1f}s (sum of scenario times {total:.1f}s).")
 
 # --- Scenarios ---
 
@@ -343,7 +449,7 @@ def scenario_timer(d):
     d.zoom_to_widget(w)
 
     d.click(w.locator(".btn-start"))
-    d.page.wait_for_timeout(2000)
+    d.wait(2000)
     d.click(w.locator(".btn-pause"))
     d.click(w.locator(".btn-reset"))
 
@@ -372,7 +478,7 @@ def scenario_dice(d):
     d.zoom_to_widget(w)
 
     d.click(w.locator(".btn-roll"))
-    d.page.wait_for_timeout(1000)
+    d.wait(1000)
 
     d.click(w.locator(".btn-settings"))
     d.click(w.locator(".inp-count")) # Focus first
@@ -380,7 +486,7 @@ def scenario_dice(d):
     d.click(w.locator(".btn-settings-done"))
 
     d.click(w.locator(".btn-roll"))
-    d.page.wait_for_timeout(1000)
+    d.wait(1000)
     d.reset_camera()
 
 def scenario_qr(d):
@@ -457,7 +563,7 @@ def scenario_random(d):
     d.fill(w.locator(".inp-list"), "Emily\\nMichael\\nJacob\\nJoshua\\nMatthew")
     d.click(w.locator(".btn-settings-done"))
     d.click(w.locator(".btn-pick"))
-    d.page.wait_for_timeout(2000)
+    d.wait(2000)
     d.reset_camera()
 
 def scenario_sound(d):
@@ -494,7 +600,7 @@ def scenario_sound(d):
     d.zoom_to_widget(w)
 
     d.click(w.locator(".btn-mic-start"))
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     # Animate sound levels with realistic patterns
     d.page.evaluate("""
@@ -527,7 +633,7 @@ def scenario_sound(d):
         }
     """)
 
-    d.page.wait_for_timeout(6000)
+    d.wait(6000)
 
     # Clear interval
     d.page.evaluate("window.__micBarInterval && clearInterval(window.__micBarInterval)")
@@ -545,18 +651,12 @@ def scenario_drawing(d):
     if not box:
         raise RuntimeError("Canvas bounding box not found")
 
-    d.page.mouse.move(box["x"] + 100, box["y"] + 100)
-    d.page.mouse.down()
-    d.page.mouse.move(box["x"] + 200, box["y"] + 100, steps=20)
-    d.page.mouse.up()
+    d.drag(box["x"] + 100, box["y"] + 100, box["x"] + 200, box["y"] + 100)
 
     d.move_to(w)
     d.click(w.locator(".btn-color[data-color='#ef4444']"))
 
-    d.page.mouse.move(box["x"] + 50, box["y"] + 50)
-    d.page.mouse.down()
-    d.page.mouse.move(box["x"] + 300, box["y"] + 300, steps=20)
-    d.page.mouse.up()
+    d.drag(box["x"] + 50, box["y"] + 50, box["x"] + 300, box["y"] + 300)
     d.reset_camera()
 
 def scenario_poll(d):
@@ -579,52 +679,52 @@ def scenario_poll(d):
 def scenario_backgrounds(d):
     """Demonstrates switching backgrounds."""
     # Wait for page to be fully ready
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     d.click(d.page.locator("#btn-bg-menu"))
-    d.page.wait_for_timeout(300)
+    d.wait(300)
     d.click(d.page.locator(".bg-opt").nth(1))
-    d.page.wait_for_timeout(800)
+    d.wait(800)
 
     d.click(d.page.locator("#btn-bg-menu"))
-    d.page.wait_for_timeout(300)
+    d.wait(300)
     d.click(d.page.locator(".bg-opt").nth(2))
-    d.page.wait_for_timeout(800)
+    d.wait(800)
 
     d.click(d.page.locator("#btn-bg-menu"))
-    d.page.wait_for_timeout(300)
+    d.wait(300)
     d.click(d.page.locator(".bg-opt").last)
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
 def scenario_save_load(d):
     """Demonstrates Save/Load with Dialog handling."""
     # Wait for page to be fully ready
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     # Spawn and wait for widget to appear
     d.page.evaluate("spawnWidget('clock')")
     w = d.page.locator(".widget", has_text="Clock")
     w.wait_for()
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     # Save dashboard
     d.page.once("dialog", lambda dialog: dialog.accept("Demo Dashboard"))
     d.click(d.page.locator("#btn-save"))
-    d.page.wait_for_timeout(1000)
+    d.wait(1000)
 
     # Delete the widget so we have clean view for dashboards panel
     d.page.evaluate("document.querySelector('.widget').remove()")
-    d.page.wait_for_timeout(300)
+    d.wait(300)
 
     # Open My Dashboards
     d.click(d.page.locator("#btn-my-dashboards"))
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     # Rename dashboard
     d.click(d.page.locator(".btn-edit").first)
     d.fill(d.page.locator(".dashboard-rename-input").first, "Renamed")
     d.press(d.page.locator(".dashboard-rename-input").first, "Enter")
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     # Close panel
     d.click(d.page.locator("#btn-my-dashboards"))
@@ -632,42 +732,68 @@ def scenario_save_load(d):
 def scenario_teacher_session(d):
     """Demonstrates Live Session controls."""
     # Wait for page to be fully ready
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
     d.click(d.page.locator("#btn-start-session"))
-    d.page.wait_for_timeout(300)
+    d.wait(300)
     d.click(d.page.locator("#btn-menu-start-session"))
-    d.page.wait_for_timeout(1200)
+    d.wait(1200)
 
     # Show the session code
     d.click(d.page.locator("#btn-copy-link"))
-    d.page.wait_for_timeout(1000)
+    d.wait(1000)
 
     # Pause session
     d.page.evaluate("document.getElementById('session-menu').classList.remove('hidden')")
-    d.page.wait_for_timeout(200)
+    d.wait(200)
     d.click(d.page.locator("#btn-menu-pause"))
-    d.page.wait_for_timeout(800)
+    d.wait(800)
 
     # Resume session
     d.page.evaluate("document.getElementById('session-menu').classList.remove('hidden')")
-    d.page.wait_for_timeout(200)
+    d.wait(200)
     d.click(d.page.locator("#btn-menu-resume"))
-    d.page.wait_for_timeout(800)
+    d.wait(800)
 
     # End session
     d.click(d.page.locator("#btn-end-session"))
-    d.page.wait_for_timeout(500)
+    d.wait(500)
 
 def scenario_student_join(d):
     """Demonstrates Student View via simulated Join."""
+    d.backend.seed_session("DEMO12", "ms.rivera@example.com", {
+        "widgets": [
+            {"id": "t1", "type": "clock", "x": 100, "y": 100, "w": 280, "h": 160, "z": 1,
+             "allowInteraction": False, "data": {"is24h": False, "showSeconds": True}}
+        ]
+    })
     d.page.locator("#student-join-screen").evaluate("el => el.classList.remove('hidden')")
     d.page.locator("#toolbar-container").evaluate("el => el.classList.add('hidden')")
     d.type(d.page.locator("#join-code-input"), "DEMO12")
     d.click(d.page.locator("#btn-join-session"))
-    d.page.wait_for_timeout(2000)
+    d.wait(2000)
     d.click(d.page.locator("#btn-leave-session"))
 
+SCENARIOS = {
+    "clock": scenario_clock,
+    "timer": scenario_timer,
+    "traffic": scenario_traffic,
+    "dice": scenario_dice,
+    "qr": scenario_qr,
+    "text": scenario_text,
+    "checklist": scenario_checklist,
+    "timetable": scenario_timetable,
+    "embed": scenario_embed,
+    "random": scenario_random,
+    "sound": scenario_sound,
+    "drawing": scenario_drawing,
+    "poll": scenario_poll,
+    "backgrounds": scenario_backgrounds,
+    "save_load": scenario_save_load,
+    "teacher_session": scenario_teacher_session,
+    "student_join": scenario_student_join
+}
+
 def main():
     if not os.path.exists('index.html'):
         print("Error: index.html not found. Run from project root.")
@@ -675,38 +801,53 @@ def main():
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    scenarios = {
-        "clock": scenario_clock,
-        "timer": scenario_timer,
-        "traffic": scenario_traffic,
-        "dice": scenario_dice,
-        "qr": scenario_qr,
-        "text": scenario_text,
-        "checklist": scenario_checklist,
-        "timetable": scenario_timetable,
-        "embed": scenario_embed,
-        "random": scenario_random,
-        "sound": scenario_sound,
-        "drawing": scenario_drawing,
-        "poll": scenario_poll,
-        "backgrounds": scenario_backgrounds,
-        "save_load": scenario_save_load,
-        "teacher_session": scenario_teacher_session,
-        "student_join": scenario_student_join
-    }
-
     parser = argparse.ArgumentParser(description="Record demo videos for Classroom Dashboard.")
     parser.add_argument("names", nargs="*", help="Names of scenarios to run (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes, each with its own browser (default: 1)")
+    parser.add_argument("--virtual-time", action="store_true",
+                        help="Render deterministically on a virtual clock instead of screencasting in real time")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS,
+                        help=f"Frame rate for --virtual-time recordings (default: {DEFAULT_FPS})")
+    add_cache_arguments(parser)
+    add_asset_arguments(parser)
     args = parser.parse_args()
 
-    to_run = args.names if args.names else scenarios.keys()
-
-    with sync_playwright() as p:
-        for name in to_run:
-            if name in scenarios:
-                record_scenario(p, name, scenarios[name])
-            else:
-                print(f"Warning: Scenario '{name}' not found.")
+    to_run = []
+    for name in (args.names or SCENARIOS.keys()):
+        if name in SCENARIOS:
+            to_run.append(name)
+        else:
+            print(f"Warning: Scenario '{name}' not found.")
+
+    fps = args.fps if args.virtual_time else None
+    cache = BuildCache(force=args.force)
+    keys = {name: scenario_key(name, fps) for name in to_run}
+    to_run, fresh = select_stale(cache, to_run, keys, video_output_path, bool(args.names), args.only_stale)
+    if fresh:
+        print(f"Skipping {len(fresh)} up-to-date video(s): {', '.join(fresh)}")
+    if not to_run:
+        print("All videos are up to date (use --force to re-record).")
+        return
+
+    start = time.monotonic()
+    asset_options = {"offline": args.offline, "record": args.record_assets}
+    if args.jobs > 1 and len(to_run) > 1:
+        results, pool_stats = run_parallel(to_run, args.jobs, fps, asset_options)
+    else:
+        with sync_playwright() as p, BrowserPool(p, assets=AssetCache(**asset_options)) as pool:
+            results = [record_scenario(pool, name, SCENARIOS[name], fps) for name in to_run]
+        pool_stats = pool.stats()
+
+    for r in results:
+        if not r["error"]:
+            cache.record(video_output_path(r["name"]), keys[r["name"]])
+
+    print_summary(results, time.monotonic() - start)
+    print(format_report(pool_stats))
+    check_offline(pool_stats)
+    if any(r["error"] for r in results):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
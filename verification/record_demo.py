@@ -11,6 +11,8 @@ Outputs:
 """
 
 from playwright.sync_api import sync_playwright
+from gas_shim import Backend, install_backend
+from settle import Settler
 import os
 import sys
 
@@ -32,52 +34,18 @@ def run_and_rename(playwright):
         viewport={"width": 1280, "height": 720}
     )
 
+    # Serve google.script.run from the Code.js emulator
+    backend = Backend(session_codes=["DEMO12"])
+    install_backend(context, backend)
+    settler = Settler()
+    settler.install(context)
+
     page = context.new_page()
 
     # Load the local index.html
     # Assumes script is run from repo root
     page.goto(f"file://{os.path.abspath('index.html')}")
 
-    # Mock google.script.run interactions for the frontend
-    page.evaluate("""
-        window.google = {
-            script: {
-                run: {
-                    withSuccessHandler: function(callback) {
-                        this.callback = callback;
-                        return this;
-                    },
-                    withFailureHandler: function(callback) {
-                        return this;
-                    },
-                    createSession: function(data) {
-                        if (this.callback) {
-                            this.callback({
-                                success: true,
-                                code: 'DEMO12',
-                                data: JSON.parse(data)
-                            });
-                        }
-                    },
-                    updateSession: function(code, data) {
-                        console.log("Session updated");
-                    },
-                    setSessionPaused: function(code, paused) {
-                        if (this.callback) {
-                            this.callback({
-                                success: true,
-                                paused: paused
-                            });
-                        }
-                    },
-                    getDashboards: function() {
-                        if (this.callback) this.callback(JSON.stringify({}));
-                    }
-                }
-            }
-        };
-    """)
-
     print("--- Starting Interaction Recording ---")
 
     # 1. Start Session
@@ -97,23 +65,22 @@ def run_and_rename(playwright):
         widget_locator.wait_for(state="visible")
         print("Action: Spawned Clock Widget")
 
-        # Wait a bit to capture the clock ticking in the video
+        # Wait a bit to capture the clock ticking in the video (a deliberate pause, not a settle)
         page.wait_for_timeout(2000)
 
         # 3. Open Widget Settings
         # Find the settings button on the widget
         widget_locator.locator(".btn-settings").click()
         print("Action: Opened Widget Settings")
-        page.wait_for_timeout(1000)
+        settler.wait(page, "settings flip")
 
         # 4. Toggle Interaction Checkbox
-        # The settings form is on the back face of the card
-        # We might need to wait for the flip animation or just check visibility
+        # The settings form is on the back face of the card, shown once the flip has settled
         interact_checkbox = widget_locator.locator(".inp-interact")
         if interact_checkbox.is_visible():
             interact_checkbox.click()
             print("Action: Toggled Student Interaction")
-            page.wait_for_timeout(1000)
+            settler.wait(page, "toggle")
 
     except Exception as e:
         print(f"Error during widget spawning or interaction: {e}")
@@ -128,7 +95,7 @@ def run_and_rename(playwright):
     page.locator("#btn-start-session").click()
     page.wait_for_selector("#session-menu", state="visible")
     page.locator("#btn-menu-pause").click()
-    page.wait_for_timeout(1000) # Wait for toast/UI update
+    settler.wait(page, "pause") # Wait for toast/UI update
     print("Action: Paused Session")
 
     # Retrieve video path before closing
@@ -148,5 +115,8 @@ def run_and_rename(playwright):
     else:
         print("Error: Video file not found.")
 
+    print(backend.report())
+    print(settler.report())
+
 with sync_playwright() as playwright:
     run_and_rename(playwright)
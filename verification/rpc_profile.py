@@ -0,0 +1,106 @@
+"""
+google.script.run under realistic latency: does the teacher's sync loop pile up?
+
+For each network profile (gas_shim.PROFILES) a teacher loads index.html,
+starts a live session and keeps moving one of --widgets widgets every
+--move-ms for --seconds, so every teacherSessionLoop tick has a patch to push.
+The page's google.script.run log is then summarized per function: calls,
+injected failures, p50/p95/max round trip and the most calls of that function
+in flight at once. teacherSessionLoop fires every SYNC_CONFIG.teacherPushMs
+(2 s) whether or not the previous syncSession has answered, so a syncSession
+peak above 1 means pushes overlap and may land out of order.
+
+Failures are injected with the profile's error and seeded by --seed; starting
+the session is retried until createSession gets through.
+
+Usage: python verification/rpc_profile.py [fast-lan school-wifi ...] [--seconds 30]
+       [--widgets 4] [--move-ms 500] [--seed 0]
+"""
+
+import os
+import sys
+import argparse
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend, PROFILES, rpc_calls, rpc_summary, format_rpc_report
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1366, "height": 768}
+USER = "teacher@example.com"
+BOARD_TYPES = ["clock", "text", "traffic", "checklist", "poll", "random"]
+START_ATTEMPTS = 5
+
+# Nudges one widget per call, round robin, as a drag would
+MOVE_JS = """
+step => {
+    const w = widgets[step % widgets.length];
+    if (!w) return;
+    w.el.style.left = (40 + (step * 40) % 800) + 'px';
+}
+"""
+
+def start_session(page, timeout_ms):
+    """Starts a live session, retrying when createSession fails; False if it never did."""
+    for _ in range(START_ATTEMPTS):
+        page.locator("#btn-start-session").click()
+        page.wait_for_selector("#session-menu", state="visible")
+        page.locator("#btn-menu-start-session").click()
+        try:
+            page.wait_for_selector("#session-indicator", state="visible", timeout=timeout_ms)
+            return True
+        except Exception:
+            continue
+    return False
+
+def run_profile(pool, profile, seconds, widgets, move_ms, seed):
+    """The teacher page's google.script.run log after `seconds` of a live session."""
+    with pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, Backend(), user=USER, profile=profile, seed=seed)
+        page = context.new_page()
+        pool.load(page, URL_FILE)
+        page.wait_for_load_state("load")
+        for i in range(widgets):
+            page.evaluate("type => spawnWidget(type)", BOARD_TYPES[i % len(BOARD_TYPES)])
+        p = PROFILES[profile]
+        if not start_session(page, 2 * (p.latency_ms + p.jitter_ms) + 5000):
+            print(f"Warning: no session could be started under {profile}")
+            return rpc_calls(page)
+        for step in range(int(seconds * 1000 / move_ms)):
+            page.evaluate(MOVE_JS, step)
+            page.wait_for_timeout(move_ms)
+        # Let the calls in flight finish
+        page.wait_for_function("window.__gasPending === 0", timeout=2 * (p.latency_ms + p.jitter_ms) + 5000)
+        return rpc_calls(page)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a live teacher session under google.script.run network profiles.")
+    parser.add_argument("profiles", nargs="*", help=f"Profiles to run (default: all of {', '.join(PROFILES)})")
+    parser.add_argument("--seconds", type=float, default=30, help="Session length per profile (default: %(default)s)")
+    parser.add_argument("--widgets", type=int, default=4, help="Widgets on the board (default: %(default)s)")
+    parser.add_argument("--move-ms", type=int, default=500, help="Time between widget moves (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency and failure draws (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    unknown = [p for p in args.profiles if p not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profile(s): {', '.join(unknown)} (known: {', '.join(PROFILES)})")
+
+    piled_up = []
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        for profile in args.profiles or list(PROFILES):
+            print(f"--- {profile}: {PROFILES[profile].description} ---")
+            calls = run_profile(pool, profile, args.seconds, args.widgets, args.move_ms, args.seed)
+            print(format_rpc_report(calls))
+            sync = rpc_summary(calls).get("syncSession")
+            if sync and sync["peak_in_flight"] > 1:
+                piled_up.append(profile)
+
+    if piled_up:
+        print(f"syncSession calls overlapped under: {', '.join(piled_up)}")
+
+if __name__ == "__main__":
+    main()
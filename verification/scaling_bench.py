@@ -0,0 +1,181 @@
+"""
+Many-widget scaling benchmark for the dashboard's hot paths.
+
+Fills a board with 1, 10, 50 and 200 widgets (a mix of the types that render
+without camera, microphone or network, as in capture_bench.py) and measures,
+per widget count:
+
+- spawn ms: spawnWidget() for the last widget added, up to the next frame
+  (median of the last few spawns);
+- drag p50/p95 ms: frame intervals while a widget is dragged, handleMove()
+  being fed one mouse position per animation frame as the browser does;
+  16.7 ms is a smooth 60 fps;
+- state ms: getDashboardState() right after a widget moved, which is what
+  teacherSessionLoop pays every 2 s (the offset reads force a layout);
+- student ms: updateStudentView() with the session data of the same board
+  after one widget moved, which every student poll that changed something
+  pays.
+
+Results are printed as a table and written as JSON (--output) so runs on
+different machines or commits can be compared. --cpu applies Chrome's CPU
+throttling to mimic slower classroom laptops.
+
+Usage: python verification/scaling_bench.py [--widgets 1,10,50,200] [--runs 20]
+       [--cpu 1] [--output scaling_bench.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+from capture_bench import WIDGET_TYPES, parse_list
+from percentiles import percentile
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1920, "height": 1080}
+SMOOTH_FRAME_MS = 1000 / 60
+SPAWN_SAMPLES = 5
+
+# Spawns widgets until there are `count`, timing the last SPAWN_SAMPLES of them to the next frame
+FILL_JS = """
+async ([types, count, samples]) => {
+    const frame = () => new Promise(resolve => requestAnimationFrame(resolve));
+    const times = [];
+    for (let i = widgets.length; i < count; i++) {
+        const timed = i >= count - samples;
+        if (timed) await frame();
+        const start = performance.now();
+        spawnWidget(types[i % types.length]);
+        const w = widgets[widgets.length - 1];
+        w.el.style.left = (i * 37) % Math.max(1, window.innerWidth - 300) + 'px';
+        w.el.style.top = (i * 53) % Math.max(1, window.innerHeight - 300) + 'px';
+        if (timed) {
+            await frame();
+            times.push(performance.now() - start);
+        }
+    }
+    return times;
+}
+"""
+
+# Drags the first widget for `frames` animation frames and returns the frame intervals
+DRAG_JS = """
+async (frames) => {
+    const w = widgets[0];
+    const header = w.el.querySelector('.widget-header');
+    const rect = header.getBoundingClientRect();
+    const x0 = rect.left + 20, y0 = rect.top + 10;
+    startDrag({ target: header, clientX: x0, clientY: y0 }, w.id);
+    const intervals = [];
+    let last = null;
+    await new Promise(resolve => {
+        let n = 0;
+        const step = (ts) => {
+            if (last !== null) intervals.push(ts - last);
+            last = ts;
+            if (n++ >= frames) return resolve();
+            handleMove({ clientX: x0 + 4 * n, clientY: y0 + 2 * n, shiftKey: false });
+            requestAnimationFrame(step);
+        };
+        requestAnimationFrame(step);
+    });
+    handleEnd();
+    return intervals;
+}
+"""
+
+# getDashboardState() after nudging a widget, as after a drag
+STATE_JS = """
+(runs) => {
+    const times = [];
+    for (let i = 0; i < runs; i++) {
+        const el = widgets[i % widgets.length].el;
+        el.style.left = (el.offsetLeft + (i % 2 ? -1 : 1)) + 'px';
+        const start = performance.now();
+        getDashboardState();
+        times.push(performance.now() - start);
+    }
+    return times;
+}
+"""
+
+# Rebuilds the board as a student view of itself, then times updateStudentView() with one widget moved per call
+STUDENT_JS = """
+(runs) => {
+    const data = getDashboardState();
+    data.polls = {};
+    loadStudentView(data);
+    const times = [];
+    for (let i = 0; i < runs; i++) {
+        const moved = data.widgets[i % data.widgets.length];
+        moved.x += i % 2 ? -40 : 40;
+        const start = performance.now();
+        updateStudentView(data);
+        document.body.offsetHeight;  // Include the layout the update causes
+        times.push(performance.now() - start);
+    }
+    return times;
+}
+"""
+
+def measure(pool, count, runs, cpu_rate):
+    """Spawn, drag, getDashboardState and updateStudentView costs on a board of `count` widgets."""
+    with pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, Backend())
+        page = context.new_page()
+        pool.load(page, URL_FILE)
+        page.wait_for_load_state("load")
+        cdp = context.new_cdp_session(page)
+        cdp.send("Emulation.setCPUThrottlingRate", {"rate": cpu_rate})
+
+        spawn = page.evaluate(FILL_JS, [WIDGET_TYPES, count, min(SPAWN_SAMPLES, count)])
+        drag = page.evaluate(DRAG_JS, runs * 3)
+        state = page.evaluate(STATE_JS, runs)
+        student = page.evaluate(STUDENT_JS, runs)
+        return {
+            "widgets": count,
+            "cpu_throttle": cpu_rate,
+            "spawn_ms": round(statistics.median(spawn), 2),
+            "drag_p50_ms": round(percentile(drag, 50), 2),
+            "drag_p95_ms": round(percentile(drag, 95), 2),
+            "drag_janky_frames": sum(1 for d in drag if d > SMOOTH_FRAME_MS * 1.5),
+            "state_ms": round(statistics.median(state), 2),
+            "student_update_ms": round(statistics.median(student), 2),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard hot paths as the widget count grows.")
+    parser.add_argument("--widgets", default="1,10,50,200", help="Widget counts (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=20, help="Samples per measurement (default: %(default)s)")
+    parser.add_argument("--cpu", type=float, default=1, help="CPU slowdown factor (default: %(default)s)")
+    parser.add_argument("--output", default="scaling_bench.json",
+                        help="JSON results file (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    print(f"{'Widgets':>7} {'Spawn ms':>9} {'Drag p50 ms':>12} {'Drag p95 ms':>12} {'Janky':>6} "
+          f"{'State ms':>9} {'Student ms':>11}")
+    results = []
+    with sync_playwright() as p, BrowserPool(p) as pool:
+        for count in parse_list(args.widgets, int):
+            r = measure(pool, count, args.runs, args.cpu)
+            results.append(r)
+            print(f"{count:>7} {r['spawn_ms']:>9.1f} {r['drag_p50_ms']:>12.1f} {r['drag_p95_ms']:>12.1f} "
+                  f"{r['drag_janky_frames']:>6} {r['state_ms']:>9.2f} {r['student_update_ms']:>11.2f}", flush=True)
+
+    with open(args.output, "w") as f:
+        json.dump({"viewport": VIEWPORT, "runs": args.runs, "results": results}, f, indent=2)
+    print(f"Wrote {args.output}")
+    rough = [r["widgets"] for r in results if r["drag_p95_ms"] > SMOOTH_FRAME_MS * 1.5]
+    if rough:
+        print(f"Dragging stops being smooth at {rough[0]} widgets.")
+
+if __name__ == "__main__":
+    main()
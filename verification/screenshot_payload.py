@@ -0,0 +1,99 @@
+"""
+Per-poll payload of a class submitting screenshots.
+
+One teacher requests screenshots and N students submit theirs one after the
+other. After each submission a student polls getSessionData; the table shows
+what that poll costs with the screenshot storage of Code.js ("referenced":
+images in the Screenshots sheet, the session keeps references) and with the
+previous storage ("inline": every image inside the session JSON cell):
+
+- reply KB: a full (revision-less) getSessionData reply, as downloaded by
+  a joining student or a client without delta sync;
+- read KB: Sheet bytes read by every poll, even a "not modified" one;
+- class MB/round: reply KB x N students, one poll round of the class.
+
+With inline storage each of those grows with the number of screenshots, so a
+round of class traffic grows quadratically with class size. The last line
+compares the teacher's first gallery page.
+
+Usage: python verification/screenshot_payload.py [--students 30] [--image-kb 40]
+"""
+
+import json
+import time
+import random
+import string
+import argparse
+from backend_emulator import Backend, js_json
+from load_test import CLASSROOM_DASHBOARD
+
+TEACHER = "teacher@example.com"
+
+class InlineScreenshotBackend(Backend):
+    """The previous screenshot storage: images appended to the session JSON."""
+
+    def submitScreenshot(self, code, imageData, thumbnailData=None):
+        sheet = self.getSessionSheet()
+        session = self.findSessionRow(sheet, code.upper())
+        if session and session["values"][4] is True:
+            sessionData = json.loads(session["values"][2])
+            sessionData.setdefault("screenshots", []).append({
+                "studentEmail": self._active_user_email(),
+                "data": imageData,
+                "timestamp": int(time.time() * 1000),
+            })
+            sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+            return {"success": True}
+        return {"success": False, "message": "Session not found."}
+
+    def getScreenshots(self, code, offset=None, limit=None):
+        session = self.findSessionRow(self.getSessionSheet(), code)
+        return {"success": True, "screenshots": json.loads(session["values"][2]).get("screenshots") or []}
+
+def fake_image(rng, kb):
+    """A data URL of roughly `kb` KB of base64, like canvas.toDataURL('image/jpeg')."""
+    return "data:image/jpeg;base64," + "".join(rng.choices(string.ascii_letters + string.digits, k=int(kb * 1024)))
+
+def run(backend_class, students, image_kb, checkpoints, seed):
+    """{k: (reply bytes, bytes read)} after k submissions, and the gallery's first page in bytes."""
+    rng = random.Random(seed)
+    backend = backend_class(session_codes=["SHOT01"])
+    code = backend.call("createSession", [js_json(CLASSROOM_DASHBOARD)], TEACHER)["code"]
+    backend.call("requestScreenshots", [code], TEACHER)
+
+    def poll():
+        reply = backend.call("getSessionData", [code], "student-0@example.com")
+        return len(js_json(reply)), backend.calls[-1]["bytes_read"]
+
+    results = {0: poll()}
+    for k in range(1, students + 1):
+        user = f"student-{k}@example.com"
+        backend.call("submitScreenshot", [code, fake_image(rng, image_kb), fake_image(rng, image_kb / 10)], user)
+        if k in checkpoints:
+            results[k] = poll()
+    gallery = len(js_json(backend.call("getScreenshots", [code], TEACHER)))
+    return results, gallery
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure getSessionData payload while a class submits screenshots.")
+    parser.add_argument("--students", type=int, default=30, help="Students submitting (default: %(default)s)")
+    parser.add_argument("--image-kb", type=float, default=40, help="Base64 KB per screenshot (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    checkpoints = sorted({1, 5, 10, 20, args.students} & set(range(1, args.students + 1)))
+    runs = {label: run(cls, args.students, args.image_kb, checkpoints, args.seed)
+            for label, cls in (("inline", InlineScreenshotBackend), ("referenced", Backend))}
+
+    print(f"{args.students} students, {args.image_kb:g} KB per screenshot")
+    print(f"{'Submitted':>9} {'Storage':<11} {'Reply KB':>9} {'Read KB':>9} {'Class MB/round':>15}")
+    for k in [0] + checkpoints:
+        for label, (results, _) in runs.items():
+            reply, read = results[k]
+            print(f"{k:>9} {label:<11} {reply / 1024:>9.1f} {read / 1024:>9.1f} "
+                  f"{reply * args.students / 1e6:>15.2f}")
+    for label, (_, gallery) in runs.items():
+        print(f"Teacher gallery, first page ({label}): {gallery / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    main()
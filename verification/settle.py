@@ -0,0 +1,147 @@
+"""
+Waits until a page has settled, instead of sleeping a fixed time.
+
+The verification scripts used to pause a hard-coded time after each action
+(1000 ms for a settings flip, 2000 ms after loading), which is longer than
+needed on a fast machine and sometimes too short on a loaded one. A
+Settler waits, in the page, until every one of these holds:
+
+- no google.script.run call is in flight (gas_shim.py counts them in
+  window.__gasPending, and a call only counts as done after its handlers ran);
+- no CSS transition or animation with an end is running
+  (document.getAnimations(); infinite ones such as animate-pulse never end and
+  are ignored);
+- the page's fonts have loaded (document.fonts.status);
+- nothing happened for `frames` consecutive animation frames: no DOM
+  mutation, no transitionrun/transitionend or animationstart/animationend.
+  Replacing an element's text with the same text doesn't count, so the
+  clock widget, which sets its time and date every frame, only breaks the
+  quiet once a second, when the text really changes.
+
+A wait that doesn't settle within timeout_ms returns anyway, like the old
+sleep would have, and is reported with what the page was still busy with.
+Every wait is timed; report() summarizes them, e.g. to compare a run with
+the sleeps it replaced.
+
+Usage:
+    settler = Settler()
+    with pool.context() as context:
+        install_backend(context, Backend())
+        settler.install(context)
+        page = context.new_page()
+        pool.load(page, URL_FILE)
+        page.locator("#widget-1 .btn-settings").click()
+        settler.wait(page, "settings flip")
+    print(settler.report())
+"""
+
+import os
+import time
+
+# Files whose contents decide when screenshots are taken (for build-cache keys)
+SETTLE_SOURCES = [os.path.abspath(__file__)]
+
+DEFAULT_STABLE_FRAMES = 5
+DEFAULT_TIMEOUT_MS = 10000
+
+# Counts everything that means the page is still changing; idempotent, so it can
+# also be evaluated in a page that was loaded before install()
+PROBE_JS = """
+(() => {
+    if (window.__settle) return;
+    const state = window.__settle = { activity: 0 };
+    const bump = () => { state.activity++; };
+    // Elements rewritten every frame with the same text (the clock widget's rAF
+    // loop sets textContent each frame) are not activity; only a new text is
+    const lastText = new WeakMap();
+    const isText = node => node.nodeType === Node.TEXT_NODE;
+    const changed = r => {
+        if (r.type === 'characterData') return r.oldValue !== r.target.data;
+        if (r.type !== 'childList' || ![...r.addedNodes, ...r.removedNodes].every(isText)) return true;
+        const text = r.target.textContent;
+        if (lastText.get(r.target) === text) return false;
+        lastText.set(r.target, text);
+        return true;
+    };
+    new MutationObserver(records => { if (records.some(changed)) bump(); }).observe(document, {
+        childList: true, subtree: true, attributes: true, characterData: true, characterDataOldValue: true
+    });
+    ['transitionrun', 'transitionend', 'transitioncancel', 'animationstart', 'animationend', 'animationcancel']
+        .forEach(type => document.addEventListener(type, bump, true));
+})();
+"""
+
+WAIT_JS = """
+async ([frames, timeoutMs]) => {
+    const state = window.__settle;
+    const start = performance.now();
+    const describe = a => {
+        const what = a.transitionProperty ? 'transition ' + a.transitionProperty : 'animation ' + (a.animationName || a.id);
+        const el = a.effect && a.effect.target;
+        return el ? what + ' on ' + el.tagName.toLowerCase() + (el.id ? '#' + el.id : '') : what;
+    };
+    const busy = () => {
+        const reasons = [];
+        const pending = window.__gasPending || 0;
+        if (pending) reasons.push(pending + ' google.script.run call(s)');
+        if (document.fonts && document.fonts.status !== 'loaded') reasons.push('fonts loading');
+        const running = document.getAnimations().filter(a =>
+            a.playState === 'running' && a.effect && a.effect.getComputedTiming().endTime !== Infinity);
+        if (running.length) reasons.push(running.length + ' animation(s), e.g. ' + describe(running[0]));
+        return reasons;
+    };
+    let stable = 0, seen = state.activity, reasons = [];
+    while (stable < frames) {
+        await new Promise(resolve => requestAnimationFrame(resolve));
+        reasons = busy();
+        if (state.activity !== seen) reasons.push('DOM changes');
+        seen = state.activity;
+        stable = reasons.length ? 0 : stable + 1;
+        if (stable < frames && performance.now() - start > timeoutMs) {
+            return { ms: performance.now() - start, settled: false, busy: reasons.join('; ') };
+        }
+    }
+    return { ms: performance.now() - start, settled: true, busy: '' };
+}
+"""
+
+class Settler:
+    """Waits for pages to settle and keeps the time every wait took."""
+
+    def __init__(self, frames=DEFAULT_STABLE_FRAMES, timeout_ms=DEFAULT_TIMEOUT_MS, verbose=False):
+        self.frames = frames
+        self.timeout_ms = timeout_ms
+        self.verbose = verbose
+        self.waits = []
+
+    def install(self, context):
+        """Starts the activity probe in every page of `context`; call before the pages load."""
+        context.add_init_script(PROBE_JS)
+
+    def wait(self, page, label="settle", timeout_ms=None):
+        """Blocks until `page` has settled (or timeout_ms passed); returns the wait's record."""
+        start = time.monotonic()
+        page.evaluate(PROBE_JS)
+        result = page.evaluate(WAIT_JS, [self.frames, timeout_ms or self.timeout_ms])
+        record = {"label": label, "ms": (time.monotonic() - start) * 1000,
+                  "settled": result["settled"], "busy": result["busy"]}
+        self.waits.append(record)
+        if self.verbose or not record["settled"]:
+            state = "settled" if record["settled"] else f"did not settle ({record['busy']})"
+            print(f"  {label}: {state} after {record['ms']:.0f} ms")
+        return record
+
+    def report(self):
+        """One line per label: waits, total and longest time, and waits that timed out."""
+        if not self.waits:
+            return "Settle waits: none"
+        labels = {}
+        for w in self.waits:
+            labels.setdefault(w["label"], []).append(w)
+        lines = [f"Settle waits: {len(self.waits)}, {sum(w['ms'] for w in self.waits):.0f} ms in total"]
+        for label, waits in labels.items():
+            timed_out = sum(1 for w in waits if not w["settled"])
+            lines.append(f"  {label:<24} {len(waits):>4} x  total {sum(w['ms'] for w in waits):>7.0f} ms  "
+                         f"max {max(w['ms'] for w in waits):>6.0f} ms"
+                         + (f"  {timed_out} timed out" if timed_out else ""))
+        return "\n".join(lines)
@@ -0,0 +1,140 @@
+"""
+Startup benchmark: runtime Tailwind (CDN JIT) versus the precompiled stylesheet.
+
+Loads the dashboard --runs times in each of two variants, every load in a
+fresh browser context with Chrome's CPU throttling applied (--cpu, 4x by
+default, roughly a student Chromebook):
+
+- runtime: index.html as opened from disk, which falls back to the Tailwind
+  Play CDN and compiles its CSS in the browser;
+- precompiled: index.html as doGet() serves it, with tailwind.html (built by
+  build_tailwind.py) inlined in place of <?!= include('tailwind') ?>.
+
+Per load it records:
+
+- fcp ms: first-contentful-paint;
+- dcl ms: DOMContentLoaded;
+- tti ms: time to interactive, the end of the last long task (over 50 ms,
+  from a PerformanceObserver installed before the page loads) after first
+  contentful paint, or first contentful paint when there is none;
+- spawn ms: spawnWidget() of a widget not on the board yet, up to the next
+  frame; with the runtime CDN this includes compiling the widget's classes.
+
+Medians per variant are printed side by side. With --offline the CDN
+runtime is served from the asset cache, so the comparison leaves out the
+network and measures the compile itself.
+
+Usage: python verification/startup_bench.py [--runs 10] [--cpu 4] [--offline]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import statistics
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+from asset_cache import add_asset_arguments, asset_cache_from_args, check_offline
+from build_tailwind import OUTPUT_HTML, resolve_includes
+
+INDEX_HTML = "index.html"
+VIEWPORT = {"width": 1366, "height": 768}
+LONG_TASK_MS = 50
+SPAWN_WIDGET = "timer"
+
+# Long tasks are only reported to observers, so one has to be listening from the start
+LONG_TASK_PROBE_JS = """
+window.__longTasks = [];
+new PerformanceObserver(list => {
+    for (const entry of list.getEntries()) window.__longTasks.push([entry.startTime, entry.duration]);
+}).observe({ type: 'longtask', buffered: true });
+"""
+
+STARTUP_JS = """
+async ([widget, longTaskMs]) => {
+    const frame = () => new Promise(resolve => requestAnimationFrame(resolve));
+    // Give trailing work (stylesheet compiles, font loads) a quiet second to show up as long tasks
+    await new Promise(resolve => setTimeout(resolve, 1000));
+    const fcpEntry = performance.getEntriesByName('first-contentful-paint')[0];
+    const fcp = fcpEntry ? fcpEntry.startTime : null;
+    const nav = performance.getEntriesByType('navigation')[0];
+    const after = window.__longTasks.filter(([start, duration]) => duration > longTaskMs && start >= (fcp || 0));
+    const tti = after.length ? Math.max(...after.map(([start, duration]) => start + duration)) : fcp;
+
+    await frame();
+    const start = performance.now();
+    spawnWidget(widget);
+    await frame();
+    return { fcp, dcl: nav.domContentLoadedEventEnd, tti, spawn: performance.now() - start };
+}
+"""
+
+def precompiled_page():
+    """Path of a temporary copy of index.html with its includes resolved, as doGet() serves it."""
+    with open(INDEX_HTML, encoding="utf-8") as f:
+        html = resolve_includes(f.read())
+    # Next to index.html, so relative references still resolve
+    fd, path = tempfile.mkstemp(prefix=".startup-bench-", suffix=".html", dir=".")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html)
+    return path
+
+def measure(pool, url, cpu_rate):
+    """Startup timings of one load of `url` in a fresh context."""
+    with pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, Backend())
+        context.add_init_script(LONG_TASK_PROBE_JS)
+        page = context.new_page()
+        cdp = context.new_cdp_session(page)
+        cdp.send("Emulation.setCPUThrottlingRate", {"rate": cpu_rate})
+        pool.load(page, url)
+        page.wait_for_load_state("load")
+        return page.evaluate(STARTUP_JS, [SPAWN_WIDGET, LONG_TASK_MS])
+
+def median(samples, key):
+    values = [s[key] for s in samples if s[key] is not None]
+    return round(statistics.median(values), 1) if values else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dashboard startup with runtime and precompiled Tailwind CSS.")
+    parser.add_argument("--runs", type=int, default=10, help="Loads per variant (default: %(default)s)")
+    parser.add_argument("--cpu", type=float, default=4, help="CPU slowdown factor (default: %(default)s)")
+    add_asset_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(INDEX_HTML):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+    if not os.path.exists(OUTPUT_HTML):
+        print(f"Error: {OUTPUT_HTML} not found. Run python verification/build_tailwind.py first.")
+        sys.exit(1)
+
+    precompiled = precompiled_page()
+    variants = {
+        "runtime": f"file://{os.path.abspath(INDEX_HTML)}",
+        "precompiled": f"file://{os.path.abspath(precompiled)}",
+    }
+    results = {name: [] for name in variants}
+    try:
+        with sync_playwright() as p, BrowserPool(p, assets=asset_cache_from_args(args)) as pool:
+            # Alternate the variants so drift (thermal, background load) hits both alike
+            for _ in range(args.runs):
+                for name, url in variants.items():
+                    results[name].append(measure(pool, url, args.cpu))
+            stats = pool.stats()
+    finally:
+        os.remove(precompiled)
+    check_offline(stats)
+
+    print(f"Median of {args.runs} load(s) per variant, CPU throttled {args.cpu:g}x")
+    print(f"{'Variant':<12} {'FCP ms':>8} {'DCL ms':>8} {'TTI ms':>8} {'Spawn ms':>9}")
+    for name, samples in results.items():
+        row = [median(samples, key) for key in ("fcp", "dcl", "tti", "spawn")]
+        print(f"{name:<12} " + " ".join(f"{'-' if v is None else v:>{w}}" for v, w in zip(row, (8, 8, 8, 9))))
+    before, after = median(results["runtime"], "tti"), median(results["precompiled"], "tti")
+    if before and after:
+        print(f"Time to interactive: {before - after:.0f} ms saved ({100 * (before - after) / before:.0f}%).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Before/after benchmark of the live-session sync protocol.
+
+Replays one classroom with load_test's protocol-level clients three times:
+with the full-state sync ("full": updateSession with the whole dashboard every
+2 s, revision-less getSessionData polls), with the revisioned delta sync
+("delta": patchSession only for changed widgets, getSessionData answered
+"not modified" or with a delta) and with the delta sync batched into one
+teacher call per tick ("batched": syncSession). Each is run for an idle
+teacher and for a busy one, and the table compares teacher RPCs, RPC bytes
+and Sheet writes per minute.
+
+Usage: python verification/sync_bench.py [--students 30] [--duration 300]
+       [--busy-changes 20]
+"""
+
+import argparse
+from load_test import run_load
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bytes and Sheet writes of the full and delta session sync.")
+    parser.add_argument("--students", type=int, default=30, help="Students in the classroom (default: %(default)s)")
+    parser.add_argument("--duration", type=int, default=300, help="Simulated seconds per run (default: %(default)s)")
+    parser.add_argument("--busy-changes", type=float, default=20,
+                        help="Widget moves per minute by a busy teacher (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"1 classroom, {args.students} students, {args.duration}s simulated per run")
+    print(f"{'Teacher':<8} {'Protocol':<9} {'Calls/min':>10} {'Teacher/min':>12} {'Writes/min':>11} "
+          f"{'KB written/min':>15} {'KB sent/min':>12} {'KB recv/min':>12}")
+    minutes = args.duration / 60
+    for activity, changes in (("idle", 0), ("busy", args.busy_changes)):
+        runs = {}
+        for protocol in ("full", "delta", "batched"):
+            r = runs[protocol] = run_load(args.students, 1, args.duration, protocol=protocol,
+                                          teacher_changes_per_min=changes, seed=args.seed)
+            r["teacher_calls_per_min"] = sum(1 for c in r["backend"].calls if c["user"].startswith("teacher")) / minutes
+            print(f"{activity:<8} {protocol:<9} {r['calls_per_min']:>10.0f} {r['teacher_calls_per_min']:>12.0f} "
+                  f"{r['writes_per_min']:>11.1f} {r['kb_written_per_min']:>15.1f} {r['kb_sent_per_min']:>12.1f} "
+                  f"{r['kb_received_per_min']:>12.1f}")
+        before = runs["full"]
+        for protocol in ("delta", "batched"):
+            after = runs[protocol]
+            for metric, label in (("teacher_calls_per_min", "teacher RPCs"), ("writes_per_min", "Sheet writes"),
+                                  ("kb_received_per_min", "bytes received"), ("kb_sent_per_min", "bytes sent")):
+                if before[metric]:
+                    print(f"  {activity}: {label} {1 - after[metric] / before[metric]:.0%} lower with {protocol} sync")
+
+if __name__ == "__main__":
+    main()
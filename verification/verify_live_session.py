@@ -1,56 +1,23 @@
 
 from playwright.sync_api import sync_playwright
+from gas_shim import Backend, install_backend
+from settle import Settler
 import os
 
 def run(playwright):
     browser = playwright.chromium.launch(headless=True)
-    page = browser.new_page()
+    context = browser.new_context()
+
+    # Serve google.script.run from the Code.js emulator
+    backend = Backend(session_codes=["TEST12"])
+    install_backend(context, backend)
+    settler = Settler()
+    settler.install(context)
+    page = context.new_page()
 
     # Load the local index.html
     page.goto(f"file://{os.path.abspath('index.html')}")
 
-    # Mock google.script.run
-    page.evaluate("""
-        window.google = {
-            script: {
-                run: {
-                    withSuccessHandler: function(callback) {
-                        this.callback = callback;
-                        return this;
-                    },
-                    withFailureHandler: function(callback) {
-                        return this;
-                    },
-                    createSession: function(data) {
-                        // Mock successful session creation
-                        if (this.callback) {
-                            this.callback({
-                                success: true,
-                                code: 'TEST12',
-                                data: JSON.parse(data)
-                            });
-                        }
-                    },
-                    updateSession: function(code, data) {
-                         // Mock update
-                         console.log("Session updated");
-                    },
-                    setSessionPaused: function(code, paused) {
-                        if (this.callback) {
-                            this.callback({
-                                success: true,
-                                paused: paused
-                            });
-                        }
-                    },
-                    getDashboards: function() {
-                        if (this.callback) this.callback(JSON.stringify({}));
-                    }
-                }
-            }
-        };
-    """)
-
     # 1. Test Teacher Start Session
     # Click "Live Session" menu button to open menu
     page.locator("#btn-start-session").click()
@@ -79,7 +46,8 @@ def run(playwright):
     page.locator("#btn-menu-pause").click()
 
     # Verify Toast appears "Session Paused"
-    page.wait_for_timeout(500) # Wait for toast animation
+    page.wait_for_selector("#toast-container >> text=Session Paused")
+    settler.wait(page, "toast") # Wait for toast animation
 
     # 3. Simulate Student View Paused State
     # We can simulate this by calling updateStudentView with paused: true
@@ -103,6 +71,7 @@ def run(playwright):
     # Add a widget
     page.evaluate("spawnWidget('clock')")
     page.locator(".btn-settings").click()
+    settler.wait(page, "settings flip")
 
     # Verify "Allow Student Interaction" checkbox exists
     assert page.locator(".inp-interact").is_visible()
@@ -111,6 +80,9 @@ def run(playwright):
     # Take screenshot
     page.screenshot(path="verification/verification.png")
 
+    print(backend.report())
+    print(settler.report())
+
     browser.close()
 
 with sync_playwright() as playwright:
@@ -1,23 +1,26 @@
 
 import os
 from playwright.sync_api import sync_playwright
+from settle import Settler
 
 def run():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
+        settler = Settler()
 
         # Load index.html from the current directory
         cwd = os.getcwd()
         page.goto(f"file://{cwd}/index.html")
 
-        # Wait a bit for things to settle (though without backend, it might stay in loading state)
+        # Wait for things to settle (though without backend, it might stay in loading state)
         # We just want to see the background watermark.
-        page.wait_for_timeout(2000)
+        settler.wait(page, "load")
 
         # Take a screenshot
         page.screenshot(path="verification/watermark_verification.png")
 
+        print(settler.report())
         browser.close()
 
 if __name__ == "__main__":
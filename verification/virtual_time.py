@@ -0,0 +1,134 @@
+"""
+Deterministic virtual-time recording for the demo scripts.
+
+Instead of screencasting in real time, the page runs on Playwright's fake clock
+(timers, requestAnimationFrame, Date) and its CSS transitions/animations are
+paused and seeked through the Web Animations API. Time only moves when the
+script calls advance(ms): every 1/fps of virtual time the recorder steps the
+page, captures a JPEG frame and pipes it to ffmpeg.
+
+The resulting .webm is frame-exact and reproducible no matter how loaded the
+machine is, and static stretches (the long waits between actions) cost one
+frame write each instead of their wall-clock duration, because frames are only
+re-captured when the DOM changed or an animation is running.
+"""
+
+import os
+import sys
+import glob
+import shutil
+import datetime
+import subprocess
+
+DEFAULT_FPS = 25
+
+# Fixed wall-clock time the page sees, so clocks and dates render identically
+# on every run. The page clock runs naturally while index.html loads and is
+# paused at VIRTUAL_START once recording begins.
+VIRTUAL_EPOCH = datetime.datetime(2024, 9, 3, 8, 55, 0)
+VIRTUAL_START = datetime.datetime(2024, 9, 3, 9, 0, 0)
+
+# Installs __vtStep(dt): seeks every running animation by dt ms and reports
+# whether anything visible may have changed since the previous step.
+VIRTUAL_STEP_JS = """
+    () => {
+        let dirty = true;
+        new MutationObserver(() => { dirty = true; }).observe(document, {
+            subtree: true, childList: true, attributes: true, characterData: true
+        });
+        window.__vtStep = (dt) => {
+            for (const anim of document.getAnimations()) {
+                if (anim.playState === 'finished' || anim.playState === 'idle') continue;
+                if (!anim.__virtual) {
+                    anim.__virtual = true;
+                    anim.pause();
+                    anim.currentTime = 0;
+                }
+                anim.currentTime = (anim.currentTime || 0) + dt;
+                const end = anim.effect ? anim.effect.getComputedTiming().endTime : 0;
+                if (anim.currentTime >= end) anim.finish();
+                dirty = true;
+            }
+            const changed = dirty;
+            dirty = false;
+            return changed;
+        };
+    }
+"""
+
+def find_ffmpeg():
+    """Returns an ffmpeg executable: one on PATH, else the build Playwright downloads for video recording."""
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    root = os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+    if not root:
+        if sys.platform == "darwin":
+            root = os.path.expanduser("~/Library/Caches/ms-playwright")
+        elif sys.platform == "win32":
+            root = os.path.join(os.environ.get("LOCALAPPDATA", ""), "ms-playwright")
+        else:
+            root = os.path.expanduser("~/.cache/ms-playwright")
+    candidates = sorted(glob.glob(os.path.join(root, "ffmpeg-*", "ffmpeg-*")))
+    if not candidates:
+        raise RuntimeError("ffmpeg not found. Install it or run `playwright install ffmpeg`.")
+    return candidates[-1]
+
+def install_clock(page):
+    """Installs the fake clock. Must be called before the page is loaded."""
+    page.clock.install(time=VIRTUAL_EPOCH)
+
+class VirtualRecorder:
+    """Steps a page through virtual time and encodes one frame per 1/fps of it."""
+
+    def __init__(self, page, output_path, fps=DEFAULT_FPS, size=(1280, 720)):
+        self.page = page
+        self.fps = fps
+        self.output_path = output_path
+        self.elapsed_ms = 0
+        self.target_ms = 0.0
+        self.frames = 0
+        self.captures = 0
+        self.last_frame = None
+
+        page.clock.pause_at(VIRTUAL_START)
+        page.evaluate(VIRTUAL_STEP_JS)
+
+        width, height = size
+        self.ffmpeg = subprocess.Popen(
+            [find_ffmpeg(), "-loglevel", "error", "-y",
+             "-f", "image2pipe", "-c:v", "mjpeg", "-framerate", str(fps), "-i", "pipe:0",
+             "-an", "-c:v", "vp8", "-qmin", "0", "-qmax", "50", "-crf", "8", "-b:v", "1M",
+             "-vf", f"scale={width}:{height}", "-r", str(fps), output_path],
+            stdin=subprocess.PIPE,
+        )
+        self._emit(0)
+
+    def advance(self, ms):
+        """Moves virtual time forward by ms, emitting every frame that falls inside it."""
+        self.target_ms += ms
+        while True:
+            next_frame_ms = round(self.frames * 1000 / self.fps)
+            if next_frame_ms > self.target_ms:
+                break
+            self._emit(next_frame_ms - self.elapsed_ms)
+
+    def _emit(self, step_ms):
+        if step_ms > 0:
+            self.page.clock.run_for(step_ms)
+            self.elapsed_ms += step_ms
+        changed = self.page.evaluate("dt => window.__vtStep(dt)", step_ms)
+        if changed or self.last_frame is None:
+            self.last_frame = self.page.screenshot(type="jpeg", quality=90)
+            self.captures += 1
+        self.ffmpeg.stdin.write(self.last_frame)
+        self.frames += 1
+
+    def close(self):
+        """Finishes encoding and returns the output path."""
+        self.ffmpeg.stdin.close()
+        if self.ffmpeg.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.output_path}")
+        print(f"Encoded {self.frames} frames ({self.elapsed_ms / 1000:.1f}s virtual, "
+              f"{self.captures} captured) to {self.output_path}")
+        return self.output_path
@@ -0,0 +1,252 @@
+"""
+Visual regression check of the generated screenshots against baselines.
+
+The suite is the 14 widget comparison screenshots of generate_screenshots.py
+(onboarding-video/public/<widget>_comparison.png) plus the two full-page
+checks, verification/watermark_verification.png and verification/verification.png.
+Baselines are kept in verification/baselines/ with an index.json recording,
+per screenshot, the sha256 of the PNG file and of its decoded pixels and its
+size.
+
+For each screenshot:
+
+1. The file's sha256 is looked up in the index. generate_screenshots.py only
+   rewrites screenshots whose inputs changed (build_cache.py), so most files
+   are byte-identical to their baseline and are reported unchanged without
+   being decoded. A screenshot saved again with the same pixels is decoded,
+   but matches the pixel digest and needs no baseline.
+2. Otherwise the baseline is decoded too and the pixels are compared,
+   vectorized with NumPy: a pixel differs when any channel is more than
+   --channel-tolerance apart, and MASKS blanks regions that change between
+   runs (the clock face). An image fails when more than --max-diff of its
+   unmasked pixels differ.
+
+There is no perceptual-hash step: on the mostly dark screenshots the dHashes
+of different widgets are a few bits apart (checklist and timetable differ by
+one bit, even hashing only the widget body), so a hash can't tell a wrong
+screenshot from a right one and the pixel count decides alone.
+
+Every failure writes a diff image to verification/diffs/<name>.png: the
+baseline in gray, differing pixels in red and masked regions in blue.
+
+Usage: python verification/visual_diff.py [clock timer ...] [--update]
+       [--channel-tolerance 16] [--max-diff 0.00002]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+BASELINE_DIR = "verification/baselines"
+INDEX_PATH = os.path.join(BASELINE_DIR, "index.json")
+DIFF_DIR = "verification/diffs"
+INDEX_VERSION = 1
+
+# Same list as generate_screenshots.py
+WIDGETS = [
+    'clock', 'timer', 'traffic', 'text', 'checklist', 'timetable',
+    'random', 'dice', 'qr', 'sound', 'drawing', 'embed', 'poll', 'webcam'
+]
+
+SUITE = dict(
+    [(w, f"onboarding-video/public/{w}_comparison.png") for w in WIDGETS],
+    watermark="verification/watermark_verification.png",
+    live_session="verification/verification.png",
+)
+
+# Regions (left, top, right, bottom in pixels) that differ from run to run.
+# Comparison screenshots are 1920x1080 with the active widget's body at
+# (441, 381)-(939, 739); see capture_widget() in generate_screenshots.py.
+MASKS = {
+    "clock": [(441, 381, 939, 739)],
+    "live_session": [(500, 280, 780, 440)],  # The clock widget shared in the session
+}
+
+DEFAULT_CHANNEL_TOLERANCE = 16
+DEFAULT_MAX_DIFF = 0.00002  # About 40 pixels of a 1920x1080 screenshot
+CHECK_THREADS = 8
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def pixel_digest(pixels):
+    return hashlib.sha256(np.ascontiguousarray(pixels).tobytes()).hexdigest()
+
+def load_rgb(path):
+    """An image file as an (h, w, 3) uint8 array."""
+    with Image.open(path) as im:
+        return np.asarray(im if im.mode == "RGB" else im.convert("RGB"))
+
+def mask_array(shape, boxes):
+    """Boolean (h, w) array, True inside the masked boxes."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for left, top, right, bottom in boxes:
+        mask[top:bottom, left:right] = True
+    return mask
+
+def pad_to(pixels, shape):
+    """pixels padded with black to (h, w) of `shape`."""
+    if pixels.shape[:2] == tuple(shape[:2]):
+        return pixels
+    padded = np.zeros((shape[0], shape[1], 3), dtype=np.uint8)
+    padded[:pixels.shape[0], :pixels.shape[1]] = pixels
+    return padded
+
+def compare(current, baseline, boxes, channel_tolerance):
+    """(boolean (h, w) array of differing unmasked pixels, unmasked pixel count).
+
+    Images of different sizes are compared on the larger canvas, so the area
+    only one of them covers counts as different.
+    """
+    shape = (max(current.shape[0], baseline.shape[0]), max(current.shape[1], baseline.shape[1]))
+    a, b = pad_to(current, shape), pad_to(baseline, shape)
+    changed = np.zeros(shape, dtype=bool)
+    # Screenshots mostly differ in a few rows; only those get the per-pixel check
+    rows = np.nonzero((a.reshape(shape[0], -1) != b.reshape(shape[0], -1)).any(axis=1))[0]
+    if len(rows):
+        delta = np.abs(a[rows].astype(np.int16) - b[rows].astype(np.int16)).max(axis=2)
+        changed[rows] = delta > channel_tolerance
+    if current.shape != baseline.shape:
+        changed[min(current.shape[0], baseline.shape[0]):, :] = True
+        changed[:, min(current.shape[1], baseline.shape[1]):] = True
+    mask = mask_array(shape, boxes)
+    changed &= ~mask
+    return changed, int(mask.size - mask.sum())
+
+def diff_image(baseline, changed, boxes):
+    """Baseline in dimmed gray, differing pixels red, masked regions tinted blue."""
+    base = pad_to(baseline, changed.shape)
+    gray = (base.astype(np.uint16).sum(axis=2) // 6 + 40).astype(np.uint8)
+    out = np.repeat(gray[..., None], 3, axis=2)
+    mask = mask_array(changed.shape, boxes)
+    out[mask, 2] = np.minimum(out[mask, 2].astype(np.uint16) + 90, 255).astype(np.uint8)
+    out[changed] = (255, 0, 0)
+    return Image.fromarray(out)
+
+class Baselines:
+    """The baseline images and their index (name -> sha256, pixels, size)."""
+
+    def __init__(self, directory=BASELINE_DIR, index_path=INDEX_PATH):
+        self.directory = directory
+        self.index_path = index_path
+        self.entries = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+                if index.get("version") == INDEX_VERSION:
+                    self.entries = index["baselines"]
+                else:
+                    print(f"Warning: {index_path} is from another version; run with --update")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: ignoring unreadable baseline index {index_path}: {e}")
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.png")
+
+    def update(self, name, source):
+        """Makes the screenshot at `source` the baseline of `name`."""
+        os.makedirs(self.directory, exist_ok=True)
+        shutil.copyfile(source, self.path(name))
+        pixels = load_rgb(source)
+        self.entries[name] = {
+            "sha256": file_digest(source),
+            "pixels": pixel_digest(pixels),
+            "size": [pixels.shape[1], pixels.shape[0]],
+        }
+
+    def save(self):
+        with open(self.index_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "baselines": self.entries}, f, indent=2, sort_keys=True)
+
+def check(baselines, name, path, channel_tolerance, max_diff):
+    """Compares one screenshot with its baseline; returns a result dict (and writes a diff image on failure)."""
+    start = time.perf_counter()
+    result = {"name": name, "status": "ok", "diff": 0.0}
+    entry = baselines.entries.get(name)
+    if not os.path.exists(path):
+        result["status"] = "missing"
+    elif not entry or not os.path.exists(baselines.path(name)):
+        result["status"] = "no baseline"
+    elif file_digest(path) == entry["sha256"]:
+        result["status"] = "unchanged"
+    else:
+        current = load_rgb(path)
+        if pixel_digest(current) == entry["pixels"]:
+            # Re-encoded, same pixels; no need to decode the baseline
+            result["status"] = "unchanged"
+            result["ms"] = (time.perf_counter() - start) * 1000
+            return result
+        baseline = load_rgb(baselines.path(name))
+        boxes = MASKS.get(name, [])
+        changed, compared = compare(current, baseline, boxes, channel_tolerance)
+        result["diff"] = float(changed.sum()) / max(1, compared)
+        if current.shape != baseline.shape:
+            result["status"] = "size changed"
+        elif result["diff"] > max_diff:
+            result["status"] = "changed"
+        if result["status"] != "ok":
+            os.makedirs(DIFF_DIR, exist_ok=True)
+            result["diff_image"] = os.path.join(DIFF_DIR, f"{name}.png")
+            diff_image(baseline, changed, boxes).save(result["diff_image"], compress_level=1)
+    result["ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the generated screenshots with their baselines.")
+    parser.add_argument("names", nargs="*", help=f"Screenshots to check (default: all of {', '.join(SUITE)})")
+    parser.add_argument("--update", action="store_true",
+                        help="Accept the current screenshots as the new baselines")
+    parser.add_argument("--channel-tolerance", type=int, default=DEFAULT_CHANNEL_TOLERANCE,
+                        help="Per-channel difference (0-255) still counted as equal (default: %(default)s)")
+    parser.add_argument("--max-diff", type=float, default=DEFAULT_MAX_DIFF,
+                        help="Share of unmasked pixels that may differ (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    unknown = [n for n in args.names if n not in SUITE]
+    if unknown:
+        parser.error(f"unknown screenshot(s): {', '.join(unknown)}")
+    names = args.names or list(SUITE)
+    baselines = Baselines()
+
+    if args.update:
+        updated = [n for n in names if os.path.exists(SUITE[n])]
+        for name in updated:
+            baselines.update(name, SUITE[name])
+        baselines.save()
+        print(f"Updated {len(updated)} baseline(s) in {BASELINE_DIR}.")
+        return
+
+    start = time.perf_counter()
+    print(f"{'Screenshot':<14} {'Status':<13} {'Diff %':>8} {'ms':>7}")
+    # PNG decoding and NumPy release the GIL, so screenshots are checked side by side
+    with ThreadPoolExecutor(min(CHECK_THREADS, os.cpu_count() or 1)) as executor:
+        results = list(executor.map(
+            lambda name: check(baselines, name, SUITE[name], args.channel_tolerance, args.max_diff), names))
+    for r in results:
+        name = r["name"]
+        print(f"{name:<14} {r['status']:<13} {100 * r['diff']:>8.4f} {r['ms']:>7.1f}"
+              + (f"  {r['diff_image']}" if "diff_image" in r else ""))
+    total_ms = (time.perf_counter() - start) * 1000
+
+    failed = [r["name"] for r in results if r["status"] not in ("ok", "unchanged")]
+    print(f"Checked {len(results)} screenshot(s) in {total_ms:.0f} ms.")
+    if failed:
+        print(f"FAIL: {', '.join(failed)} (accept intended changes with --update).")
+        sys.exit(1)
+    print("OK: no visual changes.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Concurrent poll-vote stress test against the Code.js emulator.
+
+A class of N students votes in the same instant: N threads wait on a barrier
+and then call submitPollResponse together. Every sheet operation of the
+emulator takes --io-ms, so calls interleave the way concurrent Apps Script
+executions do. After the burst the teacher's syncSession tick runs once (it
+counts votes a busy voter skipped), and the poll counts are checked against
+the votes actually cast.
+
+Two vote paths are compared:
+
+- log: the current submitPollResponse (append to the Votes sheet, counts
+  folded under the script lock);
+- rmw: the previous read-modify-write of the session cell, which loses votes
+  when executions overlap.
+
+Usage: python verification/vote_stress.py [--students 30] [--rounds 5] [--io-ms 5]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from backend_emulator import Backend, js_json
+from load_test import CLASSROOM_DASHBOARD, POLL_WIDGET_ID
+
+TEACHER = "teacher@example.com"
+
+class ReadModifyWriteBackend(Backend):
+    """The previous vote path: increment the count inside the session JSON, no lock."""
+
+    def submitPollResponse(self, code, widgetId, option):
+        sheet = self.getSessionSheet()
+        session = self.findSessionRow(sheet, code.upper())
+        if session and session["values"][4] is True:
+            sessionData = json.loads(session["values"][2])
+            poll = sessionData.setdefault("polls", {}).setdefault(str(widgetId), {"A": 0, "B": 0})
+            poll[option] += 1
+            self.bumpRevision(sessionData)
+            sheet.getRange(session["row"], 3).setValue(js_json(sessionData))
+            return {"success": True, "polls": poll}
+        return {"success": False, "message": "Session not found."}
+
+def burst(backend_class, students, io_ms, rng):
+    """One burst of votes; returns (seconds, votes cast {A, B}, counted {A, B}, writes per vote)."""
+    backend = backend_class(session_codes=["VOTE01"], io_delay=io_ms / 1000)
+    code = backend.call("createSession", [js_json(CLASSROOM_DASHBOARD)], TEACHER)["code"]
+    options = [rng.choice("AB") for _ in range(students)]
+    barrier = threading.Barrier(students + 1)
+    failures = []
+
+    def vote(i):
+        barrier.wait()
+        result = backend.call("submitPollResponse", [code, POLL_WIDGET_ID, options[i]], f"student-{i}@example.com")
+        if not result.get("success"):
+            failures.append(result)
+
+    threads = [threading.Thread(target=vote, args=(i,)) for i in range(students)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    seconds = time.perf_counter() - start
+
+    if failures:
+        raise RuntimeError(f"{len(failures)} vote(s) failed: {failures[0]}")
+    writes = sum(c["writes"] for c in backend.calls if c["name"] == "submitPollResponse") / students
+    backend.call("syncSession", [code, "", 0], TEACHER)
+    counted = backend.call("getSessionData", [code], TEACHER)["data"]["polls"].get(str(POLL_WIDGET_ID), {})
+    cast = {o: options.count(o) for o in "AB"}
+    return seconds, cast, {o: counted.get(o, 0) for o in "AB"}, writes
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire concurrent poll votes and check none are lost.")
+    parser.add_argument("--students", type=int, default=30, help="Simultaneous voters (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=5, help="Bursts per vote path (default: %(default)s)")
+    parser.add_argument("--io-ms", type=float, default=5, help="Latency of each sheet operation (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{args.students} simultaneous votes, {args.rounds} rounds, {args.io_ms:g} ms per sheet operation")
+    print(f"{'Path':<5} {'Votes/sec':>10} {'Writes/vote':>12} {'Lost':>6} {'Rounds with loss':>17}")
+    log_lost = 0
+    for label, backend_class in (("log", Backend), ("rmw", ReadModifyWriteBackend)):
+        rates, writes, lost, lossy = [], [], 0, 0
+        for _ in range(args.rounds):
+            seconds, cast, counted, per_vote = burst(backend_class, args.students, args.io_ms, rng)
+            rates.append(args.students / seconds)
+            writes.append(per_vote)
+            missing = sum(cast.values()) - sum(counted.values())
+            if cast != counted:
+                lossy += 1
+            lost += missing
+        if label == "log":
+            log_lost = lost
+        print(f"{label:<5} {sum(rates) / len(rates):>10.0f} {sum(writes) / len(writes):>12.2f} "
+              f"{lost:>6} {lossy:>10}/{args.rounds}")
+
+    if log_lost:
+        print("FAIL: the vote log lost votes.")
+        sys.exit(1)
+    print("OK: every vote was counted.")
+
+if __name__ == "__main__":
+    main()
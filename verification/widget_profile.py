@@ -0,0 +1,252 @@
+"""
+Per-widget render cost, measured with a Chrome performance trace.
+
+For every widget type (the list generate_screenshots.py renders) the profiler
+loads a fresh index.html, spawns the widget with spawnWidget(), starts its
+loop where it needs a click (timer, dice, name picker, sound meter, webcam),
+lets it settle and then records a Chrome DevTools Protocol trace (the
+Tracing domain, the same categories as the DevTools Performance panel) for
+--seconds. A "baseline" entry profiles the empty dashboard for comparison.
+
+From the trace of the page's renderer it reports, per widget:
+
+- fps: frames the compositor drew per second (DrawFrame events); a static
+  widget draws close to none, an animated one should stay near 60;
+- worst_frame_ms: the longest gap between two drawn frames;
+- long_tasks / longest_task_ms / blocking_ms: main-thread tasks over 50 ms
+  and the time they spend beyond 50 ms (Total Blocking Time);
+- scripting_ms / layout_ms / paint_ms / other_ms: main-thread time by
+  activity, as the DevTools summary groups it (style recalculation counts as
+  layout, compositing and image decoding as paint);
+- cpu_pct: main-thread CPU time as a share of the window.
+
+--cpu applies Emulation.setCPUThrottlingRate (4x-6x is close to an older
+projector laptop). Each widget prints one JSON object per line; --output also
+writes them all to a JSON file.
+
+Usage: python verification/widget_profile.py [clock timer ...] [--seconds 5]
+       [--cpu 1] [--output widget_profile.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from gas_shim import Backend, install_backend
+
+URL_FILE = f"file://{os.path.abspath('index.html')}"
+VIEWPORT = {"width": 1366, "height": 768}  # Common projector laptop screen
+LONG_TASK_MS = 50
+
+# Same list as generate_screenshots.py
+WIDGETS = [
+    'clock', 'timer', 'traffic', 'text', 'checklist', 'timetable',
+    'random', 'dice', 'qr', 'sound', 'drawing', 'embed', 'poll', 'webcam'
+]
+
+# Buttons that start a widget's loop; spawning alone leaves them idle
+START_BUTTONS = {
+    "timer": ".btn-start",
+    "dice": ".btn-roll",
+    "random": ".btn-pick",
+    "sound": ".btn-mic-start",
+    "webcam": ".btn-cam-start",
+}
+
+# Camera and microphone widgets get Chromium's fake devices instead of a prompt
+LAUNCH_ARGS = ["--use-fake-ui-for-media-stream", "--use-fake-device-for-media-stream"]
+
+TRACE_CATEGORIES = [
+    "toplevel",
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "disabled-by-default-devtools.timeline.frame",
+    "blink.user_timing",
+    "v8.execute",
+]
+
+SCRIPTING = {
+    "EvaluateScript", "FunctionCall", "TimerFire", "FireAnimationFrame", "FireIdleCallback",
+    "EventDispatch", "RunMicrotasks", "V8.Execute", "v8.compile", "v8.compileModule",
+    "v8.evaluateModule", "v8.run", "XHRReadyStateChange", "XHRLoad", "MinorGC", "MajorGC",
+    "V8.GCScavenger", "V8.GCFinalizeMC", "V8.GCIncrementalMarking",
+}
+LAYOUT = {
+    "Layout", "UpdateLayoutTree", "RecalculateStyles", "ScheduleStyleRecalculation",
+    "InvalidateLayout", "UpdateLayerTree", "PrePaint", "HitTest",
+    "IntersectionObserverController::computeIntersections",
+}
+PAINT = {
+    "Paint", "PaintImage", "PaintSetup", "CompositeLayers", "Layerize", "Commit",
+    "UpdateLayer", "Decode Image", "ImageDecodeTask", "Decode LazyPixelRef", "Rasterize", "RasterTask",
+}
+
+SPAWN_JS = """
+([type, button]) => {
+    spawnWidget(type);
+    const w = widgets[widgets.length - 1];
+    if (button) {
+        const btn = w.el.querySelector(button);
+        if (btn) btn.click();
+    }
+}
+"""
+
+def bucket_of(name):
+    if name in SCRIPTING:
+        return "scripting"
+    if name in LAYOUT:
+        return "layout"
+    if name in PAINT:
+        return "paint"
+    return None
+
+def complete_events(events):
+    """Trace events as complete ("X") events with ts/dur in µs; B/E pairs are matched per thread."""
+    complete, open_events = [], {}
+    for e in sorted((e for e in events if e.get("ph") in ("X", "B", "E")), key=lambda e: e["ts"]):
+        if e["ph"] == "X":
+            complete.append(e)
+        elif e["ph"] == "B":
+            open_events.setdefault((e["pid"], e["tid"]), []).append(e)
+        else:
+            stack = open_events.get((e["pid"], e["tid"]))
+            if stack:
+                begin = stack.pop()
+                complete.append(dict(begin, ph="X", dur=e["ts"] - begin["ts"],
+                                     tdur=e.get("tts", 0) - begin.get("tts", 0) if "tts" in begin else None))
+    return complete
+
+def renderer_main_thread(events, complete):
+    """(pid, tid) of the busiest CrRendererMain thread, i.e. the page's."""
+    mains = {(e["pid"], e["tid"]) for e in events
+             if e.get("ph") == "M" and e.get("name") == "thread_name"
+             and e.get("args", {}).get("name") == "CrRendererMain"}
+    counts = {}
+    for e in complete:
+        key = (e["pid"], e["tid"])
+        if key in mains:
+            counts[key] = counts.get(key, 0) + 1
+    return max(counts, key=counts.get) if counts else None
+
+def analyse(events, window_ms):
+    """The per-widget metrics of one trace (see the module docstring)."""
+    complete = complete_events(events)
+    main = renderer_main_thread(events, complete)
+    if main is None:
+        raise RuntimeError("no renderer main thread in the trace")
+    on_main = sorted((e for e in complete if (e["pid"], e["tid"]) == main),
+                     key=lambda e: (e["ts"], -e.get("dur", 0)))
+
+    # Self time per activity: children are subtracted from their parent and
+    # unknown events inherit the activity of their nearest known ancestor.
+    totals = {"scripting": 0.0, "layout": 0.0, "paint": 0.0, "other": 0.0}
+    stack = []  # [end ts, activity, self µs]
+    tasks = []  # (wall µs, cpu µs) of top-level events, i.e. tasks
+
+    def pop():
+        _, activity, self_us = stack.pop()
+        totals[activity or "other"] += self_us
+
+    for e in on_main:
+        dur = e.get("dur", 0)
+        while stack and stack[-1][0] <= e["ts"]:
+            pop()
+        if stack:
+            stack[-1][2] -= dur
+        else:
+            tasks.append((dur, e.get("tdur") or dur))
+        stack.append([e["ts"] + dur, bucket_of(e["name"]) or (stack[-1][1] if stack else None), dur])
+    while stack:
+        pop()
+
+    long_tasks = [wall / 1000 for wall, _ in tasks if wall / 1000 > LONG_TASK_MS]
+    frames = sorted(e["ts"] for e in events if e.get("name") == "DrawFrame" and e["pid"] == main[0])
+    if not frames:
+        frames = sorted(e["ts"] for e in events if e.get("name") == "DrawFrame")
+    gaps = [(b - a) / 1000 for a, b in zip(frames, frames[1:])]
+    return {
+        "fps": round(len(frames) / (window_ms / 1000), 1),
+        "worst_frame_ms": round(max(gaps, default=0), 1),
+        "long_tasks": len(long_tasks),
+        "longest_task_ms": round(max((wall for wall, _ in tasks), default=0) / 1000, 1),
+        "blocking_ms": round(sum(d - LONG_TASK_MS for d in long_tasks), 1),
+        "scripting_ms": round(totals["scripting"] / 1000, 1),
+        "layout_ms": round(totals["layout"] / 1000, 1),
+        "paint_ms": round(totals["paint"] / 1000, 1),
+        "other_ms": round(totals["other"] / 1000, 1),
+        "cpu_pct": round(100 * sum(cpu for _, cpu in tasks) / 1000 / window_ms, 1),
+    }
+
+def record_trace(page, cdp, seconds):
+    """Trace events of `seconds` of the page, and the traced window in ms."""
+    events, done = [], []
+    cdp.on("Tracing.dataCollected", lambda params: events.extend(params["value"]))
+    cdp.on("Tracing.tracingComplete", lambda params: done.append(True))
+    cdp.send("Tracing.start", {
+        "traceConfig": {"includedCategories": TRACE_CATEGORIES, "recordMode": "recordAsMuchAsPossible"},
+        "transferMode": "ReportEvents",
+    })
+    start = time.monotonic()
+    page.wait_for_timeout(seconds * 1000)
+    window_ms = (time.monotonic() - start) * 1000
+    cdp.send("Tracing.end")
+    while not done:
+        page.wait_for_timeout(50)
+    return events, window_ms
+
+def profile_widget(pool, widget, seconds, settle_ms, cpu_rate):
+    """Profiles one widget on a freshly loaded dashboard ("baseline": no widget)."""
+    with pool.context(viewport=VIEWPORT) as context:
+        install_backend(context, Backend())
+        page = context.new_page()
+        pool.load(page, URL_FILE)
+        page.wait_for_load_state("load")
+        if widget != "baseline":
+            page.evaluate(SPAWN_JS, [widget, START_BUTTONS.get(widget)])
+        page.wait_for_timeout(settle_ms)
+        cdp = context.new_cdp_session(page)
+        cdp.send("Emulation.setCPUThrottlingRate", {"rate": cpu_rate})
+        events, window_ms = record_trace(page, cdp, seconds)
+        return {"widget": widget, "cpu_throttle": cpu_rate, "window_ms": round(window_ms),
+                **analyse(events, window_ms)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the frame cost of every widget with a Chrome trace.")
+    parser.add_argument("names", nargs="*", help="Widgets to profile (default: all, plus the empty baseline)")
+    parser.add_argument("--seconds", type=float, default=5, help="Traced window per widget (default: %(default)s)")
+    parser.add_argument("--settle-ms", type=int, default=1000,
+                        help="Wait after spawning, before tracing (default: %(default)s)")
+    parser.add_argument("--cpu", type=float, default=1, help="CPU slowdown factor (default: %(default)s)")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists('index.html'):
+        print("Error: index.html not found. Please run this script from the project root.")
+        sys.exit(1)
+
+    unknown = [n for n in args.names if n not in WIDGETS and n != "baseline"]
+    if unknown:
+        parser.error(f"unknown widget(s): {', '.join(unknown)}")
+    widgets = args.names or ["baseline"] + WIDGETS
+
+    results = []
+    with sync_playwright() as p, BrowserPool(p, args=LAUNCH_ARGS) as pool:
+        for widget in widgets:
+            try:
+                result = profile_widget(pool, widget, args.seconds, args.settle_ms, args.cpu)
+            except Exception as e:
+                result = {"widget": widget, "cpu_throttle": args.cpu, "error": f"{type(e).__name__}: {e}"}
+            results.append(result)
+            print(json.dumps(result), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {len(results)} profile(s) to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()